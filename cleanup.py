@@ -2,7 +2,7 @@
 import logging
 import os
 import json
-from ddi.config import load_config
+from ddi.config import load_config, Config, ConfigurationError
 from ddi.infoblox import InfobloxManager
 
 # Configure logging
@@ -10,18 +10,20 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 def main():
     """Main function to clean up Infoblox resources."""
-    config_data = load_config()
-    if not config_data:
+    try:
+        config = Config(load_config())
+    except ConfigurationError as e:
+        logging.error(f"Configuration error: {e}")
         return
 
     try:
-        infoblox_config = config_data.get('infoblox', {})
+        infoblox = config.infoblox
         infoblox_manager = InfobloxManager(
-            grid_master_ip=infoblox_config.get('grid_master_ip'),
-            wapi_version=infoblox_config.get('wapi_version'),
-            admin_name=infoblox_config.get('admin_name'),
-            password=infoblox_config.get('password'),
-            network_view=infoblox_config.get('network_view', 'All')
+            grid_master_ip=infoblox.grid_master_ip,
+            wapi_version=infoblox.wapi_version,
+            admin_name=infoblox.admin_name,
+            password=infoblox.password,
+            network_view=infoblox.network_view or 'All'
         )
     except Exception as e:
         logging.error(f"Failed to initialize Infoblox manager: {e}")
@@ -36,6 +38,8 @@ def main():
     ]
 
     logging.info("Starting cleanup of Extensible Attributes...")
+    # One listing records the refs of every EA, so each delete is a single call.
+    infoblox_manager.get_ext_attr_definitions()
     for ea_name in ea_names_to_delete:
         try:
             if infoblox_manager.delete_ext_attr_definition(ea_name):
@@ -3,10 +3,20 @@ import sys
 import os
 import questionary
 import datetime
+import json
 import logging
-from ddi.config import load_config, save_config, ConfigurationError
-from ddi.infoblox import InfobloxManager
+import queue
+import threading
+import time
+from ddi.config import load_config, save_config, Config, ConfigurationError, PLACEHOLDERS
+from ddi.infoblox import InfobloxManager, NetworkFilter, DEFAULT_BATCH_SIZE
+from ddi.journal import Journal
+from ddi.targets import load_targets, select_view, build_managers, run_on_targets
+from ddi import ipam, planner, reports, scheduler, server, shards, watch
 from ddi.providers.aws import AWSProvider
+from ddi.providers.azure import AzureProvider
+from ddi.providers.gcp import GCPProvider
+from ddi.providers.rules import TagRules
 
 # Configure logging
 logging.basicConfig(
@@ -22,7 +32,14 @@ logger = logging.getLogger(__name__)
 # Provider mapping
 PROVIDER_CLASSES = {
     'aws': AWSProvider,
-    # 'azure': AzureProvider, # Future providers will be added here
+    'azure': AzureProvider,
+    'gcp': GCPProvider,
+}
+
+CREDENTIAL_PROMPTS = {
+    'grid_master_ip': 'Enter Infoblox Grid Master IP',
+    'admin_name': 'Enter Infoblox Admin Name',
+    'password': 'Enter Infoblox Password',
 }
 
 def prompt_numbered_list(title, options):
@@ -40,18 +57,22 @@ def prompt_numbered_list(title, options):
             return options[choice - 1]
         click.echo(f"Invalid choice. Please enter a number between 1 and {len(options)}.")
 
-def display_config_dashboard(infoblox_config):
-    """Displays the configuration dashboard."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+def _clear_screen():
+    """Clears the terminal with ANSI escapes instead of spawning a subprocess."""
+    click.echo("\033[2J\033[H", nl=False)
+
+def display_config_dashboard(infoblox_settings):
+    """Displays the configuration dashboard with the effective settings (environment overrides included)."""
+    _clear_screen()
     
-    grid_master = infoblox_config.get('grid_master_ip', 'Not Set')
-    if grid_master == 'YOUR_INFOBLOX_IP': grid_master = 'Not Set'
+    grid_master = infoblox_settings.grid_master_ip or 'Not Set'
+    if grid_master == PLACEHOLDERS['grid_master_ip']: grid_master = 'Not Set'
     
-    admin = infoblox_config.get('admin_name', 'Not Set')
-    if admin == 'YOUR_INFOBLOX_USERNAME': admin = 'Not Set'
+    admin = infoblox_settings.admin_name or 'Not Set'
+    if admin == PLACEHOLDERS['admin_name']: admin = 'Not Set'
     
-    password = infoblox_config.get('password')
-    if password and password != 'YOUR_INFOBLOX_PASSWORD':
+    password = infoblox_settings.password
+    if password and password != PLACEHOLDERS['password']:
         password_display = '********'
     else:
         password_display = 'Not Set'
@@ -69,10 +90,20 @@ def display_config_dashboard(infoblox_config):
     print("|                                                  |")
     print("+--------------------------------------------------+")
 
+def _build_settings(config):
+    """Returns the validated Config of `config`, exiting on configuration errors."""
+    try:
+        return Config(config)
+    except ConfigurationError as e:
+        logger.error(f"Configuration Error: {e}")
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
 @click.group(invoke_without_command=True)
 @click.option('--network-view', default=None, help='The Infoblox network view to operate on.')
+@click.option('--transfer-stats', is_flag=True, help='Print the requests and bytes exchanged with Infoblox when done.')
 @click.pass_context
-def main(ctx, network_view):
+def main(ctx, network_view, transfer_stats):
     """
     A CLI tool to sync network data from cloud providers to Infoblox.
     """
@@ -82,11 +113,21 @@ def main(ctx, network_view):
         logger.error(f"Configuration Error: {e}")
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
+    settings = _build_settings(config)
+    # With several targets configured, --network-view selects among them.
+    view_given = network_view is not None
     
     if 'infoblox' not in config:
         config['infoblox'] = {}
 
     infoblox_config = config['infoblox']
+    # `settings` is only rebuilt (validated, with environment overrides) when
+    # `config` was edited since it was built.
+    settings_stale = False
+    # Handle legacy 'username' key if present
+    if 'username' in infoblox_config and not 'admin_name' in infoblox_config:
+        infoblox_config['admin_name'] = infoblox_config.pop('username')
+        settings_stale = True
     
     changes_made = False
     
@@ -96,32 +137,31 @@ def main(ctx, network_view):
     
     if interactive_mode:
         while True:
-            display_config_dashboard(infoblox_config)
+            if settings_stale:
+                settings = _build_settings(config)
+                settings_stale = False
+            display_config_dashboard(settings.infoblox)
             choice = click.prompt("Enter choice", default='4', show_default=False)
             
             if choice == '1':
                 current_ip = infoblox_config.get('grid_master_ip')
-                if current_ip == 'YOUR_INFOBLOX_IP': current_ip = None
+                if current_ip == PLACEHOLDERS['grid_master_ip']: current_ip = None
                 new_ip = click.prompt('Enter Infoblox Grid Master IP', default=current_ip)
                 if new_ip != current_ip:
                     infoblox_config['grid_master_ip'] = new_ip
-                    changes_made = True
+                    changes_made = settings_stale = True
             
             elif choice == '2':
-                # Handle legacy 'username' key if present
-                if 'username' in infoblox_config and not 'admin_name' in infoblox_config:
-                    infoblox_config['admin_name'] = infoblox_config.pop('username')
-                
                 current_admin = infoblox_config.get('admin_name')
-                if current_admin == 'YOUR_INFOBLOX_USERNAME': current_admin = None
+                if current_admin == PLACEHOLDERS['admin_name']: current_admin = None
                 new_admin = click.prompt('Enter Infoblox Admin Name', default=current_admin)
                 if new_admin != current_admin:
                     infoblox_config['admin_name'] = new_admin
-                    changes_made = True
+                    changes_made = settings_stale = True
             
             elif choice == '3':
-                current_password = infoblox_config.get('password')
-                if current_password == 'YOUR_INFOBLOX_PASSWORD': current_password = None
+                current_password = settings.infoblox.password
+                if current_password == PLACEHOLDERS['password']: current_password = None
                 
                 password_prompt = 'Enter Infoblox Password'
                 if current_password:
@@ -130,17 +170,11 @@ def main(ctx, network_view):
                 new_password = click.prompt(password_prompt, hide_input=True, default='', show_default=False)
                 if new_password:
                     infoblox_config['password'] = new_password
-                    changes_made = True
+                    changes_made = settings_stale = True
             
             elif choice == '4':
-                # Validate before continuing
-                gm = infoblox_config.get('grid_master_ip')
-                an = infoblox_config.get('admin_name')
-                pw = infoblox_config.get('password')
-                
-                if not gm or gm == 'YOUR_INFOBLOX_IP' or \
-                   not an or an == 'YOUR_INFOBLOX_USERNAME' or \
-                   not pw or pw == 'YOUR_INFOBLOX_PASSWORD':
+                # Validate before continuing (environment overrides count as set)
+                if settings.infoblox.missing_fields():
                     click.echo("Error: Missing required configuration. Please set all fields.")
                     click.pause()
                     continue
@@ -151,34 +185,25 @@ def main(ctx, network_view):
              
     else:
         # Non-interactive mode: only prompt if missing
-        if not infoblox_config.get('grid_master_ip') or infoblox_config.get('grid_master_ip') == 'YOUR_INFOBLOX_IP':
-             infoblox_config['grid_master_ip'] = click.prompt('Enter Infoblox Grid Master IP')
-             changes_made = True
-        
-        if 'username' in infoblox_config and not 'admin_name' in infoblox_config:
-            infoblox_config['admin_name'] = infoblox_config.pop('username')
-
-        if not infoblox_config.get('admin_name') or infoblox_config.get('admin_name') == 'YOUR_INFOBLOX_USERNAME':
-            infoblox_config['admin_name'] = click.prompt('Enter Infoblox Admin Name')
-            changes_made = True
-            
-        if not infoblox_config.get('password') or infoblox_config.get('password') == 'YOUR_INFOBLOX_PASSWORD':
-            infoblox_config['password'] = click.prompt('Enter Infoblox Password', hide_input=True)
-            changes_made = True
+        for field in settings.infoblox.missing_fields():
+            infoblox_config[field] = click.prompt(CREDENTIAL_PROMPTS[field], hide_input=field == 'password')
+            changes_made = settings_stale = True
 
     if changes_made:
         if click.confirm('Do you want to save these settings to config.json?'):
             save_config(config)
             click.echo("Configuration saved.")
 
-    grid_master_ip = infoblox_config['grid_master_ip']
-    admin_name = infoblox_config['admin_name']
-    password = infoblox_config['password']
-    wapi_version = infoblox_config.get('wapi_version', '2.13.1')
+    if settings_stale:
+        settings = _build_settings(config)
+    infoblox_settings = settings.infoblox
 
     # --- Network View Selection ---
+    infoblox_section = settings.get('infoblox', {})
+    # Configured targets carry their own views; --network-view picks among them.
+    has_targets = bool(infoblox_section.get('targets') or infoblox_section.get('network_views'))
     if network_view is None:
-        if interactive_mode:
+        if interactive_mode and not has_targets:
             # Ask user if they want to select a view or use default 'All'
             action = prompt_numbered_list(
                 "Select Network View?",
@@ -187,7 +212,8 @@ def main(ctx, network_view):
             
             if action == 'Select from Infoblox':
                 # Initialize temporary manager to fetch views
-                temp_manager = InfobloxManager(grid_master_ip, wapi_version, admin_name, password, 'All')
+                temp_manager = InfobloxManager(infoblox_settings.grid_master_ip, infoblox_settings.wapi_version,
+                                               infoblox_settings.admin_name, infoblox_settings.password, 'All')
                 try:
                     click.echo("Fetching network views from Infoblox...")
                     views = temp_manager.get_network_views()
@@ -209,86 +235,333 @@ def main(ctx, network_view):
         else:
             network_view = 'All'
 
+    try:
+        targets = load_targets(settings.get('infoblox', {}), network_view)
+        for provider_name in PROVIDER_CLASSES:
+            TagRules.from_config(settings, provider_name)  # Fail early on invalid tag rules
+    except ValueError as e:
+        logger.error(f"Configuration Error: {e}")
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    if view_given and has_targets:
+        try:
+            targets = select_view(targets, network_view)
+        except ValueError as e:
+            raise click.UsageError(str(e), ctx)
+    infoblox_managers = build_managers(targets)
+    # The first target is the one single-target commands operate on.
+    infoblox_manager = next(iter(infoblox_managers.values()))
+
     ctx.obj = {
-        'config': config,
-        'infoblox_manager': InfobloxManager(grid_master_ip, wapi_version, admin_name, password, network_view),
-        'network_view': network_view
+        'config': settings,
+        'infoblox_manager': infoblox_manager,
+        'infoblox_managers': infoblox_managers,
+        'network_view': infoblox_manager.network_view
     }
     logger.info("Configuration loaded successfully.")
-    logger.info(f"Grid Master: {grid_master_ip}")
-    if network_view != 'All':
-        logger.info(f"Operating on Network View: {network_view}")
+    logger.info(f"Grid Master: {infoblox_manager.grid_master_ip}")
+    if infoblox_manager.network_view != 'All':
+        logger.info(f"Operating on Network View: {infoblox_manager.network_view}")
+    if len(infoblox_managers) > 1:
+        logger.info(f"Configured Infoblox targets: {', '.join(infoblox_managers)}")
+    ctx.call_on_close(lambda: _report_transfer(infoblox_managers, transfer_stats))
 
     # If no subcommand is invoked, default to the menu
     if interactive_mode:
         ctx.invoke(menu)
 
+def _report_transfer(infoblox_managers, echo):
+    """Logs (and with --transfer-stats prints) the traffic of each Infoblox target."""
+    for name, manager in infoblox_managers.items():
+        if not manager.transfer.requests:
+            continue
+        line = f"Infoblox transfer ({name}): {manager.transfer.summary()}"
+        logger.info(line)
+        if echo:
+            click.echo(line, err=True)
+
 # --- Provider Commands ---
 
-@main.group()
-@click.pass_context
-def aws(ctx):
-    """Commands for AWS."""
-    provider_name = 'aws'
+def _init_provider(ctx, provider_name):
+    """Instantiates the provider and stores it in the context."""
     provider_class = PROVIDER_CLASSES.get(provider_name)
     if not provider_class:
         click.echo(f"Error: Provider '{provider_name}' not found.")
         exit(1)
-    
+
     # Store the provider instance in the context
     ctx.obj['provider'] = provider_class(ctx.obj['config'])
 
-@aws.command()
+@main.group()
+@click.pass_context
+def aws(ctx):
+    """Commands for AWS."""
+    _init_provider(ctx, 'aws')
+
+@main.group()
+@click.pass_context
+def azure(ctx):
+    """Commands for Azure."""
+    _init_provider(ctx, 'azure')
+
+@main.group()
+@click.pass_context
+def gcp(ctx):
+    """Commands for GCP."""
+    _init_provider(ctx, 'gcp')
+
+def _format_record(record):
+    """Formats a provider record as a single line."""
+    return f"{record['id']} ({record['name'] or '-'}) {record['cidr'] or '-'} [{record['account'] or '-'}/{record['region'] or '-'}]"
+
+def _echo_search_results(provider_name, results):
+    """Prints the records matched by a provider search."""
+    if not results:
+        click.echo(f"No matches found in {provider_name.upper()}.")
+        return
+    click.echo(f"Found {len(results)} match(es) in {provider_name.upper()}:")
+    for record in results:
+        click.echo(f"- {_format_record(record)}")
+
+def _echo_audit_findings(provider_name, findings):
+    """Prints the findings of a provider audit."""
+    if not findings:
+        click.echo(f"No issues found in {provider_name.upper()}.")
+        return
+    click.echo(f"Found {len(findings)} issue(s) in {provider_name.upper()}:")
+    for finding in findings:
+        click.echo(f"- {finding['resource']}: {finding['issue']}")
+
+def _emit_plan(ctx, operation, items, batch_size=1):
+    """Writes the plan for `operation` to a timestamped JSON file and prints its estimate."""
+    if items is None:
+        click.echo("Could not build the plan due to errors.", err=True)
+        return
+    provider = ctx.obj['provider']
+    plan = planner.build_plan(operation, provider, ctx.obj['infoblox_manager'], items, batch_size)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_path = f"plan-{operation}-{provider.name}_{timestamp}.json"
+    planner.write_plan(plan, file_path)
+    click.echo(planner.format_estimate(plan))
+    click.echo(f"Plan written to {file_path}. Review it and run 'apply-plan {file_path}' to execute it.")
+
+def _run_on_all_targets(ctx, description, func):
+    """
+    Runs func(infoblox_manager) concurrently on every configured Infoblox
+    target after a single confirmation, and reports the outcome per target.
+    """
+    infoblox_managers = ctx.obj['infoblox_managers']
+    click.echo(f"Infoblox targets: {', '.join(infoblox_managers)}")
+    if not click.confirm(f"Run {description} on {len(infoblox_managers)} target(s)?"):
+        click.echo("Operation cancelled.")
+        return
+    # Parse the export once, before the targets share it.
+    ctx.obj['provider']._get_tag_table()
+
+    outcomes = run_on_targets(infoblox_managers, func)
+    click.echo("\n--- Results per target ---")
+    for name, (failed, error) in outcomes.items():
+        if error is not None:
+            logger.error(f"{description} failed on target {name}: {error}")
+            click.echo(f"{name}: FAILED - {error}", err=True)
+        elif failed is None:
+            click.echo(f"{name}: not completed", err=True)
+        elif failed:
+            click.echo(f"{name}: completed, {failed} item(s) failed", err=True)
+        else:
+            click.echo(f"{name}: completed")
+
+@click.command(name='sync')
+@click.option('--resume', is_flag=True, help='Resume an interrupted sync, skipping networks that already completed.')
+@click.option('--plan', 'plan_only', is_flag=True, help='Write the operation plan and cost estimate without changing Infoblox.')
+@click.option('--all-targets', is_flag=True, help='Sync to every configured Infoblox target concurrently.')
+@click.option('--batch-size', type=click.IntRange(min=1), default=DEFAULT_BATCH_SIZE, show_default=True,
+              help='Networks created per WAPI request.')
+@click.option('--shards', 'shard_count', type=click.IntRange(min=1), help='Split the sync into this many shards for worker processes instead of running it.')
+@click.option('--shard-dir', type=click.Path(file_okay=False), default='ddi-shards', show_default=True,
+              help='Shared directory for shard manifests and results.')
+@click.option('--shard-by', type=click.Choice(['account', 'id']), default='account', show_default=True,
+              help='Partition resources by account or by resource ID.')
 @click.pass_context
-def sync(ctx):
-    """Sync AWS VPC data to Infoblox."""
-    ctx.obj['provider'].sync(ctx.obj['infoblox_manager'])
+def provider_sync(ctx, resume, plan_only, all_targets, batch_size, shard_count, shard_dir, shard_by):
+    """Sync cloud network data to Infoblox."""
+    provider = ctx.obj['provider']
+    if shard_count:
+        if provider.shard_sync(ctx.obj['infoblox_manager'], shard_dir, shard_count, shard_by, batch_size):
+            click.echo(f"Start workers with: ddi-cli.py worker {shard_dir}")
+        return
+    if plan_only:
+        _emit_plan(ctx, 'sync', provider.plan_sync(ctx.obj['infoblox_manager']), batch_size)
+        return
+    if all_targets:
+        _run_on_all_targets(ctx, 'sync', lambda manager: provider.sync(manager, resume=resume, assume_yes=True,
+                                                                       batch_size=batch_size))
+        return
+    provider.sync(ctx.obj['infoblox_manager'], resume=resume, batch_size=batch_size)
 
-@aws.command()
+@click.command(name='search')
 @click.argument('search_term')
 @click.pass_context
-def search(ctx, search_term):
-    """Search for a resource in AWS."""
-    ctx.obj['provider'].search(search_term)
+def provider_search(ctx, search_term):
+    """Search for a resource in the cloud provider."""
+    provider = ctx.obj['provider']
+    _echo_search_results(provider.name, provider.search(search_term))
 
-@aws.command()
+@click.command(name='audit')
 @click.pass_context
-def audit(ctx):
-    """Audit AWS resources."""
-    ctx.obj['provider'].audit()
+def provider_audit(ctx):
+    """Audit the cloud provider's resources."""
+    provider = ctx.obj['provider']
+    _echo_audit_findings(provider.name, provider.audit())
+
+def _echo_ipam_report(report):
+    """Prints an IPAM report built by ddi.ipam.build_report."""
+    click.echo(f"Parsed {report['prefixes']} prefix(es).")
+    for item in report['invalid']:
+        click.echo(f"Warning: {item['resource']}: {item['error']}", err=True)
+    for key in ('account', 'region'):
+        click.echo(f"\n{'By ' + key:<24} {'Prefixes':>9} {'IPv4 addresses':>15} {'IPv6 addresses':>40}")
+        for value, stats in report[f'by_{key}'].items():
+            click.echo(f"{value:<24} {stats['prefixes']:>9} {stats['ipv4_addresses']:>15} {stats['ipv6_addresses']:>40}")
+    for family, supernets in report['supernets'].items():
+        click.echo(f"\nAggregated {family} supernets ({len(supernets)}):")
+        for supernet in supernets:
+            click.echo(f"- {supernet}")
+    for pool, stats in report['pools'].items():
+        click.echo(f"\nPool {pool}: {stats['used_addresses']}/{stats['size']} addresses used ({stats['utilization_percent']}%)")
+        click.echo(f"Free blocks ({len(stats['free_blocks'])}):")
+        for block in stats['free_blocks']:
+            click.echo(f"- {block}")
+
+@click.command(name='ipam-report')
+@click.option('--pool', 'pools', multiple=True, help='Address pool (CIDR) to report utilization and free blocks for. Defaults to ipam.pools in config.json.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Also write the report to this JSON file.')
+@click.pass_context
+def ipam_report(ctx, pools, output):
+    """Report address-space utilization, supernets and free blocks."""
+    provider = ctx.obj['provider']
+    pools = pools or ctx.obj['config'].get('ipam', {}).get('pools', [])
+    try:
+        report = ipam.build_report(ipam.CidrTable.from_records(provider._iter_warm_records()), pools)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        return
+    _echo_ipam_report(report)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        click.echo(f"\nIPAM report exported to {output}")
 
-@aws.group()
+@click.group()
 @click.pass_context
 def attributes(ctx):
-    """Manage AWS Tags and Infoblox Extensible Attributes."""
+    """Manage cloud tags and Infoblox Extensible Attributes."""
     pass
 
 @attributes.command(name='list-missing')
 @click.pass_context
 def list_missing(ctx):
-    """List AWS tags that are missing as Infoblox EAs."""
+    """List cloud tags that are missing as Infoblox EAs."""
     provider = ctx.obj['provider']
     infoblox_manager = ctx.obj['infoblox_manager']
     missing = provider.list_missing_eas(infoblox_manager)
     if missing:
-        click.echo("The following AWS tags are missing as Extensible Attributes in Infoblox:")
+        click.echo(f"The following {provider.display_name} tags are missing as Extensible Attributes in Infoblox:")
         for tag in sorted(missing):
             click.echo(f"- {tag}")
     elif missing is not None:
-        click.echo("No missing Extensible Attributes found. All AWS tags are in sync with Infoblox EAs.")
+        click.echo(f"No missing Extensible Attributes found. All {provider.display_name} tags are in sync with Infoblox EAs.")
 
 @attributes.command(name='create-missing')
+@click.option('--resume', is_flag=True, help='Resume an interrupted run, skipping EAs that were already created.')
+@click.option('--plan', 'plan_only', is_flag=True, help='Write the operation plan and cost estimate without changing Infoblox.')
+@click.option('--all-targets', is_flag=True, help='Create the EAs on every configured Infoblox target concurrently.')
+@click.pass_context
+def create_missing(ctx, resume, plan_only, all_targets):
+    """Create missing Infoblox EAs from cloud tags."""
+    provider = ctx.obj['provider']
+    infoblox_manager = ctx.obj['infoblox_manager']
+    if plan_only:
+        _emit_plan(ctx, 'create-missing', provider.plan_create_missing_eas(infoblox_manager))
+        return
+    if all_targets:
+        _run_on_all_targets(ctx, 'create-missing',
+                            lambda manager: provider.create_missing_eas(manager, resume=resume, assume_yes=True))
+        return
+    provider.create_missing_eas(infoblox_manager, resume=resume)
+
+@attributes.command(name='tag-networks')
+@click.option('--resume', is_flag=True, help='Resume an interrupted run, skipping networks that were already updated.')
+@click.option('--plan', 'plan_only', is_flag=True, help='Write the operation plan and cost estimate without changing Infoblox.')
+@click.option('--all-targets', is_flag=True, help='Tag the networks on every configured Infoblox target concurrently.')
+@click.option('--batch-size', type=click.IntRange(min=1), default=DEFAULT_BATCH_SIZE, show_default=True,
+              help='Networks updated per WAPI request.')
 @click.pass_context
-def create_missing(ctx):
-    """Create missing Infoblox EAs from AWS tags."""
+def tag_networks(ctx, resume, plan_only, all_targets, batch_size):
+    """Write cloud tags as EA values onto the matching Infoblox networks."""
     provider = ctx.obj['provider']
     infoblox_manager = ctx.obj['infoblox_manager']
-    provider.create_missing_eas(infoblox_manager)
+    if plan_only:
+        _emit_plan(ctx, 'tag-networks', provider.plan_tag_networks(infoblox_manager), batch_size)
+        return
+    if all_targets:
+        _run_on_all_targets(ctx, 'tag-networks',
+                            lambda manager: provider.tag_networks(manager, resume=resume, assume_yes=True,
+                                                                  batch_size=batch_size))
+        return
+    provider.tag_networks(infoblox_manager, resume=resume, batch_size=batch_size)
+
+@attributes.command(name='rules')
+@click.pass_context
+def rules(ctx):
+    """Preview how the tag rules map the tag keys in the export."""
+    provider = ctx.obj['provider']
+    preview = provider.preview_tag_rules()
+    if preview is None:
+        return
+    if provider.tag_rules is None:
+        click.echo(f"No tag rules are configured for {provider.display_name}; tag keys are used as they are.")
+    kept = {normalized for _, normalized in preview.values() if normalized is not None}
+    click.echo(f"{len(preview)} tag key(s) in the export map to {len(kept)} EA name(s):")
+    for key, (count, normalized) in sorted(preview.items()):
+        if normalized is None:
+            click.echo(f"- {key} ({count}): excluded")
+        elif normalized != key:
+            click.echo(f"- {key} ({count}) -> {normalized}")
+        else:
+            click.echo(f"- {key} ({count})")
+
+@attributes.command(name='profile')
+@click.option('--key', 'keys', multiple=True, help='Only profile this tag key (repeatable).')
+@click.option('--top', type=click.IntRange(min=1), default=5, show_default=True, help='Most frequent values to show per key.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Also write the profile to this JSON file.')
+@click.pass_context
+def profile(ctx, keys, top, output):
+    """Profile tag values: cardinality, top values, null rates and near-duplicates."""
+    provider = ctx.obj['provider']
+    profiles = provider.profile_tags(top, set(keys) if keys else None)
+    if profiles is None:
+        return
+    if not profiles:
+        click.echo(f"No {provider.display_name} tags found.")
+    for key, stats in profiles.items():
+        click.echo(f"\n{key}: {stats['instances']} tag(s), {stats['cardinality']} distinct value(s), "
+                   f"{stats['null_rate']:.1%} missing or empty")
+        for value, count in stats['top_values']:
+            click.echo(f"  {count:>8}  {value}")
+        for cluster in stats['clusters']:
+            click.echo(f"  Near-duplicates: {' | '.join(cluster)}")
+        if stats['timestamps']:
+            click.echo(f"  Timestamps from {stats['timestamps']['oldest']} to {stats['timestamps']['newest']}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=4)
+        click.echo(f"\nTag profile exported to {output}")
 
 @attributes.command(name='analyze')
 @click.pass_context
 def analyze(ctx):
-    """Analyze and find similarities between AWS tags and Infoblox EAs."""
+    """Analyze and find similarities between cloud tags and Infoblox EAs."""
     provider = ctx.obj['provider']
     infoblox_manager = ctx.obj['infoblox_manager']
     provider.analyze_eas(infoblox_manager)
@@ -313,46 +586,403 @@ def export(ctx):
     provider.export_analysis(infoblox_manager, base_filename)
     click.echo(f"Analysis exported to {base_filename}.json and {base_filename}.csv")
 
+# Every provider group exposes the same commands; they only rely on ctx.obj['provider'].
+for _provider_group in (aws, azure, gcp):
+    for _command in (provider_sync, provider_search, provider_audit, ipam_report, attributes):
+        _provider_group.add_command(_command)
 
+# --- Global Commands ---
 
-# --- Future provider command groups would go here ---
-# @main.group()
-# @click.pass_context
-# def azure(ctx):
-#     """Commands for Azure."""
-#     ...
+def _configured_providers(ctx):
+    """
+    Returns an instance of every provider that has a section in the config,
+    reusing the menu session's providers when there is one. Export file paths
+    are resolved here, on the main thread, so that any prompt happens before
+    work is fanned out.
+    """
+    config = ctx.obj['config']
+    session = ctx.obj.get('session')
+    providers = []
+    for provider_name, provider_class in PROVIDER_CLASSES.items():
+        if provider_name in config:
+            if session:
+                providers.append(session.provider(provider_name))
+                continue
+            provider = provider_class(config)
+            provider._get_export_file_path()
+            providers.append(provider)
+    if session:
+        session.wait()
+    return providers
 
-# --- Global Commands ---
+def _fan_out(providers, method_name, args=(), timeout=None):
+    """
+    Runs the generator method `method_name` on every provider concurrently and
+    streams the merged output as it arrives.
+
+    Yields ('item', provider, item) for every item produced by any provider,
+    and ('done', provider, error) once per provider. Providers still running
+    when `timeout` seconds have elapsed are reported as done with a
+    TimeoutError; the items they produced up to then have already been yielded.
+    Workers are daemon threads, so a hung provider never blocks exit.
+    """
+    events = queue.Queue()
+
+    def run(provider):
+        try:
+            for item in getattr(provider, method_name)(*args):
+                events.put(('item', provider, item))
+            events.put(('done', provider, None))
+        except Exception as e:
+            logger.error(f"Error running {method_name} in {provider.name}: {e}")
+            events.put(('done', provider, e))
+
+    pending = {provider.name: provider for provider in providers}
+    for provider in providers:
+        threading.Thread(target=run, args=(provider,), name=f"ddi-{provider.name}", daemon=True).start()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while pending:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        try:
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            event = events.get(timeout=remaining)
+        except queue.Empty:
+            for provider in pending.values():
+                yield ('done', provider, TimeoutError(f"timed out after {timeout:g}s"))
+            return
+        if event[0] == 'done':
+            del pending[event[1].name]
+        yield event
+
+def _run_global(providers, method_name, args, timeout, echo_item):
+    """
+    Fans `method_name` out over `providers`, echoing items as they arrive, and
+    prints a per-provider summary that flags failed and timed-out providers.
+    """
+    counts = {provider.name: 0 for provider in providers}
+    errors = {}
+    started = time.monotonic()
+    for kind, provider, payload in _fan_out(providers, method_name, args, timeout):
+        if kind == 'item':
+            counts[provider.name] += 1
+            echo_item(provider, payload)
+        elif payload is not None:
+            errors[provider.name] = payload
+
+    click.echo(f"\n--- Summary ({time.monotonic() - started:.2f}s) ---")
+    for provider in providers:
+        error = errors.get(provider.name)
+        if error is None:
+            click.echo(f"{provider.name.upper()}: {counts[provider.name]} result(s)")
+        else:
+            click.echo(f"{provider.name.upper()}: {counts[provider.name]} partial result(s), {error}", err=True)
+    if errors:
+        click.echo(f"Results are partial: {len(errors)} of {len(providers)} provider(s) did not complete.", err=True)
 
 @main.command()
 @click.argument('search_term')
+@click.option('--timeout', type=float, default=60.0, show_default=True, help='Seconds to wait for each provider.')
+@click.option('--infoblox', 'include_infoblox', is_flag=True, help='Also search the Infoblox networks (with the WAPI global search).')
 @click.pass_context
-def search(ctx, search_term):
+def search(ctx, search_term, timeout, include_infoblox):
     """Search for a resource across all configured cloud providers."""
     click.echo(f"--- Starting global search for '{search_term}' ---")
-    config = ctx.obj['config']
-    for provider_name, provider_class in PROVIDER_CLASSES.items():
-        if provider_name in config:
-            click.echo(f"\n--- Searching in {provider_name.upper()} ---")
-            provider = provider_class(config)
-            provider.search(search_term)
+    providers = _configured_providers(ctx)
+    _run_global(providers, 'iter_search', (search_term,), timeout,
+                lambda provider, record: click.echo(f"[{provider.name.upper()}] {_format_record(record)}"))
+    if include_infoblox:
+        for network in ctx.obj['infoblox_manager'].search_objects(search_term) or []:
+            click.echo(f"[INFOBLOX] {_format_network(network)}")
     click.echo("\n--- Global search complete ---")
 
+def _format_network(network):
+    extattrs = ", ".join(f"{name}={attr.get('value')}" for name, attr in (network.get('extattrs') or {}).items())
+    comment = f" - {network['comment']}" if network.get('comment') else ""
+    return f"{network.get('network')} [{network.get('network_view')}]{comment}{f' ({extattrs})' if extattrs else ''}"
+
+def _parse_assignments(values, option):
+    """Parses NAME=VALUE option values into a dict."""
+    parsed = {}
+    for value in values:
+        name, separator, text = value.partition('=')
+        if not separator or not name:
+            raise click.BadParameter(f"expected NAME=VALUE, got {value!r}", param_hint=option)
+        parsed[name] = text
+    return parsed
+
+@main.command(name='find-networks')
+@click.option('--within', help='Only networks inside this CIDR.')
+@click.option('--contains', help='Only networks containing this address or CIDR.')
+@click.option('--ea', 'extattrs', multiple=True, help='EA value to match exactly, as NAME=VALUE (repeatable).')
+@click.option('--ea-match', 'extattr_patterns', multiple=True, help='EA regular expression, as NAME=REGEX (repeatable).')
+@click.option('--comment', help='Text the network comment must contain.')
+@click.pass_context
+def find_networks(ctx, within, contains, extattrs, extattr_patterns, comment):
+    """Find Infoblox networks; the filtering runs on the grid."""
+    try:
+        network_filter = NetworkFilter(within, contains, _parse_assignments(extattrs, '--ea'),
+                                       _parse_assignments(extattr_patterns, '--ea-match'), comment)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        return
+    networks = ctx.obj['infoblox_manager'].find_networks(network_filter)
+    if networks is None:
+        return
+    for network in networks:
+        click.echo(_format_network(network))
+    click.echo(f"{len(networks)} network(s) found.")
+
 
 @main.command()
+@click.option('--timeout', type=float, default=60.0, show_default=True, help='Seconds to wait for each provider.')
 @click.pass_context
-def audit(ctx):
+def audit(ctx, timeout):
     """Audit resources across all configured cloud providers."""
     click.echo(f"--- Starting global audit ---")
-    config = ctx.obj['config']
-    for provider_name, provider_class in PROVIDER_CLASSES.items():
-        if provider_name in config:
-            click.echo(f"\n--- Auditing in {provider_name.upper()} ---")
-            provider = provider_class(config)
-            provider.audit()
+    providers = _configured_providers(ctx)
+    _run_global(providers, 'iter_audit', (), timeout,
+                lambda provider, finding: click.echo(f"[{provider.name.upper()}] {finding['resource']}: {finding['issue']}"))
     click.echo("\n--- Global audit complete ---")
 
 
+@main.command(name='watch')
+@click.option('--interval', type=float, default=watch.DEFAULT_INTERVAL, show_default=True, help='Seconds between checks of the export files.')
+@click.option('--initial-sync', is_flag=True, help='Sync every network on startup instead of only later changes.')
+@click.pass_context
+def watch_exports(ctx, interval, initial_sync):
+    """Watch the export files and sync changed networks as they change."""
+    providers = _configured_providers(ctx)
+    if not providers:
+        click.echo("No providers are configured.", err=True)
+        return
+    watcher = watch.ExportWatcher(providers, ctx.obj['infoblox_manager'])
+    click.echo("Loading exports...")
+    for name, outcome in watcher.start(initial_sync).items():
+        click.echo(watch.format_outcome(name, outcome))
+    for provider in providers:
+        click.echo(f"Watching {provider._get_export_file_path()} ({provider.display_name})")
+    click.echo("Press Ctrl+C to stop.")
+    try:
+        watcher.run(interval)
+    except KeyboardInterrupt:
+        click.echo("\nStopped watching.")
+
+
+@main.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on.')
+@click.option('--port', type=int, default=8080, show_default=True, help='Port to listen on.')
+@click.pass_context
+def serve(ctx, host, port):
+    """Serve analysis, search, audit and sync plans over a local HTTP/JSON API."""
+    providers = _configured_providers(ctx)
+    api = server.DdiApi(providers, ctx.obj['infoblox_managers'])
+    click.echo("Loading exports and Infoblox data...")
+    for error in api.warm().values():
+        click.echo(f"Warning: {error}", err=True)
+    httpd = server.make_server(api, host, port)
+    click.echo(f"Serving on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("\nServer stopped.")
+    finally:
+        httpd.server_close()
+
+
+@main.group()
+def report():
+    """Work with exported analysis reports."""
+    pass
+
+@report.command(name='diff')
+@click.argument('old_report', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new_report', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', type=click.Path(dir_okay=False), help='Also write every change to this JSON Lines file.')
+def report_diff(old_report, new_report, output):
+    """Compare two reports written by 'attributes export'."""
+    try:
+        old, new = reports.AnalysisReport(old_report), reports.AnalysisReport(new_report)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error reading report: {e}", err=True)
+        return
+    counts = {}
+    out = open(output, 'w', encoding='utf-8') if output else None
+    try:
+        with old, new:
+            for change in reports.iter_report_diff(old, new):
+                counts[change['section']] = counts.get(change['section'], 0) + 1
+                click.echo(reports.format_change(change))
+                if out is not None:
+                    out.write(json.dumps(change) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    if not counts:
+        click.echo("The reports are identical.")
+    else:
+        click.echo("\nChanges: " + ", ".join(f"{section} {count}" for section, count in counts.items()))
+    if output:
+        click.echo(f"Changes exported to {output}")
+
+
+class MenuSession:
+    """
+    State kept for the lifetime of the interactive menu.
+
+    Providers are instantiated once and reused, and the provider exports, EA
+    definitions and network views are loaded in the background as soon as the
+    session starts, so that later actions run against warm caches.
+    """
+
+    def __init__(self, config, infoblox_manager):
+        self.config = config
+        self.infoblox_manager = infoblox_manager
+        self.providers = {}
+        self._threads = []
+
+    def provider(self, provider_name):
+        """Returns the session's instance of the provider, creating it on first use."""
+        if provider_name not in self.providers:
+            provider = PROVIDER_CLASSES[provider_name](self.config)
+            # Resolve (and possibly prompt for) the export path on the main thread.
+            provider._get_export_file_path()
+            self.providers[provider_name] = provider
+            self._prefetch(provider.warm, f"{provider.display_name} export")
+        return self.providers[provider_name]
+
+    def start(self):
+        """Starts background loading of everything that is already configured."""
+        self._prefetch(self.infoblox_manager.get_ext_attr_definitions, "Extensible Attributes")
+        self._prefetch(self.infoblox_manager.get_network_views, "network views")
+        for provider_name in PROVIDER_CLASSES:
+            provider_config = self.config.get(provider_name)
+            if provider_config and provider_config.get(PROVIDER_CLASSES[provider_name].export_file_key):
+                self.provider(provider_name)
+
+    def refresh(self):
+        """Drops all warm state and starts loading it again."""
+        self.wait()
+        self.infoblox_manager.clear_cache()
+        for provider in self.providers.values():
+            provider.refresh()
+        self._prefetch(self.infoblox_manager.get_ext_attr_definitions, "Extensible Attributes")
+        self._prefetch(self.infoblox_manager.get_network_views, "network views")
+        for provider in self.providers.values():
+            self._prefetch(provider.warm, f"{provider.display_name} export")
+
+    def wait(self):
+        """Blocks until background loading has finished."""
+        if any(thread.is_alive() for thread in self._threads):
+            click.echo("Waiting for background loading to finish...")
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _prefetch(self, func, description):
+        def run():
+            try:
+                func()
+            except Exception as e:
+                logger.error(f"Error prefetching {description}: {e}")
+        thread = threading.Thread(target=run, name="ddi-prefetch", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+@main.command()
+@click.argument('shard_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--once', is_flag=True, help='Exit when no shard is left to claim instead of waiting for stale ones.')
+@click.option('--poll', type=float, default=30, show_default=True, help='Seconds between checks for stale shards.')
+@click.option('--stale-after', type=float, default=shards.DEFAULT_STALE_AFTER, show_default=True,
+              help='Seconds without a heartbeat after which another worker may take over a shard.')
+@click.pass_context
+def worker(ctx, shard_dir, once, poll, stale_after):
+    """Claim and run sync shards from a shared directory."""
+    infoblox_manager = ctx.obj['infoblox_manager']
+    worker_name = shards.worker_id()
+    while True:
+        shard = shards.claim(shard_dir, worker_name, stale_after)
+        if shard is None:
+            if once or shards.merge_results(shard_dir, stale_after)['complete']:
+                break
+            time.sleep(poll)
+            continue
+        manifest = shards.load_manifest(shard_dir, shard)
+        if (manifest['grid_master'], manifest['network_view']) != (infoblox_manager.grid_master_ip, infoblox_manager.network_view):
+            click.echo(f"Error: Shard {shard} targets {manifest['grid_master']} [{manifest['network_view']}], "
+                       f"not {infoblox_manager.grid_master_ip} [{infoblox_manager.network_view}].", err=True)
+            shards.release(shard_dir, shard)
+            return
+        click.echo(f"Running shard {shard} ({len(manifest['items'])} network(s))...")
+        result = shards.run_shard(shard_dir, shard, infoblox_manager, worker_name, stale_after)
+        if result is None:
+            click.echo(f"Shard {shard} was taken over by another worker; its result is left to that worker.", err=True)
+            continue
+        click.echo(f"Shard {shard}: {result['items'] - len(result['failed'])} synced, {len(result['failed'])} failed.")
+    click.echo("No shards left to run.")
+
+@main.command(name='merge-shards')
+@click.argument('shard_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--retry-failed', is_flag=True, help='Reopen shards with failed networks so that workers run them again.')
+def merge_shards(shard_dir, retry_failed):
+    """Merge the results of sync shards into summary.json."""
+    summary = shards.merge_results(shard_dir)
+    for shard, entry in summary['shards'].items():
+        details = f", {entry['items'] - entry['failed']} synced, {entry['failed']} failed in {entry['seconds']}s" if 'items' in entry else ""
+        worker_name = f" ({entry['worker']})" if entry.get('worker') else ""
+        click.echo(f"Shard {shard}: {entry['status']}{worker_name}{details}")
+    totals = summary['totals']
+    click.echo(f"\n{totals['items'] - totals['failed']} network(s) synced, {totals['failed']} failed"
+               f"{'' if summary['complete'] else ' so far; some shards have not finished'}.")
+    click.echo(f"Summary written to {os.path.join(shard_dir, shards.SUMMARY_FILE)}")
+    if retry_failed:
+        reopened = [shard for shard, entry in summary['shards'].items() if entry['status'] == 'failed']
+        for shard in reopened:
+            shards.retry(shard_dir, shard)
+        click.echo(f"Reopened {len(reopened)} shard(s) for workers.")
+
+@main.command(name='apply-plan')
+@click.argument('plan_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--resume', is_flag=True, help='Resume an interrupted run, skipping items that already completed.')
+@click.pass_context
+def apply_plan(ctx, plan_file, resume):
+    """Execute a plan written by --plan."""
+    plan = planner.load_plan(plan_file)
+    infoblox_manager = ctx.obj['infoblox_manager']
+    if (plan['grid_master'], plan['network_view']) != (infoblox_manager.grid_master_ip, infoblox_manager.network_view):
+        click.echo(f"Error: The plan targets {plan['grid_master']} [{plan['network_view']}], "
+                   f"not {infoblox_manager.grid_master_ip} [{infoblox_manager.network_view}].", err=True)
+        return
+    click.echo(planner.format_estimate(plan))
+    if not click.confirm("\nDo you want to execute this plan?"):
+        click.echo("Operation cancelled.")
+        return
+
+    items = {item['key']: item for item in plan['items']}
+    failed = 0
+    with Journal(infoblox_manager.journal_name(f"{plan['operation']}-{plan['provider']}"), resume=resume) as journal:
+        if plan['operation'] == 'tag-networks':
+            # EA updates go out in multi-object batches, as estimated.
+            updates = {key: item['payload'] for key, item in items.items()}
+            failed = len(infoblox_manager.update_extattrs_batches(updates, journal=journal,
+                                                                  batch_size=plan['estimate']['batch_size']))
+            items = {}
+        elif plan['operation'] == 'sync':
+            # Networks are created level by level, parents before children.
+            levels = scheduler.levels_from_items(plan['items'])
+            failed = len(infoblox_manager.create_network_levels(levels, journal=journal,
+                                                                batch_size=plan['estimate']['batch_size']))
+            items = {}
+        for key in journal.plan(list(items)):
+            ok = infoblox_manager.apply_plan_item(items[key])
+            journal.record(key, ok, None if ok else "failed")
+            if not ok:
+                failed += 1
+    if failed:
+        click.echo(f"{failed} item(s) failed. Re-run with --resume to retry them.", err=True)
+    click.echo("Plan execution completed.")
+
 def _get_command_from_path(path):
     cmd = main
     for part in path:
@@ -361,7 +991,7 @@ def _get_command_from_path(path):
 
 def _display_menu(path, network_view):
     """Clears the screen and displays the menu for the given path."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    _clear_screen()
     
     view_str = f"[{network_view}]"
     breadcrumbs = " > ".join(['Home', view_str] + path)
@@ -394,6 +1024,7 @@ def _display_menu(path, network_view):
         print(f"|{' ' * width}|")
         
     print(f"|  0. Back{' ' * (width-10)} |")
+    print(f"|  r. Refresh data{' ' * (width-18)} |")
     print(f"|  q. Quit{' ' * (width-10)} |")
     print(f"|{' ' * width}|")
     print(f"+{'-' * width}+")
@@ -407,7 +1038,11 @@ def menu(ctx):
     
     infoblox_manager = ctx.obj['infoblox_manager']
     network_view = ctx.obj['network_view']
-    
+
+    session = MenuSession(ctx.obj['config'], infoblox_manager)
+    ctx.obj['session'] = session
+    session.start()
+
     path = []
     
     while True:
@@ -421,6 +1056,10 @@ def menu(ctx):
 
             if choice.lower() == 'q':
                 break
+
+            if choice.lower() == 'r':
+                session.refresh()
+                continue
             
             if choice == '0':
                 if path:
@@ -442,12 +1081,11 @@ def menu(ctx):
             if isinstance(selected_cmd, click.Group):
                 path.append(selected_name)
                 
-                # If we are entering a provider group, instantiate the provider
+                # If we are entering a provider group, use the session's provider
                 # and add it to the context, simulating what the group callback does.
                 if selected_name in PROVIDER_CLASSES:
                     try:
-                        provider_class = PROVIDER_CLASSES[selected_name]
-                        ctx.obj['provider'] = provider_class(ctx.obj['config'])
+                        ctx.obj['provider'] = session.provider(selected_name)
                     except Exception as e:
                         logger.error(f"Error initializing provider '{selected_name}': {e}")
                         print(f"Error initializing provider: {e}")
@@ -470,7 +1108,8 @@ def menu(ctx):
                     continue
 
                 print(f"\nExecuting: {selected_name}\n")
-                
+                session.wait()
+
                 # Invoke the command
                 try:
                     ctx.invoke(selected_cmd, **kwargs)
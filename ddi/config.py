@@ -1,10 +1,42 @@
+import copy
+import functools
 import json
+import os
+from collections.abc import Mapping
 from os import path
 import shutil
 
 CONFIG_FILE = "config.json"
 CONFIG_EXAMPLE_FILE = "config.json.example"
 
+# Values of the example config that mean "not configured yet".
+PLACEHOLDERS = {
+    'grid_master_ip': 'YOUR_INFOBLOX_IP',
+    'admin_name': 'YOUR_INFOBLOX_USERNAME',
+    'password': 'YOUR_INFOBLOX_PASSWORD',
+}
+
+# Expected type of every known setting, per section. Unknown keys are allowed.
+SCHEMA = {
+    'infoblox': {
+        'grid_master_ip': str, 'wapi_version': str, 'admin_name': str, 'password': str,
+        'network_view': str, 'targets': list, 'network_views': list, 'transport': str,
+    },
+    'aws': {
+        'vpc_export_file': str, 'mmap_threshold_mb': (int, float), 'parallel_workers': int, 'tag_rules': list,
+        'source': str, 'api_role_arns': list, 'api_regions': list, 'api_rate_limit': (int, float), 'api_workers': int,
+    },
+    'azure': {'vnet_export_file': str, 'tag_rules': list},
+    'gcp': {'vpc_export_file': str, 'tag_rules': list},
+    'ipam': {'pools': list},
+}
+TOP_LEVEL_SCHEMA = {'tag_rules': list, 'memory_budget_mb': (int, float)}
+
+ENV_PREFIX = "DDI_"
+
+# Parsed config files: {absolute path: (mtime_ns, size, config)}
+_LOADED = {}
+
 class ConfigurationError(Exception):
     """Exception raised for configuration errors."""
     pass
@@ -21,6 +53,13 @@ def load_config():
                 "Please ensure 'config.json.example' exists in the project root."
             )
 
+    # The file is only re-read when it changed; callers get their own copy to edit.
+    stat = os.stat(CONFIG_FILE)
+    file_key = path.abspath(CONFIG_FILE)
+    loaded = _LOADED.get(file_key)
+    if loaded is not None and loaded[:2] == (stat.st_mtime_ns, stat.st_size):
+        return copy.deepcopy(loaded[2])
+
     with open(CONFIG_FILE, 'r') as f:
         try:
             config = json.load(f)
@@ -29,17 +68,21 @@ def load_config():
                 f"Error decoding JSON from '{CONFIG_FILE}': {e}\n"
                 "Please check the syntax of your config.json file."
             )
-    return config
+    _LOADED[file_key] = (stat.st_mtime_ns, stat.st_size, config)
+    return copy.deepcopy(config)
+
+@functools.lru_cache(maxsize=None)
+def _split_key(key):
+    return tuple(key.split('.'))
 
 def get_config_value(config, key, default=None):
     """
     Safely gets a value from the config dictionary.
     Example: get_config_value(config, "infoblox.username")
     """
-    keys = key.split('.')
     value = config
-    for k in keys:
-        if isinstance(value, dict) and k in value:
+    for k in _split_key(key):
+        if isinstance(value, Mapping) and k in value:
             value = value[k]
         else:
             return default
@@ -50,3 +93,121 @@ def save_config(config):
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=4)
 
+
+class FrozenDict(dict):
+    """A dict that cannot be modified after it has been built."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Configuration is read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _env_overrides(environ):
+    """
+    Returns [(section, key, value)] from DDI_<SECTION>_<KEY> environment
+    variables (e.g. DDI_INFOBLOX_PASSWORD) for the scalar settings in SCHEMA.
+    """
+    overrides = []
+    for section, fields in SCHEMA.items():
+        for key, expected in fields.items():
+            name = f"{ENV_PREFIX}{section}_{key}".upper()
+            raw = environ.get(name)
+            if raw is None or expected is list:
+                continue
+            try:
+                value = int(raw) if expected is int else float(raw) if expected == (int, float) else raw
+            except ValueError:
+                raise ConfigurationError(f"Environment variable {name} must be a number, not {raw!r}")
+            overrides.append((section, key, value))
+    return overrides
+
+def _type_name(expected):
+    names = {str: 'a string', int: 'an integer', list: 'a list', (int, float): 'a number'}
+    return names.get(expected, str(expected))
+
+def validate(config):
+    """Checks the config against SCHEMA. Raises ConfigurationError listing every problem."""
+    problems = []
+    if not isinstance(config, dict):
+        raise ConfigurationError(f"'{CONFIG_FILE}' must contain a JSON object.")
+    for key, expected in TOP_LEVEL_SCHEMA.items():
+        if key in config and not isinstance(config[key], expected):
+            problems.append(f"'{key}' must be {_type_name(expected)}")
+    for section, fields in SCHEMA.items():
+        if section not in config:
+            continue
+        if not isinstance(config[section], dict):
+            problems.append(f"'{section}' must be an object")
+            continue
+        for key, expected in fields.items():
+            value = config[section].get(key)
+            # bool is an int subclass, but never a valid number setting
+            if value is not None and (not isinstance(value, expected) or isinstance(value, bool)):
+                problems.append(f"'{section}.{key}' must be {_type_name(expected)}")
+    if problems:
+        raise ConfigurationError("Invalid configuration:\n  - " + "\n  - ".join(problems))
+
+
+class InfobloxSettings:
+    """Typed, resolved connection settings of the "infoblox" section."""
+
+    def __init__(self, section):
+        self.grid_master_ip = section.get('grid_master_ip')
+        self.wapi_version = section.get('wapi_version') or '2.13.1'
+        self.admin_name = section.get('admin_name')
+        self.password = section.get('password')
+        self.network_view = section.get('network_view')
+
+    def missing_fields(self):
+        """Returns the required settings that are unset or still hold an example placeholder."""
+        return [field for field, placeholder in PLACEHOLDERS.items()
+                if getattr(self, field) in (None, '', placeholder)]
+
+
+class Config(Mapping):
+    """
+    Validated, read-only configuration.
+
+    Built once from the parsed config.json: DDI_<SECTION>_<KEY> environment
+    variables override file settings, the result is checked against SCHEMA,
+    and every nested object and list is frozen. It reads like the config
+    dict (`config['aws']`, `config.get('ipam', {})`), and the Infoblox
+    connection settings are resolved up front as `config.infoblox`.
+    """
+
+    def __init__(self, data, environ=None):
+        data = copy.deepcopy(dict(data))
+        for section, key, value in _env_overrides(os.environ if environ is None else environ):
+            if not isinstance(data.get(section), dict):
+                data[section] = {}
+            data[section][key] = value
+        validate(data)
+        self._data = _freeze(data)
+        self.infoblox = InfobloxSettings(self._data.get('infoblox', {}))
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def value(self, key, default=None):
+        """Returns a setting by dotted key, e.g. config.value("aws.vpc_export_file")."""
+        return get_config_value(self._data, key, default)
+
+    def to_dict(self):
+        """Returns a mutable deep copy of the settings."""
+        return json.loads(json.dumps(self._data))
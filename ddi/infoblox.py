@@ -1,130 +1,735 @@
+import re
+import json
+import time
+import itertools
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from ddi import ipam, transport
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib decoder is the fallback
+    _json_loads = json.loads
+
+# Responses at least this large (or of unknown length) are decoded object by
+# object instead of being buffered and decoded in one go.
+STREAM_DECODE_THRESHOLD = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+# Maximum number of pooled keep-alive connections per manager.
+CONNECTION_POOL_SIZE = 10
+# Objects per page when reading listings that may exceed WAPI's result limit.
+PAGE_SIZE = 1000
+# Fields of the networks returned by searches (matched and printed on them).
+NETWORK_SEARCH_FIELDS = ['network', 'network_view', 'comment', 'extattrs']
+# Object updates sent in one multi-object `request` call.
+DEFAULT_BATCH_SIZE = 500
+
+_JSON_STRUCTURAL = re.compile(rb'[\\"{}\[\]]')
+# WAPI `~` searches use POSIX extended regular expressions.
+_POSIX_METACHARACTERS = set('.[]()*+?{}|^$\\')
+
+def _iter_json_array(chunks):
+    """
+    Incrementally decodes a top-level JSON array of objects from an iterable
+    of byte chunks, yielding one decoded object at a time. Only the bytes of
+    the object currently being read are kept in memory.
+    """
+    buffer = b''
+    pos = 0
+    depth = 0
+    in_string = False
+    start = None
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            match = _JSON_STRUCTURAL.search(buffer, pos)
+            if not match:
+                # An escape at the very end of the buffer may have pushed pos past it.
+                pos = max(pos, len(buffer))
+                break
+            char = match.group()
+            pos = match.end()
+            if in_string:
+                if char == b'\\':
+                    pos += 1
+                elif char == b'"':
+                    in_string = False
+            elif char == b'"':
+                in_string = True
+            elif char in b'{[':
+                depth += 1
+                if depth == 2 and char == b'{':
+                    start = match.start()
+            else:
+                depth -= 1
+                if depth == 1 and start is not None:
+                    yield _json_loads(buffer[start:pos])
+                    start = None
+        if start is None and pos <= len(buffer):
+            buffer = buffer[pos:]
+            pos = 0
+
+def _decode_response(response):
+    """
+    Decodes a (streamed) WAPI response. Small bodies are decoded in one go;
+    large JSON arrays are decoded object by object as they arrive. Paged
+    listings (`_return_as_object`) are objects, so each page is decoded in
+    one go; pages are bounded by PAGE_SIZE objects.
+    """
+    length = response.headers.get('Content-Length')
+    # The length of a compressed body says little about its decoded size.
+    if length is not None and not response.headers.get('Content-Encoding') and int(length) < STREAM_DECODE_THRESHOLD:
+        return _json_loads(response.content)
+
+    chunks = response.iter_content(STREAM_CHUNK_SIZE)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if head.strip():
+            break
+    chunks = itertools.chain([head], chunks)
+    if not head.lstrip().startswith(b'['):
+        return _json_loads(b''.join(chunks))
+    return list(_iter_json_array(chunks))
+
+def _natural_key(object_type, obj):
+    """Returns the natural key of a WAPI object (EA name, (view, CIDR)), or None."""
+    if object_type == 'extensibleattributedef' and 'name' in obj:
+        return obj['name']
+    if object_type in ('network', 'networkcontainer') and 'network' in obj:
+        # Network refs end in "<cidr>/<view>"
+        return (obj.get('network_view') or obj['_ref'].rsplit('/', 1)[-1], obj['network'])
+    return None
+
+def _posix_escape(text):
+    """Escapes the POSIX extended regex metacharacters of `text`, for WAPI `~` searches."""
+    return ''.join('\\' + char if char in _POSIX_METACHARACTERS else char for char in text)
+
+def _is_stale_ref(response):
+    """Returns True if WAPI rejected a request because its `_ref` no longer exists."""
+    return response.status_code == 404 or (response.status_code == 400 and b'NotFound' in response.content)
+
+class NetworkFilter:
+    """
+    Criteria for finding Infoblox networks, all of which must match:
+        within             CIDR the network must lie in (or be)
+        contains           address or CIDR the network must contain
+        extattrs           {EA name: value} that must be equal
+        extattr_patterns   {EA name: regular expression} that must match
+        comment            substring of the comment (case-insensitive)
+
+    `wapi_params` expresses as much of it as WAPI can evaluate; `residual`
+    lists the checks that have to be made on the returned networks.
+    """
+
+    def __init__(self, within=None, contains=None, extattrs=None, extattr_patterns=None, comment=None):
+        self.within = ipam.parse_cidr(within) if within else None
+        self.contains = ipam.parse_cidr(contains) if contains else None
+        self.extattrs = dict(extattrs or {})
+        self.extattr_patterns = dict(extattr_patterns or {})
+        self.comment = comment
+
+    def wapi_params(self):
+        """Returns the WAPI search parameters for the network object."""
+        params = {}
+        if self.within is not None and self.within[0] == 4 and self.within[2] >= 8:
+            # Regex on the leading octets; it also admits a larger network that
+            # starts at the same address (10.1.2.0/23 for 10.1.2.0/24), so the
+            # prefix length is always checked on the candidates.
+            version, network, prefix = self.within
+            octets = ipam.format_cidr(version, network, prefix).split('/')[0].split('.')[:prefix // 8]
+            # A full address (/32) is matched to its end, not followed by another octet.
+            params['network~'] = '^' + r'\.'.join(octets) + (r'\.' if len(octets) < 4 else '/')
+        if self.contains is not None:
+            version, network, _ = self.contains
+            params['contains_address'] = ipam.format_cidr(version, network, ipam.ADDRESS_BITS[version]).split('/')[0]
+        for name, value in self.extattrs.items():
+            params[f"*{name}"] = value
+        for name, pattern in self.extattr_patterns.items():
+            params[f"*{name}~"] = pattern
+        if self.comment:
+            params['comment~:'] = _posix_escape(self.comment)
+        return params
+
+    def residual(self):
+        """Returns the checks WAPI cannot make, as functions of a network object."""
+        checks = []
+        if self.within is not None:
+            checks.append(self._is_within)
+        if self.contains is not None and self.contains[2] < ipam.ADDRESS_BITS[self.contains[0]]:
+            # contains_address matched one address; the network must hold the whole CIDR.
+            checks.append(self._contains)
+        return checks
+
+    @staticmethod
+    def _parse(network):
+        try:
+            return ipam.parse_cidr(network.get('network', ''))
+        except ValueError:
+            return None
+
+    def _is_within(self, network):
+        parsed = self._parse(network)
+        version, outer, prefix = self.within
+        if parsed is None or parsed[0] != version or parsed[2] < prefix:
+            return False
+        host_bits = ipam.ADDRESS_BITS[version] - prefix
+        return parsed[1] >> host_bits == outer >> host_bits
+
+    def _contains(self, network):
+        parsed = self._parse(network)
+        version, inner, prefix = self.contains
+        if parsed is None or parsed[0] != version or parsed[2] > prefix:
+            return False
+        host_bits = ipam.ADDRESS_BITS[version] - parsed[2]
+        return inner >> host_bits == parsed[1] >> host_bits
 
 class InfobloxManager:
-    def __init__(self, grid_master_ip, wapi_version, admin_name, password, network_view='All'):
+    def __init__(self, grid_master_ip, wapi_version, admin_name, password, network_view='All',
+                 transport_name=transport.DEFAULT_TRANSPORT):
+        self.grid_master_ip = grid_master_ip
         self.base_url = f"https://{grid_master_ip}/wapi/v{wapi_version}"
         self.auth = (admin_name, password)
         self.network_view = network_view
         self.verify_ssl = False  # In a production environment, you'd want to use proper SSL verification
+        # Results of read-only listings, keyed by WAPI object type. Writes to an
+        # object type drop its entry; clear_cache() drops everything.
+        self._cache = {}
+        # Measured request latency per endpoint: {"GET network": [count, total_seconds]},
+        # updated by the worker threads of create_network_levels under its lock
+        self.latency = {}
+        self._latency_lock = threading.Lock()
+        # Identity map of known objects: {(object type, natural key): _ref},
+        # filled from listings and creates so mutations can skip the lookup.
+        self._refs = {}
+        self._ref_keys = {}
+        self._network_views = {}  # CIDR -> {view: network _ref}, for deletes across views
+
+        # One pooled, keep-alive session per manager (i.e. per grid and view),
+        # with compressed responses and HTTP/2 where available.
+        self.session = requests.Session()
+        self.protocol = transport.mount(self.session, transport_name or transport.DEFAULT_TRANSPORT,
+                                        CONNECTION_POOL_SIZE)
+        # Requests and bytes on the wire of this manager's run
+        self.transfer = transport.TransferStats()
 
         if not self.verify_ssl:
             requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
 
+    def journal_name(self, operation):
+        """Returns the journal name of a bulk `operation` against this grid and network view."""
+        return f"{operation}-{self.grid_master_ip}-{self.network_view}"
+
+    def _record_latency(self, method, object_type, started, response=None):
+        elapsed = time.monotonic() - started
+        with self._latency_lock:
+            stats = self.latency.setdefault(f"{method} {object_type}", [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+        if response is not None:
+            self.transfer.record(response)
+
+    def average_latency(self, method, object_type):
+        """Returns the mean measured latency of an endpoint in seconds, or None if it was never called."""
+        with self._latency_lock:
+            stats = self.latency.get(f"{method} {object_type}")
+            if not stats or not stats[0]:
+                return None
+            return stats[1] / stats[0]
+
+    def measure_latency(self, object_type):
+        """
+        Measures the round trip of a minimal read of `object_type` (one object,
+        `_ref` only). Returns the latency in seconds, or None on error.
+        """
+        try:
+            self._get_objects(object_type, params={'_max_results': 1}, return_fields=[])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error measuring latency of '{object_type}': {e}")
+            return None
+        return self.average_latency('GET', object_type)
+
+    def clear_cache(self):
+        """Drops all cached listings so the next reads go to the grid."""
+        self._cache.clear()
+
+    def _remember(self, object_type, objects):
+        """Records the `_ref`s of listed objects in the identity map."""
+        for obj in objects:
+            key = _natural_key(object_type, obj) if '_ref' in obj else None
+            if key is not None:
+                self._refs[(object_type, key)] = obj['_ref']
+                self._ref_keys[obj['_ref']] = (object_type, key)
+                if object_type == 'network':
+                    self._network_views.setdefault(key[1], {})[key[0]] = obj['_ref']
+
+    def _forget(self, ref):
+        identity = self._ref_keys.pop(ref, None)
+        if identity is not None and self._refs.get(identity) == ref:
+            del self._refs[identity]
+            if identity[0] == 'network':
+                view, cidr = identity[1]
+                views = self._network_views.get(cidr, {})
+                views.pop(view, None)
+                if not views:
+                    self._network_views.pop(cidr, None)
+
+    def known_ref(self, object_type, key):
+        """Returns the recorded `_ref` of the object with natural `key`, or None."""
+        return self._refs.get((object_type, key))
+
     @property
     def _request_params(self):
         if self.network_view == 'All':
             return {}
         return {'network_view': self.network_view}
 
+    def _get_objects(self, object_type, params=None, return_fields=None):
+        """
+        Reads a WAPI object listing, projected to `return_fields` (`_ref` is
+        always returned). Raises requests.exceptions.RequestException or
+        ValueError on failure.
+        """
+        params = dict(params or {})
+        if return_fields is not None:
+            params['_return_fields'] = ','.join(return_fields)
+        started = time.monotonic()
+        response = self.session.get(f"{self.base_url}/{object_type}", auth=self.auth, params=params,
+                                verify=self.verify_ssl, stream=True)
+        try:
+            response.raise_for_status()
+            objects = _decode_response(response)
+        finally:
+            response.close()
+            self._record_latency('GET', object_type, started, response)
+        self._remember(object_type, objects.get('result', []) if isinstance(objects, dict) else objects)
+        return objects
+
+    def _get_paged_objects(self, object_type, params=None, return_fields=None, page_size=PAGE_SIZE):
+        """
+        Reads a listing of any size page by page. Raises
+        requests.exceptions.RequestException or ValueError on failure.
+        """
+        params = dict(params or {}, _paging=1, _return_as_object=1, _max_results=page_size)
+        objects = []
+        while True:
+            page = self._get_objects(object_type, params=params, return_fields=return_fields)
+            objects.extend(page.get('result', []))
+            if not page.get('next_page_id'):
+                return objects
+            params, return_fields = {'_page_id': page['next_page_id']}, None
+
     def get_network_views(self):
         """Fetches all network views from Infoblox."""
-        url = f"{self.base_url}/networkview"
+        if 'networkview' in self._cache:
+            return self._cache['networkview']
         try:
             # This call should not be filtered by network view
-            response = requests.get(url, auth=self.auth, verify=self.verify_ssl)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            self._cache['networkview'] = self._get_objects('networkview', return_fields=['name'])
+            return self._cache['networkview']
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error connecting to Infoblox: {e}")
             return None
 
+    def get_networks(self):
+        """Fetches the networks of the network view with their extensible attributes."""
+        if 'network' in self._cache:
+            return self._cache['network']
+        try:
+            self._cache['network'] = self._get_paged_objects('network', params=self._request_params,
+                                                             return_fields=['network', 'network_view', 'extattrs'])
+            return self._cache['network']
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error fetching networks: {e}")
+            return None
+
+    def find_networks(self, network_filter):
+        """
+        Returns the networks of the view matching a NetworkFilter, with their
+        comment and EAs, or None on error. The filter is evaluated by WAPI
+        where it can be, so only candidate networks are transferred; the
+        remaining checks run on those.
+        """
+        params = dict(self._request_params, **network_filter.wapi_params())
+        try:
+            networks = self._get_paged_objects('network', params=params, return_fields=NETWORK_SEARCH_FIELDS)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error searching networks: {e}")
+            return None
+        for check in network_filter.residual():
+            networks = [network for network in networks if check(network)]
+        return networks
+
+    def search_objects(self, text, object_types=('network',)):
+        """
+        Runs the global WAPI `search` for `text` (a case-insensitive match in
+        any searchable field, EA values included) and returns the matching
+        objects of `object_types`, or None on error.
+        """
+        params = {'search_string~:': _posix_escape(text), 'objtype': list(object_types)}
+        if self.network_view != 'All':
+            params['network_view'] = self.network_view
+        try:
+            objects = self._get_objects('search', params=params, return_fields=NETWORK_SEARCH_FIELDS)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error searching Infoblox: {e}")
+            return None
+        return objects.get('result', []) if isinstance(objects, dict) else objects
+
+    def get_network_containers(self):
+        """Fetches the network containers of the network view."""
+        if 'networkcontainer' in self._cache:
+            return self._cache['networkcontainer']
+        try:
+            self._cache['networkcontainer'] = self._get_paged_objects('networkcontainer', params=self._request_params,
+                                                                      return_fields=['network', 'network_view'])
+            return self._cache['networkcontainer']
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error fetching network containers: {e}")
+            return None
+
+    @property
+    def write_view(self):
+        """The network view new networks are created in ('default' when operating on All views)."""
+        return 'default' if self.network_view == 'All' else self.network_view
+
+    def _network_object(self, network_data):
+        """Returns the WAPI body that creates a network or network container from a sync payload."""
+        return {
+            'network': network_data['network'],
+            'network_view': self.write_view,
+            'comment': network_data.get('comment') or '',
+            'extattrs': network_data.get('extattrs') or {}
+        }
+
     def sync_network(self, network_data):
         """
-        Placeholder for syncing a network to Infoblox.
-        When implemented, this will use self._request_params.
+        Creates the network in the view or, if it already exists, updates its
+        comment and sets its EAs (other EAs are kept). Returns True on success.
         """
-        print(f"Syncing network: {network_data} in view: {self.network_view}")
-        # In a real implementation, you would make WAPI calls here to create/update networks.
-        # Example:
-        # url = f"{self.base_url}/network"
-        # response = requests.post(url, auth=self.auth, json=network_data, 
-        #                          params=self._request_params, verify=self.verify_ssl)
-        pass
+        cidr = network_data['network']
+        key = (self.write_view, cidr)
+        try:
+            ref = self.known_ref('network', key)
+            recorded = ref is not None
+            while True:
+                if ref is None:
+                    self._get_objects('network', params={'network': cidr, 'network_view': self.write_view},
+                                      return_fields=['network', 'network_view'])
+                    ref = self.known_ref('network', key)
+                started = time.monotonic()
+                if ref is None:
+                    method = 'POST'
+                    response = self.session.post(f"{self.base_url}/network", auth=self.auth,
+                                                 json=self._network_object(network_data), verify=self.verify_ssl)
+                else:
+                    method = 'PUT'
+                    body = {'comment': network_data.get('comment') or '', 'extattrs+': network_data.get('extattrs') or {}}
+                    response = self.session.put(f"{self.base_url}/{ref}", auth=self.auth, json=body, verify=self.verify_ssl)
+                self._record_latency(method, 'network', started, response)
+                if method == 'PUT' and recorded and _is_stale_ref(response):
+                    self._forget(ref)
+                    ref, recorded = None, False
+                    continue
+                response.raise_for_status()
+                break
+            if method == 'POST':
+                self._remember('network', [{'_ref': _json_loads(response.content), 'network': cidr, 'network_view': self.write_view}])
+            self._cache.pop('network', None)
+            print(f"Synced network {cidr} in view {self.write_view}")
+            return True
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error syncing network '{cidr}': {e}")
+            if getattr(e, 'response', None) is not None:
+                print(f"Response: {e.response.text}")
+            return False
 
     def get_ext_attr_definitions(self):
         """Fetches all extensible attribute definitions from Infoblox."""
-        url = f"{self.base_url}/extensibleattributedef"
+        if 'extensibleattributedef' in self._cache:
+            return self._cache['extensibleattributedef']
         try:
-            response = requests.get(url, auth=self.auth, verify=self.verify_ssl)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            self._cache['extensibleattributedef'] = self._get_objects('extensibleattributedef', return_fields=['name', 'type'])
+            return self._cache['extensibleattributedef']
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error fetching extensible attribute definitions: {e}")
             return None
 
-    def create_ext_attr_definition(self, name, attr_type="STRING", comment="Created by ddi-cli"):
-        """Creates a new extensible attribute definition."""
-        url = f"{self.base_url}/extensibleattributedef"
-        payload = {
+    @staticmethod
+    def ext_attr_definition_payload(name, attr_type="STRING", comment="Created by ddi-cli"):
+        """Returns the WAPI payload that creates an extensible attribute definition."""
+        return {
             "name": name,
             "type": attr_type,
             "comment": comment
         }
+
+    def create_ext_attr_definition(self, name, attr_type="STRING", comment="Created by ddi-cli"):
+        """Creates a new extensible attribute definition."""
+        url = f"{self.base_url}/extensibleattributedef"
+        payload = self.ext_attr_definition_payload(name, attr_type, comment)
         try:
-            response = requests.post(url, auth=self.auth, json=payload, 
+            started = time.monotonic()
+            response = self.session.post(url, auth=self.auth, json=payload, 
                                      params=self._request_params, verify=self.verify_ssl)
+            self._record_latency('POST', 'extensibleattributedef', started, response)
             response.raise_for_status()
+            self._cache.pop('extensibleattributedef', None)
+            ref = _json_loads(response.content)
             print(f"Successfully created Extensible Attribute: {name}")
-            return response.json()
+            self._remember('extensibleattributedef', [{'_ref': ref, 'name': name}])
+            return ref
         except requests.exceptions.RequestException as e:
             print(f"Error creating extensible attribute '{name}': {e}")
             if e.response:
                 print(f"Response: {e.response.text}")
             return None
+        except ValueError as e:
+            # e.g. an HTML error page from a proxy instead of the WAPI reply
+            print(f"Error creating extensible attribute '{name}': unexpected response ({e})")
+            return None
+
+    def create_ext_attr_definitions(self, names, journal=None):
+        """
+        Creates extensible attribute definitions for `names`. With a journal,
+        names that completed in a previous run are skipped and every outcome
+        is recorded. Returns the list of names that failed.
+        """
+        if journal is not None:
+            names = journal.plan(names)
+        failed = []
+        for name in names:
+            ok = self.create_ext_attr_definition(name) is not None
+            if journal is not None:
+                journal.record(name, ok, None if ok else "create failed")
+            if not ok:
+                failed.append(name)
+        return failed
+
+    @staticmethod
+    def extattrs_update(ref, set_attrs, remove_names):
+        """
+        Returns one multi-object `request` entry that sets `set_attrs`
+        ({name: {'value': ...}}) and removes `remove_names` on object `ref`,
+        leaving its other extensible attributes untouched.
+        """
+        data = {}
+        if set_attrs:
+            data['extattrs+'] = set_attrs
+        if remove_names:
+            data['extattrs-'] = {name: {} for name in remove_names}
+        return {'method': 'PUT', 'object': ref, 'data': data}
+
+    def _multi_request(self, body, description):
+        """
+        Sends a multi-object `request` call. Returns the response, or None on
+        failure (the whole call is rolled back by WAPI).
+        """
+        try:
+            started = time.monotonic()
+            response = self.session.post(f"{self.base_url}/request", auth=self.auth, json=body, verify=self.verify_ssl)
+            self._record_latency('POST', 'request', started, response)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            print(f"Error {description}: {e}")
+            if e.response is not None:
+                print(f"Response: {e.response.text}")
+            return None
+
+    def update_extattrs(self, updates):
+        """
+        Applies a batch of `extattrs_update` entries in one multi-object
+        `request` call. Returns True on success.
+        """
+        response = self._multi_request(updates, f"updating extensible attributes of {len(updates)} object(s)")
+        if response is None:
+            return False
+        self._cache.pop('network', None)
+        return True
+
+    def create_networks(self, items):
+        """
+        Creates a batch of network / networkcontainer plan items in one
+        multi-object `request` call. Returns True on success.
+        """
+        body = [{'method': 'POST', 'object': item['object'], 'data': self._network_object(item['payload'])}
+                for item in items]
+        response = self._multi_request(body, f"creating {len(items)} network(s)")
+        if response is None:
+            return False
+        try:
+            refs = _json_loads(response.content)
+        except ValueError:
+            refs = []
+        for item, ref in zip(items, refs if isinstance(refs, list) else []):
+            if isinstance(ref, str):
+                self._remember(item['object'], [{'_ref': ref, 'network': item['payload']['network'],
+                                                 'network_view': self.write_view}])
+        self._cache.pop('network', None)
+        self._cache.pop('networkcontainer', None)
+        return True
+
+    def create_network_levels(self, levels, journal=None, batch_size=DEFAULT_BATCH_SIZE, workers=CONNECTION_POOL_SIZE):
+        """
+        Creates the levels produced by `ddi.scheduler.schedule_networks` one
+        after another. The items of a level are sent as parallel batches;
+        items whose parent could not be created are not attempted. With a
+        journal, items that completed in a previous run are skipped and every
+        outcome is recorded. Returns the list of item keys that failed.
+        """
+        failed = []
+        failed_keys = set()
+        pending = None
+        if journal is not None:
+            pending = set(journal.plan([item['key'] for level in levels for item in level]))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for depth, level in enumerate(levels):
+                ready = []
+                for item in level:
+                    if pending is not None and item['key'] not in pending:
+                        continue
+                    if item.get('parent') in failed_keys:
+                        failed_keys.add(item['key'])
+                        failed.append(item['key'])
+                        if journal is not None:
+                            journal.record(item['key'], False, f"parent {item['parent']} was not created")
+                        continue
+                    ready.append(item)
+                batches = [ready[start:start + batch_size] for start in range(0, len(ready), batch_size)]
+                for batch, ok in zip(batches, executor.map(self.create_networks, batches)):
+                    for item in batch:
+                        if journal is not None:
+                            journal.record(item['key'], ok, None if ok else "create failed")
+                        if not ok:
+                            failed_keys.add(item['key'])
+                            failed.append(item['key'])
+                if ready:
+                    print(f"Level {depth + 1}/{len(levels)}: {len(ready)} network(s) in {len(batches)} batch(es)")
+        return failed
+
+    def update_extattrs_batches(self, updates, journal=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Applies {item: extattrs update} in batches of `batch_size`. With a
+        journal, items that completed in a previous run are skipped and every
+        outcome is recorded. Returns the list of items that failed.
+        """
+        items = list(updates)
+        if journal is not None:
+            items = journal.plan(items)
+        failed = []
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            ok = self.update_extattrs([updates[item] for item in batch])
+            print(f"Updated {start + len(batch)}/{len(items)} network(s)" if ok
+                  else f"Batch of {len(batch)} network(s) failed")
+            for item in batch:
+                if journal is not None:
+                    journal.record(item, ok, None if ok else "update failed")
+            if not ok:
+                failed.extend(batch)
+        return failed
+
+    def apply_plan_item(self, item):
+        """
+        Executes one item of a plan produced by `ddi.planner.build_plan`.
+        Returns True on success.
+        """
+        payload = item['payload']
+        if item['object'] == 'extensibleattributedef' and item['method'] == 'POST':
+            return self.create_ext_attr_definition(payload['name'], payload['type'], payload['comment']) is not None
+        if item['object'] == 'network' and item['method'] == 'POST':
+            return bool(self.sync_network(payload))
+        if item['object'] == 'networkcontainer' and item['method'] == 'POST':
+            return self.create_networks([item])
+        if item['object'] == 'network' and item['method'] == 'PUT':
+            return self.update_extattrs([payload])
+        print(f"Unsupported plan item: {item['method']} {item['object']}")
+        return False
+
+    def _delete_object(self, object_type, ref, lookup):
+        """
+        Deletes an object, starting from its recorded `ref` when there is one.
+        If that ref turns out to be stale, or there is none, the object is
+        looked up once with `lookup()` (which returns a ref or None).
+        Returns False if the object does not exist. Raises
+        requests.exceptions.RequestException or ValueError on failure.
+        """
+        recorded = ref is not None
+        while True:
+            if ref is None:
+                ref = lookup()
+                if ref is None:
+                    return False
+            started = time.monotonic()
+            response = self.session.delete(f"{self.base_url}/{ref}", auth=self.auth, verify=self.verify_ssl)
+            self._record_latency('DELETE', object_type, started, response)
+            if recorded and _is_stale_ref(response):
+                # Deleted or moved behind our back: resolve it once more.
+                self._forget(ref)
+                ref, recorded = None, False
+                continue
+            response.raise_for_status()
+            self._forget(ref)
+            return True
 
     def delete_ext_attr_definition(self, name):
         """Deletes an extensible attribute definition by name."""
-        # First, get the reference of the EA
-        url = f"{self.base_url}/extensibleattributedef"
-        params = {'name': name}
+        def lookup():
+            ea_defs = self._get_objects('extensibleattributedef', params={'name': name}, return_fields=['name'])
+            return ea_defs[0]['_ref'] if ea_defs else None
+
         try:
-            response = requests.get(url, auth=self.auth, params=params, verify=self.verify_ssl)
-            response.raise_for_status()
-            ea_defs = response.json()
-            if not ea_defs:
+            if not self._delete_object('extensibleattributedef', self.known_ref('extensibleattributedef', name), lookup):
                 print(f"Extensible attribute '{name}' not found.")
                 return False
-            
-            ea_ref = ea_defs[0]['_ref']
-            
-            # Now delete it
-            del_url = f"{self.base_url}/{ea_ref}"
-            del_response = requests.delete(del_url, auth=self.auth, verify=self.verify_ssl)
-            del_response.raise_for_status()
+            self._cache.pop('extensibleattributedef', None)
             print(f"Successfully deleted Extensible Attribute: {name}")
             return True
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error deleting extensible attribute '{name}': {e}")
-            if e.response:
+            if getattr(e, 'response', None) is not None:
                 print(f"Response: {e.response.text}")
             return False
 
-    def delete_network(self, network):
-        """Deletes a network by its CIDR."""
-        # First, get the reference of the network
-        url = f"{self.base_url}/network"
+    def delete_network(self, network, network_view=None):
+        """
+        Deletes a network by its CIDR in `network_view` (default: the
+        manager's view). With the view 'All', the CIDR must exist in one view
+        only; if it is in several, nothing is deleted and the views are
+        reported, so the view can be given explicitly.
+        """
+        view = network_view or self.network_view
         params = {'network': network}
-        if self.network_view != 'All':
-            params['network_view'] = self.network_view
-            
+        if view != 'All':
+            params['network_view'] = view
+            ref = self.known_ref('network', (view, network))
+        else:
+            refs = self._network_views.get(network, {})
+            if len(refs) > 1:
+                print(f"Network '{network}' exists in views {', '.join(sorted(refs))}; "
+                      f"choose one of them to delete it.")
+                return False
+            ref = next(iter(refs.values()), None)
+
+        def lookup():
+            networks = self._get_objects('network', params=params, return_fields=['network', 'network_view'])
+            if len(networks) > 1:
+                views = ', '.join(sorted(obj.get('network_view', '?') for obj in networks))
+                raise ValueError(f"it exists in views {views}; choose one of them to delete it")
+            return networks[0]['_ref'] if networks else None
+
         try:
-            response = requests.get(url, auth=self.auth, params=params, verify=self.verify_ssl)
-            response.raise_for_status()
-            networks = response.json()
-            if not networks:
-                print(f"Network '{network}' not found in view '{self.network_view}'.")
+            if not self._delete_object('network', ref, lookup):
+                print(f"Network '{network}' not found in view '{view}'.")
                 return False
-            
-            network_ref = networks[0]['_ref']
-            
-            # Now delete it
-            del_url = f"{self.base_url}/{network_ref}"
-            del_response = requests.delete(del_url, auth=self.auth, verify=self.verify_ssl)
-            del_response.raise_for_status()
+            self._cache.pop('network', None)
             print(f"Successfully deleted Network: {network}")
             return True
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error deleting network '{network}': {e}")
-            if e.response:
+            if getattr(e, 'response', None) is not None:
                 print(f"Response: {e.response.text}")
             return False
@@ -0,0 +1,186 @@
+import socket
+from array import array
+
+ADDRESS_BITS = {4: 32, 6: 128}
+_FAMILIES = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+def parse_cidr(text):
+    """
+    Parses an IPv4 or IPv6 CIDR into (version, network, prefix) with the
+    network as an integer. Host bits are cleared. Raises ValueError.
+    """
+    address, _, prefix = text.strip().partition('/')
+    version = 6 if ':' in address else 4
+    bits = ADDRESS_BITS[version]
+    try:
+        network = int.from_bytes(socket.inet_pton(_FAMILIES[version], address), 'big')
+        prefix = int(prefix) if prefix else bits
+    except (OSError, ValueError):
+        raise ValueError(f"Invalid CIDR: {text!r}")
+    if not 0 <= prefix <= bits:
+        raise ValueError(f"Invalid prefix length in CIDR: {text!r}")
+    host_bits = bits - prefix
+    return version, (network >> host_bits) << host_bits, prefix
+
+def format_cidr(version, network, prefix):
+    """Formats an integer network and prefix as a CIDR string."""
+    packed = network.to_bytes(ADDRESS_BITS[version] // 8, 'big')
+    return f"{socket.inet_ntop(_FAMILIES[version], packed)}/{prefix}"
+
+def merge_intervals(intervals):
+    """
+    Merges (start, end) intervals (inclusive) that overlap or touch into a
+    sorted list of disjoint intervals.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def interval_to_cidrs(version, start, end):
+    """Returns the minimal list of (network, prefix) blocks covering [start, end]."""
+    bits = ADDRESS_BITS[version]
+    blocks = []
+    while start <= end:
+        # Largest aligned block starting at `start`...
+        size_bits = (start & -start).bit_length() - 1 if start else bits
+        # ...that does not run past `end`.
+        while size_bits > 0 and start + (1 << size_bits) - 1 > end:
+            size_bits -= 1
+        blocks.append((start, bits - size_bits))
+        start += 1 << size_bits
+    return blocks
+
+class CidrTable:
+    """
+    Columnar table of parsed CIDRs. Row `i` is the block
+    [networks[i], broadcasts[i]] of IP version versions[i] with prefix
+    length prefixes[i], owned by accounts[i] in regions[i].
+    """
+
+    def __init__(self):
+        self.versions = array('B')
+        self.prefixes = array('B')
+        self.networks = []
+        self.broadcasts = []
+        self.accounts = []
+        self.regions = []
+        self.invalid = []
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a table from provider records' primary and additional CIDRs."""
+        table = cls()
+        for record in records:
+            cidrs = ([record['cidr']] if record['cidr'] else []) + list(record.get('additional_cidrs') or [])
+            for cidr in cidrs:
+                table.add(cidr, record['account'], record['region'], record['id'])
+        return table
+
+    def __len__(self):
+        return len(self.networks)
+
+    def add(self, cidr, account=None, region=None, resource_id=None):
+        """Appends a CIDR. Unparseable CIDRs are recorded in `invalid`."""
+        try:
+            version, network, prefix = parse_cidr(cidr)
+        except ValueError as e:
+            self.invalid.append((resource_id, str(e)))
+            return
+        self.versions.append(version)
+        self.prefixes.append(prefix)
+        self.networks.append(network)
+        self.broadcasts.append(network + (1 << (ADDRESS_BITS[version] - prefix)) - 1)
+        self.accounts.append(account)
+        self.regions.append(region)
+
+    def intervals(self, version, rows=None):
+        """Returns the (network, broadcast) intervals of `version` for `rows` (default: all)."""
+        versions, networks, broadcasts = self.versions, self.networks, self.broadcasts
+        if rows is None:
+            rows = range(len(networks))
+        return [(networks[i], broadcasts[i]) for i in rows if versions[i] == version]
+
+    def group_rows(self, key):
+        """Groups row numbers by 'account' or 'region'."""
+        column = self.accounts if key == 'account' else self.regions
+        groups = {}
+        for row, value in enumerate(column):
+            groups.setdefault(value or '-', []).append(row)
+        return groups
+
+def address_count(intervals):
+    """Returns the number of addresses in a list of disjoint intervals."""
+    return sum(end - start + 1 for start, end in intervals)
+
+def aggregate(version, intervals):
+    """Collapses intervals into the minimal list of supernet CIDR strings."""
+    supernets = []
+    for start, end in merge_intervals(intervals):
+        supernets.extend(format_cidr(version, network, prefix) for network, prefix in interval_to_cidrs(version, start, end))
+    return supernets
+
+def free_blocks(pool, used_intervals):
+    """
+    Returns the CIDR strings inside `pool` (a CIDR) that are not covered by
+    `used_intervals`, found with one sweep over the merged, sorted intervals.
+    """
+    version, pool_start, prefix = parse_cidr(pool)
+    pool_end = pool_start + (1 << (ADDRESS_BITS[version] - prefix)) - 1
+    free = []
+    cursor = pool_start
+    for start, end in merge_intervals(used_intervals):
+        if end < pool_start or start > pool_end:
+            continue
+        if start > cursor:
+            free.append((cursor, start - 1))
+        cursor = max(cursor, end + 1)
+    if cursor <= pool_end:
+        free.append((cursor, pool_end))
+    blocks = []
+    for start, end in free:
+        blocks.extend(format_cidr(version, network, block_prefix) for network, block_prefix in interval_to_cidrs(version, start, end))
+    return blocks
+
+def pool_utilization(pool, used_intervals):
+    """Returns (used addresses, pool size) of `pool` given the used intervals."""
+    version, pool_start, prefix = parse_cidr(pool)
+    pool_end = pool_start + (1 << (ADDRESS_BITS[version] - prefix)) - 1
+    clipped = [(max(start, pool_start), min(end, pool_end))
+               for start, end in used_intervals if end >= pool_start and start <= pool_end]
+    return address_count(merge_intervals(clipped)), pool_end - pool_start + 1
+
+def build_report(table, pools=()):
+    """
+    Builds the IPAM report: per-account and per-region address space, the
+    aggregated supernets, and per-pool utilization and free blocks.
+    """
+    report = {'prefixes': len(table), 'invalid': [{'resource': r, 'error': e} for r, e in table.invalid]}
+    for key in ('account', 'region'):
+        groups = {}
+        for value, rows in sorted(table.group_rows(key).items()):
+            groups[value] = {
+                'prefixes': len(rows),
+                'ipv4_addresses': address_count(merge_intervals(table.intervals(4, rows))),
+                'ipv6_addresses': address_count(merge_intervals(table.intervals(6, rows))),
+            }
+        report[f'by_{key}'] = groups
+
+    report['supernets'] = {f'ipv{version}': aggregate(version, table.intervals(version)) for version in (4, 6)}
+
+    report['pools'] = {}
+    for pool in pools:
+        version = parse_cidr(pool)[0]
+        used_intervals = table.intervals(version)
+        used, size = pool_utilization(pool, used_intervals)
+        report['pools'][pool] = {
+            'used_addresses': used,
+            'size': size,
+            'utilization_percent': round(100.0 * used / size, 2),
+            'free_blocks': free_blocks(pool, used_intervals)
+        }
+    return report
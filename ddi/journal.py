@@ -0,0 +1,101 @@
+import json
+import os
+import re
+
+JOURNAL_DIR = ".ddi-journal"
+
+class Journal:
+    """
+    Write-ahead journal for bulk operations.
+
+    Every item is recorded as planned before any of it is sent, and again
+    with its outcome once it has been sent, one JSON line per event. When a
+    run is resumed, items that completed are skipped and failed or in-flight
+    items are retried. The journal file is removed once every planned item
+    has completed.
+    """
+
+    def __init__(self, name, resume=False, directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]+', '_', name) + ".jsonl")
+        self.planned = set()
+        self.completed = set()
+        self.failed = {}
+        if resume and os.path.exists(self.path):
+            self._load()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() and not _ends_with_newline(self.path):
+            self._file.write("\n") # Terminate a torn last line before appending
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # A torn last line from an interrupted write
+                item, status = entry.get('item'), entry.get('status')
+                if status == 'planned':
+                    self.planned.add(item)
+                elif status == 'ok':
+                    self.completed.add(item)
+                    self.failed.pop(item, None)
+                elif status == 'failed':
+                    self.failed[item] = entry.get('error')
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+
+    def plan(self, items):
+        """
+        Records `items` as planned and returns those that still have to be
+        processed, in their original order.
+        """
+        pending = [item for item in items if item not in self.completed]
+        for item in pending:
+            if item not in self.planned:
+                self._write({'item': item, 'status': 'planned'})
+                self.planned.add(item)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return pending
+
+    def is_done(self, item):
+        """Returns True if `item` completed in this or a previous run."""
+        return item in self.completed
+
+    def record(self, item, ok, error=None):
+        """Records the outcome of `item`."""
+        entry = {'item': item, 'status': 'ok' if ok else 'failed'}
+        if error:
+            entry['error'] = str(error)
+        self._write(entry)
+        self._file.flush()
+        if ok:
+            self.completed.add(item)
+            self.failed.pop(item, None)
+        else:
+            self.failed[item] = entry.get('error')
+
+    def close(self):
+        """Closes the journal, removing it if every planned item completed."""
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if self.planned <= self.completed:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _ends_with_newline(file_path):
+    with open(file_path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
@@ -0,0 +1,112 @@
+import datetime
+import json
+import math
+
+# Writes are not probed (that would modify the grid), so their latency is
+# estimated as the measured read latency of the same endpoint times this factor.
+WRITE_LATENCY_FACTOR = 2.0
+# Used when an endpoint could not be probed at all.
+DEFAULT_LATENCY = 0.25
+# Approximate size of the request line and headers of one WAPI call.
+REQUEST_OVERHEAD_BYTES = 350
+
+def plan_item(key, method, object_type, payload):
+    """Returns a plan item: one WAPI call that the operation would make."""
+    return {'key': key, 'method': method, 'object': object_type, 'payload': payload}
+
+def _levels(items):
+    """Groups sync items into their containment levels; other items form one level."""
+    if items and 'parent' in items[0]:
+        from ddi.scheduler import levels_from_items  # the scheduler builds plan items itself
+        return levels_from_items(items)
+    return [items] if items else []
+
+def estimate(items, infoblox_manager, batch_size=1):
+    """
+    Estimates the cost of executing `items`: WAPI calls, batches, request
+    bytes and duration. Latency is measured per endpoint with a minimal read.
+
+    With a batch size above 1, items are sent as multi-object `request`
+    calls of up to `batch_size` objects, one containment level after the
+    other (see `InfobloxManager.create_network_levels`), so a level of n
+    items costs ceil(n / batch_size) calls at the latency of its slowest
+    endpoint.
+    """
+    latency = {}
+    for endpoint in sorted({(item['method'], item['object']) for item in items}):
+        method, object_type = endpoint
+        measured = infoblox_manager.average_latency('GET', object_type)
+        if measured is None:
+            measured = infoblox_manager.measure_latency(object_type)
+        if measured is None:
+            seconds = DEFAULT_LATENCY
+        elif method == 'GET':
+            seconds = measured
+        else:
+            seconds = measured * WRITE_LATENCY_FACTOR
+        latency[f"{method} {object_type}"] = round(seconds, 4)
+
+    objects_per_endpoint = {}
+    payload_bytes = 0
+    for item in items:
+        endpoint = f"{item['method']} {item['object']}"
+        objects_per_endpoint[endpoint] = objects_per_endpoint.get(endpoint, 0) + 1
+        payload_bytes += len(json.dumps(item['payload']))
+
+    levels = _levels(items) if batch_size > 1 else [[item] for item in items]
+    batches = 0
+    duration = 0.0
+    for level in levels:
+        level_batches = math.ceil(len(level) / batch_size)
+        batches += level_batches
+        duration += level_batches * max(latency[f"{item['method']} {item['object']}"] for item in level)
+    return {
+        'calls': batches,
+        'calls_per_endpoint': objects_per_endpoint,
+        'objects': len(items),
+        'levels': len(levels) if batch_size > 1 else None,
+        'batch_size': batch_size,
+        'batches': batches,
+        'request_bytes': payload_bytes + REQUEST_OVERHEAD_BYTES * batches,
+        'latency_seconds': latency,
+        'duration_seconds': round(duration, 2)
+    }
+
+def build_plan(operation, provider, infoblox_manager, items, batch_size=1):
+    """Builds a reviewable plan for `operation` from its items."""
+    return {
+        'operation': operation,
+        'provider': provider.name,
+        'grid_master': infoblox_manager.grid_master_ip,
+        'network_view': infoblox_manager.network_view,
+        'source': provider._get_export_file_path(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'estimate': estimate(items, infoblox_manager, batch_size),
+        'items': items
+    }
+
+def write_plan(plan, file_path):
+    """Writes a plan to a JSON file."""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=4)
+
+def load_plan(file_path):
+    """Loads a plan written by `write_plan`."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def format_estimate(plan):
+    """Returns a human readable summary of a plan's estimate."""
+    est = plan['estimate']
+    levels = f", {est['levels']} level(s)" if est.get('levels') else ""
+    lines = [
+        f"Plan: {plan['operation']} ({plan['provider']}) on {plan['grid_master']} [{plan['network_view']}]",
+        f"  WAPI calls:       {est['calls']}",
+        f"  Objects:          {est.get('objects', est['calls'])}",
+        f"  Batches:          {est['batches']} (batch size {est['batch_size']}{levels})",
+        f"  Request bytes:    {est['request_bytes']}",
+        f"  Est. duration:    {datetime.timedelta(seconds=round(est['duration_seconds']))}",
+    ]
+    for endpoint, calls in sorted(est['calls_per_endpoint'].items()):
+        lines.append(f"  - {endpoint}: {calls} object(s) at ~{est['latency_seconds'][endpoint]:.3f}s per call")
+    return "\n".join(lines)
@@ -1,24 +1,107 @@
-import csv
 import ast
+import functools
+import os
 import click
-import json
+from . import ec2, mmapcsv
 from .base import BaseProvider
-from thefuzz import process
+from .rules import TagRules
+from .tags import TagTable, parse_tags
+
+# Exports at least this large (in MB) are tag-indexed with the parallel
+# memory-mapped reader instead of the csv module.
+DEFAULT_MMAP_THRESHOLD_MB = 64
 
 class AWSProvider(BaseProvider):
     """
     Manages AWS-specific operations, focusing on tags and attributes.
+    Reads the VPC export CSV produced by the AWS inventory job or, with
+    `"source": "api"`, lists the VPCs live through the EC2 API.
     """
 
+    name = 'aws'
+    display_name = 'AWS'
+    export_file_key = 'vpc_export_file'
+    export_file_description = "VPC export file (CSV format)"
+
     def _get_vpc_export_file_path(self):
         """Gets the VPC export file path from config or prompts the user."""
-        aws_config = self.config.get('aws', {})
-        vpc_export_file = aws_config.get("vpc_export_file")
-        
-        if not vpc_export_file:
-            vpc_export_file = click.prompt("Please enter the path to the AWS VPC export file (CSV format)")
-        
-        return vpc_export_file
+        return self._get_export_file_path()
+
+    def _is_live(self):
+        return self.config.get(self.name, {}).get('source') == 'api'
+
+    def _get_export_file_path(self):
+        if self._is_live():
+            return ec2.SOURCE
+        return super()._get_export_file_path()
+
+    def cache_key(self):
+        """Live scans are identified by the accounts and regions they cover."""
+        if not self._is_live():
+            return super().cache_key()
+        provider_config = self.config.get(self.name, {})
+        key = (self.name, ec2.SOURCE, tuple(provider_config.get('api_role_arns', ())),
+               tuple(provider_config.get('api_regions', ())))
+        return key if self.tag_rules is None else key + (self.tag_rules.signature(),)
+
+    def _iter_warm_records(self):
+        # A live scan runs once and is kept warm until refresh().
+        if self._is_live() and self._records is None:
+            self.warm()
+        return super()._iter_warm_records()
+
+    def _iter_api_rows(self):
+        """Yields export rows for the VPCs listed live by DescribeVpcs."""
+        provider_config = self.config.get(self.name, {})
+        clients = ec2.ec2_clients(provider_config.get('api_role_arns', ()), provider_config.get('api_regions', ()))
+        click.echo(f"Listing VPCs in {len(clients)} account/region pair(s)...", err=True)
+        yield from ec2.scan_vpcs(clients, provider_config.get('api_rate_limit', ec2.DEFAULT_RATE_LIMIT),
+                                 provider_config.get('api_workers', ec2.DEFAULT_WORKERS),
+                                 on_warning=lambda warning: click.echo(warning, err=True))
+
+    def iter_records(self):
+        """Yields one normalized record per VPC row in the export CSV (or the live scan)."""
+        rows = self._iter_api_rows() if self._is_live() else self._iter_csv_rows()
+        for row in rows:
+            vpc_id = row.get('VpcId')
+            if not vpc_id:
+                continue
+            try:
+                tags = parse_tags(row.get('Tags'))
+            except (ValueError, SyntaxError, TypeError) as e:
+                click.echo(f"Warning: Could not parse Tags from row: {row}. Error: {e}", err=True)
+                tags = []
+            yield {
+                'id': vpc_id,
+                'name': row.get('Name'),
+                'account': row.get('AccountId'),
+                'region': row.get('Region'),
+                'cidr': row.get('CidrBlock'),
+                'additional_cidrs': _parse_additional_cidrs(row.get('AdditionalCidrBlocks')),
+                'tags': tags,
+            }
+
+    def _build_tag_table(self):
+        """
+        Builds the tag table. Large exports are memory-mapped and split across
+        worker processes, decoding only the VpcId and Tags columns.
+        """
+        if self._is_live():
+            return super()._build_tag_table()
+        provider_config = self.config.get(self.name, {})
+        file_path = self._get_export_file_path()
+        threshold = provider_config.get('mmap_threshold_mb', DEFAULT_MMAP_THRESHOLD_MB) * 1024 * 1024
+        if os.path.getsize(file_path) < threshold:
+            return super()._build_tag_table()
+
+        table = TagTable()
+        worker = functools.partial(_tag_table_from_rows, rules=self.tag_rules.rules if self.tag_rules else None)
+        results = mmapcsv.map_ranges(file_path, ('VpcId', 'Tags'), worker, provider_config.get('parallel_workers'))
+        for part, warnings in results:
+            for warning in warnings:
+                click.echo(warning, err=True)
+            table.extend(part)
+        return table
 
     def _get_aws_tags_from_csv(self):
         """
@@ -26,216 +109,38 @@ class AWSProvider(BaseProvider):
         tag keys to a list of VPC IDs that use them.
         Also returns a set of all unique tag keys.
         """
-        file_path = self._get_vpc_export_file_path()
-        aws_tags_with_vpcs = {} # { "tag_key": ["vpc-123", "vpc-456"] }
-        all_unique_aws_tags = set()
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    vpc_id = row.get('VpcId')
-                    tags_str = row.get('Tags')
-                    
-                    if vpc_id and tags_str and tags_str != "[]":
-                        try:
-                            # Try JSON first, then fallback to literal_eval if needed
-                            try:
-                                tags_list = json.loads(tags_str)
-                            except json.JSONDecodeError:
-                                tags_list = ast.literal_eval(tags_str)
-
-                            for tag in tags_list:
-                                tag_key = tag['Key']
-                                all_unique_aws_tags.add(tag_key)
-                                if tag_key not in aws_tags_with_vpcs:
-                                    aws_tags_with_vpcs[tag_key] = []
-                                if vpc_id not in aws_tags_with_vpcs[tag_key]:
-                                    aws_tags_with_vpcs[tag_key].append(vpc_id)
-                        except (ValueError, SyntaxError, TypeError) as e:
-                            click.echo(f"Warning: Could not parse Tags from row: {row}. Error: {e}", err=True)
-            return aws_tags_with_vpcs, all_unique_aws_tags
-        except FileNotFoundError:
-            click.echo(f"Error: File not found at {file_path}", err=True)
-            return None, None
-        except Exception as e:
-            click.echo(f"An error occurred while reading the CSV: {e}", err=True)
-            return None, None
-
-    def list_missing_eas(self, infoblox_manager):
-        """Compares AWS tags with Infoblox EAs and returns missing ones."""
-        click.echo("Fetching AWS tags from source file...")
-        aws_tags_with_vpcs, all_unique_aws_tags = self._get_aws_tags_from_csv()
-        if all_unique_aws_tags is None:
-            return None
-
-        click.echo("Fetching Infoblox Extensible Attributes...")
-        ib_eas_defs = infoblox_manager.get_ext_attr_definitions()
-        if ib_eas_defs is None:
-            return None
-            
-        ib_ea_names = {ea['name'] for ea in ib_eas_defs}
-        
-        missing_tags = all_unique_aws_tags - ib_ea_names
-        return missing_tags
-
-    def create_missing_eas(self, infoblox_manager):
-        """Creates missing Infoblox EAs based on AWS tags."""
-        missing = self.list_missing_eas(infoblox_manager)
-        if not missing:
-            click.echo("No missing Extensible Attributes found. Everything is in sync.")
-            return
-
-        click.echo("\nThe following Extensible Attributes will be created in Infoblox:")
-        for tag in sorted(missing):
-            click.echo(f"- {tag}")
-        
-        if click.confirm("\nDo you want to proceed with the creation?"):
-            for tag_name in sorted(missing):
-                infoblox_manager.create_ext_attr_definition(tag_name)
-        else:
-            click.echo("Operation cancelled.")
-
-    def analyze_eas(self, infoblox_manager):
-        """
-        Analyzes and finds similarities between AWS tags and Infoblox EAs,
-        and prepares a comprehensive report including missing EAs and networks.
-        """
-        click.echo("Fetching AWS tags and Infoblox EAs for analysis...")
-        aws_tags_with_vpcs, all_unique_aws_tags = self._get_aws_tags_from_csv()
-        ib_eas_defs = infoblox_manager.get_ext_attr_definitions()
-
-        if all_unique_aws_tags is None or ib_eas_defs is None:
-            click.echo("Could not perform analysis due to errors.", err=True)
-            return None
-
-        ib_ea_names = {ea['name'] for ea in ib_eas_defs}
-        
-        # Comprehensive report structure
-        report = {
-            "all_aws_tags": sorted(list(all_unique_aws_tags)),
-            "all_infoblox_eas": sorted(list(ib_ea_names)),
-            "missing_eas_in_infoblox": [],
-            "potential_duplicates": [],
-            "aws_tags_with_networks": aws_tags_with_vpcs
-        }
-
-        # Find missing EAs
-        missing_tags = all_unique_aws_tags - ib_ea_names
-        if missing_tags:
-            report["missing_eas_in_infoblox"] = sorted(list(missing_tags))
-            click.echo("\nThe following AWS tags are missing as Extensible Attributes in Infoblox:")
-            for tag in report["missing_eas_in_infoblox"]:
-                click.echo(f"- {tag}")
-        else:
-            click.echo("No missing Extensible Attributes found. All AWS tags are in sync with Infoblox EAs.")
-
-        # Find potential duplicates
-        click.echo("\nFinding potential duplicates (e.g., 'createdby' vs. 'Created_By')...")
-        potential_duplicates = []
-        for tag in sorted(list(all_unique_aws_tags)):
-            best_match = process.extractOne(tag, list(ib_ea_names)) # process.extractOne expects a list
-            if best_match and best_match[1] > 80 and best_match[0].lower() == tag.lower() and best_match[0] != tag:
-                potential_duplicates.append({
-                    "aws_tag": tag,
-                    "similar_infoblox_ea": best_match[0],
-                    "similarity_score": best_match[1]
-                })
-                click.echo(f"- Found potential duplicate: AWS Tag '{tag}' is very similar to Infoblox EA '{best_match[0]}'")
-        
-        if potential_duplicates:
-            report["potential_duplicates"] = potential_duplicates
-        else:
-            click.echo("No obvious duplicates found based on similarity analysis.")
-            
-        return report
-
-    def sync(self, infoblox_manager):
-        """
-        Parses the AWS VPC export and syncs the data to Infoblox.
-        """
-        # This method is now simplified, as the core logic for tags is handled by the 'attributes' commands.
-        # The actual network sync logic would go here.
-        click.echo("Syncing AWS data...")
-        
-        # First, check for missing EAs as they are a prerequisite
-        missing_eas = self.list_missing_eas(infoblox_manager)
-        if missing_eas:
-            click.echo("\nWarning: There are AWS tags that do not exist as Infoblox Extensible Attributes.", err=True)
-            click.echo("This may cause the sync to fail or be incomplete.", err=True)
-            click.echo("Please run 'aws attributes list-missing' and 'aws attributes create-missing' to fix this.", err=True)
-            if not click.confirm("Continue with sync anyway?"):
-                click.echo("Sync operation cancelled.")
-                return
-
-        file_path = self._get_vpc_export_file_path()
-        click.echo(f"Parsing and syncing networks from: {file_path}")
-        # Placeholder for the actual network sync logic using the CSV file
-        click.echo("Network sync logic is a placeholder and has not been fully implemented yet.")
-        click.echo("AWS sync process completed.")
-
-    def export_analysis(self, infoblox_manager, base_filename):
-        """
-        Exports the comprehensive attribute analysis report to JSON and CSV files.
-        """
-        report = self.analyze_eas(infoblox_manager)
+        return self._get_tags_with_resources()
 
-        if not report:
-            click.echo("No analysis report to export.")
-            return
 
-        # Export to JSON
-        json_filename = f"{base_filename}.json"
-        try:
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=4)
-            click.echo(f"Analysis report exported to {json_filename}")
-        except IOError as e:
-            click.echo(f"Error writing JSON file {json_filename}: {e}", err=True)
-
-        # Export to CSV
-        csv_filename = f"{base_filename}.csv"
-        try:
-            with open(csv_filename, 'w', encoding='utf-8', newline='') as f:
-                # Define fieldnames for CSV. This will be more complex due to nested structure.
-                # For simplicity, let's flatten some parts for CSV.
-                # This is a simplified approach for CSV, a more robust solution might involve
-                # creating separate CSVs or more complex flattening.
-                writer = csv.writer(f)
-                writer.writerow(["Report Section", "Details"])
-                
-                writer.writerow(["All AWS Tags", ", ".join(report.get("all_aws_tags", []))])
-                writer.writerow(["All Infoblox EAs", ", ".join(report.get("all_infoblox_eas", []))])
-                writer.writerow(["Missing EAs in Infoblox", ", ".join(report.get("missing_eas_in_infoblox", []))])
-
-                writer.writerow([]) # Empty row for separation
-                writer.writerow(["Potential Duplicates"])
-                writer.writerow(["AWS Tag", "Similar Infoblox EA", "Similarity Score"])
-                for item in report.get("potential_duplicates", []):
-                    writer.writerow([item.get("aws_tag", ""), item.get("similar_infoblox_ea", ""), item.get("similarity_score", "")])
-
-                writer.writerow([]) # Empty row for separation
-                writer.writerow(["AWS Tags with Networks"])
-                writer.writerow(["AWS Tag", "Associated VPC IDs"])
-                for tag, vpcs in report.get("aws_tags_with_networks", {}).items():
-                    writer.writerow([tag, ", ".join(vpcs)])
-
-            click.echo(f"Analysis report exported to {csv_filename}")
-        except IOError as e:
-            click.echo(f"Error writing CSV file {csv_filename}: {e}", err=True)
-
-    def search(self, search_term):
-        """
-        Searches for network resources within AWS.
-        """
-        click.echo(f"Searching AWS for: {search_term}")
-        click.echo("Search functionality is a placeholder and has not been fully implemented yet.")
-        # Placeholder for AWS search logic
+def _parse_additional_cidrs(raw):
+    """Parses the AdditionalCidrBlocks column (a Python-literal list) into a list of CIDR strings."""
+    if isinstance(raw, list):
+        return [str(cidr) for cidr in raw]
+    if not raw or raw == '[]':
+        return []
+    try:
+        return [str(cidr) for cidr in ast.literal_eval(raw)]
+    except (ValueError, SyntaxError, TypeError):
+        return [cidr.strip(" '\"") for cidr in raw.strip('[]').split(',') if cidr.strip(" '\"")]
 
-    def audit(self):
-        """
-        Performs an audit of network resources in AWS.
-        """
-        click.echo("Auditing AWS resources...")
-        click.echo("Audit functionality is a placeholder and has not been fully implemented yet.")
-        # Placeholder for AWS audit logic
\ No newline at end of file
+def _tag_table_from_rows(rows, rules=None):
+    """
+    Parallel worker: builds a TagTable from (VpcId, Tags) rows, applying the
+    tag rules given as their config list. Returns (table, warnings).
+    """
+    tag_rules = TagRules(rules) if rules else None
+    table = TagTable()
+    warnings = []
+    for vpc_id, raw_tags in rows:
+        if not vpc_id:
+            continue
+        try:
+            tags = parse_tags(raw_tags)
+        except (ValueError, SyntaxError, TypeError) as e:
+            warnings.append(f"Warning: Could not parse Tags for VPC {vpc_id}. Error: {e}")
+            continue
+        if tag_rules is not None:
+            tags = tag_rules.apply(tags)
+        if tags:
+            table.add(vpc_id, tags)
+    return table, warnings
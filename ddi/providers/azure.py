@@ -0,0 +1,41 @@
+from .base import BaseProvider
+from .tags import parse_tags
+
+class AzureProvider(BaseProvider):
+    """
+    Manages Azure-specific operations.
+    Reads a VNet export produced by `az network vnet list -o json`
+    (a JSON array, or JSON Lines with one VNet per line).
+    """
+
+    name = 'azure'
+    display_name = 'Azure'
+    export_file_key = 'vnet_export_file'
+    export_file_description = "VNet export file (JSON format)"
+
+    def iter_records(self):
+        """Yields one normalized record per VNet in the export."""
+        for vnet in self._iter_json_objects():
+            vnet_id = vnet.get('id') or vnet.get('name')
+            if not vnet_id:
+                continue
+            prefixes = (vnet.get('addressSpace') or {}).get('addressPrefixes') or []
+            yield {
+                'id': vnet_id,
+                'name': vnet.get('name'),
+                'account': vnet.get('subscriptionId') or _subscription_from_id(vnet_id),
+                'region': vnet.get('location'),
+                'cidr': prefixes[0] if prefixes else None,
+                'additional_cidrs': prefixes[1:],
+                'tags': parse_tags(vnet.get('tags')),
+            }
+
+
+def _subscription_from_id(resource_id):
+    """Extracts the subscription ID from an Azure resource ID."""
+    parts = resource_id.split('/')
+    if 'subscriptions' in parts:
+        index = parts.index('subscriptions') + 1
+        if index < len(parts):
+            return parts[index]
+    return None
@@ -1,31 +1,769 @@
+import os
+import csv
+import json
+import click
 from abc import ABC, abstractmethod
+from thefuzz import process
+from . import profiling
+from .rules import TagRules
+from .spill import ExternalPostings, write_json
+from .tags import TagTable
+from .. import planner, scheduler, shards
+from ..infoblox import DEFAULT_BATCH_SIZE
+from ..journal import Journal
+
+# Parsed tag indexes shared by every provider instance in this process,
+# keyed by BaseProvider.cache_key().
+_INGEST_CACHE = {}
 
 class BaseProvider(ABC):
     """
     Abstract base class for all cloud providers.
-    It defines a common interface for all provider-specific operations.
+
+    Providers only have to implement `iter_records`, which streams normalized
+    resource records out of their export format. Tag extraction, caching, the
+    EA analysis/sync engine, search and audit are shared by all providers.
+
+    A record is a dict with the keys:
+        id, name, account, region, cidr, additional_cidrs, tags
+    where `additional_cidrs` is a list of CIDR strings besides the primary
+    `cidr` and `tags` is a list of {'Key': ..., 'Value': ...} dicts.
     """
 
+    # Short name used for the CLI group and the config section (e.g. 'aws').
+    name = None
+    # Human readable provider name used in messages (e.g. 'AWS').
+    display_name = None
+    # Config key holding the path of the export file.
+    export_file_key = None
+    # Description of the export file used when prompting for its path.
+    export_file_description = "export file"
+
     def __init__(self, config):
         self.config = config
+        # Normalization rules for tag keys and values, or None.
+        self.tag_rules = TagRules.from_config(config, self.name)
+        self._export_file_path = None
+        # Warm state: records parsed by warm(), and the cache key they were parsed under.
+        self._records = None
+        self._records_key = None
+        self._table = None
+        self._record_rows = None
+
+    # --- Ingestion contract ---
 
     @abstractmethod
-    def sync(self, infoblox_manager):
+    def iter_records(self):
         """
-        Synchronizes network data from the cloud provider to Infoblox.
+        Yields normalized resource records from the provider's data source.
         """
         raise NotImplementedError
 
-    @abstractmethod
+    def iter_tag_batches(self, batch_size=1000):
+        """
+        Yields lists of (resource_id, tags) tuples, `batch_size` records at a time.
+        Records without tags are skipped.
+        """
+        batch = []
+        for record in self._iter_warm_records():
+            if record['id'] and record['tags']:
+                batch.append((record['id'], record['tags']))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def cache_key(self):
+        """
+        Returns a hashable key identifying the current contents of the data
+        source, or None if the parsed data must not be cached.
+        """
+        file_path = self._get_export_file_path()
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = (self.name, os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        return key if self.tag_rules is None else key + (self.tag_rules.signature(),)
+
+    def load_cached(self, key):
+        """Returns previously parsed data for `key`, or None."""
+        return _INGEST_CACHE.get(key)
+
+    def store_cached(self, key, value):
+        """Stores parsed data for `key`."""
+        _INGEST_CACHE[key] = value
+
+    # --- Warm state ---
+
+    def warm(self):
+        """
+        Parses the data source into memory so that later search, audit and
+        attribute operations run without re-reading or re-parsing it. Tags are
+        kept in the interned TagTable rather than on the records.
+        """
+        key = self.cache_key()
+        table = TagTable()
+        records = []
+        rows = []  # record -> its own table row (resource IDs may repeat), or None
+        for record in self._iter_source_records():
+            record = dict(record)
+            tags = record.pop('tags')
+            rows.append(table.add(record['id'], tags) if record['id'] and tags else None)
+            records.append(record)
+        self._records, self._records_key, self._table, self._record_rows = records, key, table, rows
+        if key is not None:
+            self.store_cached(key, table)
+
+    def refresh(self):
+        """Drops warm state and cached parse results for this provider."""
+        self._records = None
+        self._records_key = None
+        self._table = None
+        self._record_rows = None
+        self._drop_cached()
+
+    def _drop_cached(self, keep=None):
+        """Drops this provider's cached parse results, except the one for `keep`."""
+        for key in [key for key in _INGEST_CACHE if key[0] == self.name and key != keep]:
+            _INGEST_CACHE.pop(key, None)
+
+    def is_warm(self):
+        """Returns True if the warm state is loaded and still matches the data source."""
+        return self._records is not None and self._records_key is not None and self._records_key == self.cache_key()
+
+    def _iter_warm_records(self):
+        """Iterates the warm records if they are still current, otherwise streams from the source."""
+        if self.is_warm():
+            return self._iter_records_with_tags(self._records, self._record_rows, self._table)
+        return self._iter_source_records()
+
+    def _iter_source_records(self):
+        """Streams records from the data source with the tag rules applied."""
+        records = self.iter_records()
+        if self.tag_rules is None:
+            return records
+        apply = self.tag_rules.apply
+        return (dict(record, tags=apply(record['tags'])) for record in records)
+
+    @staticmethod
+    def _iter_records_with_tags(records, rows, table):
+        for record, row in zip(records, rows):
+            yield dict(record, tags=table.tags(row) if row is not None else [])
+
+    # --- Export file helpers ---
+
+    def _get_export_file_path(self):
+        """Gets the export file path from config or prompts the user."""
+        if self._export_file_path:
+            return self._export_file_path
+
+        provider_config = self.config.get(self.name, {})
+        export_file = provider_config.get(self.export_file_key)
+
+        if not export_file:
+            export_file = click.prompt(f"Please enter the path to the {self.display_name} {self.export_file_description}")
+
+        self._export_file_path = export_file
+        return export_file
+
+    def _iter_csv_rows(self):
+        """Yields rows of the export file as dicts."""
+        with open(self._get_export_file_path(), 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+
+    def _iter_json_objects(self):
+        """
+        Yields objects from a JSON export file. Both a single JSON array (as
+        written by `az ... -o json` / `gcloud ... --format=json`) and JSON Lines
+        files are supported; JSON Lines files are decoded one line at a time.
+        """
+        with open(self._get_export_file_path(), 'r', encoding='utf-8') as f:
+            first = f.read(1)
+            while first and first.isspace():
+                first = f.read(1)
+            f.seek(0)
+            if first == '[':
+                yield from json.load(f)
+                return
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    # --- Tag index ---
+
+    def _get_tag_table(self):
+        """
+        Returns the TagTable of all tagged resources, or None if the data
+        source could not be read. Tables are cached per data source through
+        the cache hooks.
+        """
+        key = self.cache_key()
+        if key is not None:
+            cached = self.load_cached(key)
+            if cached is not None:
+                return cached
+
+        try:
+            table = self._build_tag_table()
+        except Exception as e:
+            self._echo_read_error(e)
+            return None
+
+        if key is not None:
+            self.store_cached(key, table)
+        return table
+
+    def _build_tag_table(self):
+        """Parses the data source into a TagTable. Providers may override this with a faster path."""
+        return TagTable.from_batches(self.iter_tag_batches())
+
+    def _echo_read_error(self, error):
+        """Reports an error reading the data source."""
+        if isinstance(error, FileNotFoundError):
+            click.echo(f"Error: File not found at {self._get_export_file_path()}", err=True)
+        else:
+            click.echo(f"An error occurred while reading the {self.export_file_description}: {error}", err=True)
+
+    def _get_tags_with_resources(self):
+        """
+        Returns a dictionary mapping tag keys to the list of resource IDs that
+        use them, and the set of all unique tag keys. Keys and resource IDs
+        are sorted, whether or not the postings were spilled.
+
+        With a `memory_budget_mb` setting, the mapping is an ExternalPostings
+        built straight from the streamed records instead of the in-memory tag
+        table: postings past the budget are spilled to sorted runs on disk and
+        merged back when the mapping is read (its `items()` are in key order).
+        """
+        budget = self.config.get('memory_budget_mb')
+        if budget:
+            postings = ExternalPostings(budget * 1024 * 1024)
+            complete = False
+            try:
+                for record in self._iter_warm_records():
+                    for tag in record['tags']:
+                        postings.add(tag['Key'], record['id'])
+                complete = True
+            except Exception as e:
+                self._echo_read_error(e)
+                return None, None
+            finally:
+                if not complete:
+                    postings.close()  # removes any spilled runs
+            if postings.spilled_runs:
+                click.echo(f"Tag postings exceeded the {budget} MB memory budget; "
+                           f"spilled {postings.spilled_runs} sorted run(s) to disk.")
+            return postings, postings.keys()
+        table = self._get_tag_table()
+        if table is None:
+            return None, None
+        return table.tags_with_resources(), table.key_names()
+
+    # --- Extensible attribute engine ---
+
+    def preview_tag_rules(self):
+        """
+        Returns {raw tag key: (number of tags, normalized key or None if
+        dropped)} for every tag key in the data source, or None on error.
+        """
+        counts = {}
+        try:
+            for record in self.iter_records():
+                for tag in record['tags']:
+                    counts[tag['Key']] = counts.get(tag['Key'], 0) + 1
+        except FileNotFoundError:
+            click.echo(f"Error: File not found at {self._get_export_file_path()}", err=True)
+            return None
+        rules = self.tag_rules
+        return {key: (count, rules.map_key(key)[0] if rules else key) for key, count in counts.items()}
+
+    def profile_tags(self, top=profiling.DEFAULT_TOP, keys=None):
+        """
+        Returns the value profile of every tag key (after the tag rules) as
+        built by `profiling.profile_table`, or None on error. `keys`
+        restricts the profile to the given tag keys.
+        """
+        try:
+            if self._records is None or self._records_key != self.cache_key():
+                self.warm()
+        except FileNotFoundError:
+            click.echo(f"Error: File not found at {self._get_export_file_path()}", err=True)
+            return None
+        return profiling.profile_table(self._table, len(self._records), top, keys)
+
+    def list_missing_eas(self, infoblox_manager):
+        """Compares provider tags with Infoblox EAs and returns missing ones."""
+        click.echo(f"Fetching {self.display_name} tags from source file...")
+        table = self._get_tag_table()
+        if table is None:
+            return None
+
+        click.echo("Fetching Infoblox Extensible Attributes...")
+        ib_eas_defs = infoblox_manager.get_ext_attr_definitions()
+        if ib_eas_defs is None:
+            return None
+
+        ib_ea_names = {ea['name'] for ea in ib_eas_defs}
+
+        missing_tags = {key for key in table.keys if key not in ib_ea_names}
+        return missing_tags
+
+    def create_missing_eas(self, infoblox_manager, resume=False, assume_yes=False):
+        """
+        Creates missing Infoblox EAs based on provider tags. Progress is
+        journaled; with `resume`, EAs completed by an interrupted run are
+        skipped and failed ones are retried. With `assume_yes` the
+        confirmation prompt is skipped. Returns the number of EAs that could
+        not be created, or None if nothing was attempted.
+        """
+        missing = self.list_missing_eas(infoblox_manager)
+        if missing is None:
+            return None
+        if not missing:
+            click.echo("No missing Extensible Attributes found. Everything is in sync.")
+            return 0
+
+        click.echo("\nThe following Extensible Attributes will be created in Infoblox:")
+        for tag in sorted(missing):
+            click.echo(f"- {tag}")
+
+        if assume_yes or click.confirm("\nDo you want to proceed with the creation?"):
+            with Journal(infoblox_manager.journal_name(f"create-missing-{self.name}"), resume=resume) as journal:
+                _echo_resume_status(journal, resume)
+                failed = infoblox_manager.create_ext_attr_definitions(sorted(missing), journal=journal)
+            if failed:
+                click.echo(f"{len(failed)} Extensible Attribute(s) could not be created. Re-run with --resume to retry them.", err=True)
+            return len(failed)
+        click.echo("Operation cancelled.")
+        return None
+
+    def analyze_eas(self, infoblox_manager):
+        """
+        Analyzes and finds similarities between provider tags and Infoblox EAs,
+        and prepares a comprehensive report including missing EAs and networks.
+        """
+        click.echo(f"Fetching {self.display_name} tags and Infoblox EAs for analysis...")
+        tags_with_resources, all_unique_tags = self._get_tags_with_resources()
+        ib_eas_defs = infoblox_manager.get_ext_attr_definitions()
+
+        if all_unique_tags is None or ib_eas_defs is None:
+            click.echo("Could not perform analysis due to errors.", err=True)
+            return None
+
+        ib_ea_names = {ea['name'] for ea in ib_eas_defs}
+
+        # Comprehensive report structure
+        report = {
+            f"all_{self.name}_tags": sorted(list(all_unique_tags)),
+            "all_infoblox_eas": sorted(list(ib_ea_names)),
+            "missing_eas_in_infoblox": [],
+            "potential_duplicates": [],
+            f"{self.name}_tags_with_networks": tags_with_resources
+        }
+
+        # Find missing EAs
+        missing_tags = all_unique_tags - ib_ea_names
+        if missing_tags:
+            report["missing_eas_in_infoblox"] = sorted(list(missing_tags))
+            click.echo(f"\nThe following {self.display_name} tags are missing as Extensible Attributes in Infoblox:")
+            for tag in report["missing_eas_in_infoblox"]:
+                click.echo(f"- {tag}")
+        else:
+            click.echo(f"No missing Extensible Attributes found. All {self.display_name} tags are in sync with Infoblox EAs.")
+
+        # Find potential duplicates
+        click.echo("\nFinding potential duplicates (e.g., 'createdby' vs. 'Created_By')...")
+        potential_duplicates = []
+        ib_ea_choices = list(ib_ea_names) # process.extractOne expects a list
+        for tag in sorted(list(all_unique_tags)):
+            best_match = process.extractOne(tag, ib_ea_choices)
+            if best_match and best_match[1] > 80 and best_match[0].lower() == tag.lower() and best_match[0] != tag:
+                potential_duplicates.append({
+                    f"{self.name}_tag": tag,
+                    "similar_infoblox_ea": best_match[0],
+                    "similarity_score": best_match[1]
+                })
+                click.echo(f"- Found potential duplicate: {self.display_name} Tag '{tag}' is very similar to Infoblox EA '{best_match[0]}'")
+
+        if potential_duplicates:
+            report["potential_duplicates"] = potential_duplicates
+        else:
+            click.echo("No obvious duplicates found based on similarity analysis.")
+
+        return report
+
+    def export_analysis(self, infoblox_manager, base_filename):
+        """
+        Exports the comprehensive attribute analysis report to JSON and CSV files.
+        """
+        report = self.analyze_eas(infoblox_manager)
+
+        if not report:
+            click.echo("No analysis report to export.")
+            return
+
+        # Export to JSON
+        json_filename = f"{base_filename}.json"
+        try:
+            with open(json_filename, 'w', encoding='utf-8') as f:
+                write_json(report, f)
+            click.echo(f"Analysis report exported to {json_filename}")
+        except IOError as e:
+            click.echo(f"Error writing JSON file {json_filename}: {e}", err=True)
+
+        # Export to CSV
+        csv_filename = f"{base_filename}.csv"
+        try:
+            with open(csv_filename, 'w', encoding='utf-8', newline='') as f:
+                # This is a simplified, flattened view of the nested report;
+                # the JSON export is the complete one.
+                writer = csv.writer(f)
+                writer.writerow(["Report Section", "Details"])
+
+                writer.writerow([f"All {self.display_name} Tags", ", ".join(report.get(f"all_{self.name}_tags", []))])
+                writer.writerow(["All Infoblox EAs", ", ".join(report.get("all_infoblox_eas", []))])
+                writer.writerow(["Missing EAs in Infoblox", ", ".join(report.get("missing_eas_in_infoblox", []))])
+
+                writer.writerow([]) # Empty row for separation
+                writer.writerow(["Potential Duplicates"])
+                writer.writerow([f"{self.display_name} Tag", "Similar Infoblox EA", "Similarity Score"])
+                for item in report.get("potential_duplicates", []):
+                    writer.writerow([item.get(f"{self.name}_tag", ""), item.get("similar_infoblox_ea", ""), item.get("similarity_score", "")])
+
+                writer.writerow([]) # Empty row for separation
+                writer.writerow([f"{self.display_name} Tags with Networks"])
+                writer.writerow([f"{self.display_name} Tag", "Associated Network IDs"])
+                for tag, resource_ids in report.get(f"{self.name}_tags_with_networks", {}).items():
+                    writer.writerow([tag, ", ".join(resource_ids)])
+
+            click.echo(f"Analysis report exported to {csv_filename}")
+        except IOError as e:
+            click.echo(f"Error writing CSV file {csv_filename}: {e}", err=True)
+
+    # --- Sync, search and audit ---
+
+    def sync(self, infoblox_manager, resume=False, assume_yes=False, batch_size=None):
+        """
+        Parses the provider export and creates its networks in Infoblox.
+        CIDRs that contain other CIDRs are created as network containers,
+        parents before children; each nesting level is sent as parallel
+        batches. Networks that already exist are left alone (see
+        `tag_networks`). Progress is journaled; with `resume`, networks
+        completed by an interrupted run are skipped and failed ones are
+        retried. Tags without an Infoblox EA are left off the networks; with
+        `assume_yes` the sync goes ahead without prompting if there are any. Returns the number of networks that could not be
+        created, or None if nothing was attempted.
+        """
+        click.echo(f"Syncing {self.display_name} data...")
+
+        # Tags without an EA definition are left off the networks, since WAPI
+        # would reject the whole batch they are sent in.
+        eas = self._defined_eas(infoblox_manager)
+        if eas is None:
+            return None
+        defined, undefined = eas
+        if undefined and not assume_yes and not click.confirm("Continue with sync anyway?"):
+            click.echo("Sync operation cancelled.")
+            return None
+
+        file_path = self._get_export_file_path()
+        click.echo(f"Parsing and syncing networks from: {file_path}")
+        scheduled = self._schedule_networks(infoblox_manager, defined)
+        if scheduled is None:
+            return None
+        levels, skipped = scheduled
+        for item_key, reason in sorted(skipped.items()):
+            click.echo(f"Skipping {item_key}: {reason}")
+        total = sum(len(level) for level in levels)
+        click.echo(f"{total} network(s) to create in {len(levels)} level(s), {len(skipped)} skipped.")
+
+        with Journal(infoblox_manager.journal_name(f"sync-{self.name}"), resume=resume) as journal:
+            _echo_resume_status(journal, resume)
+            failed = infoblox_manager.create_network_levels(levels, journal=journal,
+                                                            batch_size=batch_size or DEFAULT_BATCH_SIZE)
+        if failed:
+            click.echo(f"{len(failed)} network(s) could not be synced. Re-run with --resume to retry them.", err=True)
+        click.echo(f"{self.display_name} sync process completed.")
+        return len(failed)
+
+    def shard_sync(self, infoblox_manager, directory, shard_count, by='account', batch_size=None):
+        """
+        Plans the sync and writes it to `directory` as `shard_count` shard
+        manifests for `worker` processes, partitioned by a stable hash of
+        each resource's account ('account') or ID ('id'). Networks nested in
+        one another stay in the same shard. Returns the manifest paths, or
+        None on error.
+        """
+        scheduled = self._schedule_networks(infoblox_manager)
+        if scheduled is None:
+            return None
+        levels, skipped = scheduled
+        for item_key, reason in sorted(skipped.items()):
+            click.echo(f"Skipping {item_key}: {reason}")
+        shard_keys = {}
+        for record in self._iter_warm_records():
+            value = (record['account'] or record['id']) if by == 'account' else record['id']
+            for cidr in ([record['cidr']] if record['cidr'] else []) + list(record['additional_cidrs']):
+                shard_keys[f"{record['id']}:{cidr}"] = str(value)
+        parts = shards.partition(levels, shard_keys, shard_count)
+        plans = [planner.build_plan('sync', self, infoblox_manager, items, batch_size or DEFAULT_BATCH_SIZE)
+                 for items in parts]
+        paths = shards.write_manifests(directory, plans)
+        sizes = ", ".join(str(len(items)) for items in parts)
+        click.echo(f"Wrote {len(paths)} shard manifest(s) to {directory} ({sizes} network(s)).")
+        return paths
+
+    def _schedule_networks(self, infoblox_manager, defined=None):
+        """
+        Returns `scheduler.schedule_networks` levels and skipped items for the
+        provider's networks against those in the Infoblox view the manager
+        writes to, or None on error. Only EAs named in `defined` (fetched
+        from Infoblox if not given) are included in the payloads.
+        """
+        if defined is None:
+            eas = self._defined_eas(infoblox_manager)
+            if eas is None:
+                return None
+            defined = eas[0]
+        networks = self._network_payloads(defined)
+        if networks is None:
+            return None
+        return self._schedule_payloads(infoblox_manager, networks)
+
+    def _schedule_payloads(self, infoblox_manager, networks):
+        """
+        Returns `scheduler.schedule_networks` levels and skipped items for
+        `networks` ({item_key: network payload}) against the networks in the
+        Infoblox view the manager writes to, or None on error.
+        """
+        existing_networks = infoblox_manager.get_networks()
+        existing_containers = infoblox_manager.get_network_containers()
+        if existing_networks is None or existing_containers is None:
+            return None
+        view = infoblox_manager.write_view
+        return scheduler.schedule_networks(
+            networks,
+            existing_networks=[obj['network'] for obj in existing_networks if obj.get('network_view', view) == view],
+            existing_containers=[obj['network'] for obj in existing_containers if obj.get('network_view', view) == view])
+
+    def tag_networks(self, infoblox_manager, resume=False, assume_yes=False, batch_size=None):
+        """
+        Writes each resource's tags as EA values onto its Infoblox networks
+        (matched by primary and additional CIDRs). Only changed attributes
+        are sent, in multi-object batches. Progress is journaled; with
+        `resume`, batches completed by an interrupted run are skipped. Returns
+        the number of networks that could not be updated, or None if nothing
+        was attempted.
+        """
+        click.echo(f"Comparing {self.display_name} tags with Infoblox network EAs...")
+        updates = self._network_ea_updates(infoblox_manager)
+        if updates is None:
+            click.echo("Could not compute the EA changes due to errors.", err=True)
+            return None
+        if not updates:
+            click.echo("All network EAs are up to date.")
+            return 0
+
+        values = sum(len(update['data'].get('extattrs+', {})) for update in updates.values())
+        removals = sum(len(update['data'].get('extattrs-', {})) for update in updates.values())
+        click.echo(f"{len(updates)} network(s) need EA changes: {values} value(s) to set, {removals} to remove.")
+        if not assume_yes and not click.confirm("\nDo you want to apply these changes?"):
+            click.echo("Operation cancelled.")
+            return None
+
+        with Journal(infoblox_manager.journal_name(f"tag-networks-{self.name}"), resume=resume) as journal:
+            _echo_resume_status(journal, resume)
+            failed = infoblox_manager.update_extattrs_batches(updates, journal=journal,
+                                                              batch_size=batch_size or DEFAULT_BATCH_SIZE)
+        if failed:
+            click.echo(f"{len(failed)} network(s) could not be updated. Re-run with --resume to retry them.", err=True)
+        click.echo(f"{self.display_name} network tagging completed.")
+        return len(failed)
+
+    def _network_ea_updates(self, infoblox_manager):
+        """
+        Returns {item_key: extattrs update} for every Infoblox network whose
+        EAs differ from its resource's tags, or None on error. Item keys are
+        "<resource_id>:<network _ref>"; a network matched by several resources
+        gets one update with the union of their tags, the first resource's
+        value winning. Tags without an EA definition are skipped, and only EAs named after a provider tag key are removed, so
+        EAs maintained by other tools are left alone.
+        """
+        table = self._get_tag_table()
+        if table is None:
+            return None
+        eas = self._defined_eas(infoblox_manager)
+        networks = infoblox_manager.get_networks()
+        if eas is None or networks is None:
+            return None
+        defined = eas[0]
+        managed = table.key_names() & defined
+
+        networks_by_cidr = {}
+        for network in networks:
+            networks_by_cidr.setdefault(network['network'], []).append(network)
+
+        # One entry per network ref, so a CIDR shared by several resources
+        # does not produce conflicting updates of the same network.
+        matched = {}  # ref -> [item key, network, desired EAs]
+        for record in self._iter_warm_records():
+            desired = {tag['Key']: tag['Value'] for tag in record['tags'] if tag['Key'] in defined}
+            cidrs = ([record['cidr']] if record['cidr'] else []) + list(record['additional_cidrs'])
+            for cidr in cidrs:
+                for network in networks_by_cidr.get(cidr, ()):
+                    entry = matched.get(network['_ref'])
+                    if entry is None:
+                        matched[network['_ref']] = [f"{record['id']}:{network['_ref']}", network, dict(desired)]
+                    else:
+                        for name, value in desired.items():
+                            entry[2].setdefault(name, value)
+
+        updates = {}
+        for item_key, network, desired in matched.values():
+            current = {name: attr.get('value') for name, attr in (network.get('extattrs') or {}).items()}
+            set_attrs = {name: {'value': value} for name, value in desired.items()
+                         if name not in current or str(current[name]) != value}
+            remove_names = sorted(name for name in current if name in managed and name not in desired)
+            if set_attrs or remove_names:
+                updates[item_key] = infoblox_manager.extattrs_update(network['_ref'], set_attrs, remove_names)
+        return updates
+
+    def _defined_eas(self, infoblox_manager):
+        """
+        Returns the names of the Infoblox EA definitions and the provider tag
+        keys without one, as two sets, or None on error. Warns about the
+        tag keys without a definition.
+        """
+        table = self._get_tag_table()
+        if table is None:
+            return None
+        definitions = infoblox_manager.get_ext_attr_definitions()
+        if definitions is None:
+            return None
+        defined = {ea['name'] for ea in definitions}
+        undefined = table.key_names() - defined
+        if undefined:
+            names = sorted(undefined)
+            shown = ", ".join(names[:10]) + (f" and {len(names) - 10} more" if len(names) > 10 else "")
+            click.echo(f"Warning: {len(names)} tag key(s) have no Infoblox EA and are skipped: {shown}. "
+                       f"Run '{self.name} attributes create-missing' first to include them.", err=True)
+        return defined, undefined
+
+    def _network_payloads(self, defined=None):
+        """
+        Returns {item_key: network payload} for every CIDR (primary and
+        additional) of every resource, or
+        None if the data source could not be read. Item keys are
+        "<resource_id>:<cidr>". If `defined` is given, only EAs named in it
+        are included.
+        """
+        table = self._get_tag_table()
+        if table is None:
+            return None
+        networks = {}
+        for record in self._iter_warm_records():
+            cidrs = ([record['cidr']] if record['cidr'] else []) + list(record['additional_cidrs'])
+            if not cidrs:
+                continue
+            extattrs = table.resource_extattrs(record['id'])
+            if defined is not None:
+                extattrs = {name: value for name, value in extattrs.items() if name in defined}
+            for cidr in cidrs:
+                networks[f"{record['id']}:{cidr}"] = {
+                    'network': cidr,
+                    'comment': record['name'] or record['id'],
+                    'extattrs': extattrs
+                }
+        return networks
+
+    # --- Planning ---
+
+    def plan_create_missing_eas(self, infoblox_manager):
+        """
+        Returns the plan items `create_missing_eas` would execute, without
+        writing anything, or None on error.
+        """
+        missing = self.list_missing_eas(infoblox_manager)
+        if missing is None:
+            return None
+        return [planner.plan_item(name, 'POST', 'extensibleattributedef',
+                                  infoblox_manager.ext_attr_definition_payload(name))
+                for name in sorted(missing)]
+
+    def plan_sync(self, infoblox_manager):
+        """
+        Returns the plan items `sync` would execute, without writing anything,
+        or None on error.
+        """
+        scheduled = self._schedule_networks(infoblox_manager)
+        if scheduled is None:
+            return None
+        levels, skipped = scheduled
+        return [item for level in levels for item in level]
+
+    def plan_tag_networks(self, infoblox_manager):
+        """
+        Returns the plan items `tag_networks` would execute, without writing
+        anything, or None on error.
+        """
+        updates = self._network_ea_updates(infoblox_manager)
+        if updates is None:
+            return None
+        return [planner.plan_item(key, 'PUT', 'network', update) for key, update in updates.items()]
+
+    def iter_search(self, search_term):
+        """
+        Yields the provider's records matching `search_term` (case-insensitive)
+        in IDs, names, accounts, regions, CIDRs and tag keys/values.
+        """
+        term = search_term.lower()
+        for record in self._iter_warm_records():
+            fields = [record['id'], record['name'], record['account'], record['region'], record['cidr']]
+            for tag in record['tags']:
+                fields.append(tag['Key'])
+                fields.append(tag['Value'])
+            if any(term in str(field).lower() for field in fields if field):
+                yield record
+
     def search(self, search_term):
         """
         Searches for network resources within the cloud provider.
+        Returns the list of matching records.
         """
-        raise NotImplementedError
+        return list(self.iter_search(search_term))
+
+    def iter_audit(self):
+        """
+        Yields audit findings, each a dict with 'resource' and 'issue'.
+        Per-record findings are yielded while reading; CIDRs shared by several
+        resources are reported once the whole export has been read.
+        """
+        cidr_resources = {}
+        for record in self._iter_warm_records():
+            if record['cidr']:
+                cidr_resources.setdefault(record['cidr'], []).append(record['id'])
+            else:
+                yield {'resource': record['id'], 'issue': "No CIDR block"}
+            if not record['tags']:
+                yield {'resource': record['id'], 'issue': "No tags"}
+        for cidr, resource_ids in cidr_resources.items():
+            if len(resource_ids) > 1:
+                for resource_id in resource_ids:
+                    yield {'resource': resource_id, 'issue': f"CIDR {cidr} is used by {len(resource_ids)} resources"}
 
-    @abstractmethod
     def audit(self):
         """
         Performs an audit of network resources in the cloud provider.
+        Returns a list of findings, each a dict with 'resource' and 'issue'.
         """
-        raise NotImplementedError
+        return list(self.iter_audit())
+
+
+def _echo_resume_status(journal, resume):
+    """Reports what a resumed journal will skip and retry."""
+    if resume and (journal.completed or journal.failed):
+        click.echo(f"Resuming: {len(journal.completed)} item(s) already completed will be skipped, "
+                   f"{len(journal.failed)} failed item(s) will be retried.")
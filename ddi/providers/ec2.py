@@ -0,0 +1,132 @@
+"""
+Live VPC inventory straight from the EC2 API.
+
+`DescribeVpcs` is called for every (account, region) pair in a thread pool.
+Each scan pages through the results with NextToken, and calls to the same
+region are spaced by a shared per-region rate limiter, so many accounts can
+be scanned at once without tripping EC2 request throttling. Every VPC is
+returned as a row in the column layout of the VPC export CSV, so the AWS
+provider parses live and exported data with the same code.
+
+boto3 is optional: it is only imported when live ingestion is configured.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Source name reported for live data in messages and plans.
+SOURCE = "ec2:DescribeVpcs"
+PAGE_SIZE = 1000
+DEFAULT_RATE_LIMIT = 5.0  # DescribeVpcs calls per second, per region
+DEFAULT_WORKERS = 8
+DEFAULT_REGION = 'us-east-1'
+ROLE_SESSION_NAME = 'ddi-cli'
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls `1 / rate` seconds apart."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """Blocks until the caller may make its next call."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def vpc_row(account_id, region, vpc):
+    """Returns a DescribeVpcs VPC as a row of the VPC export CSV."""
+    tags = [{'Key': tag['Key'], 'Value': tag.get('Value', '')} for tag in vpc.get('Tags') or []]
+    primary = vpc.get('CidrBlock')
+    additional = [association['CidrBlock'] for association in vpc.get('CidrBlockAssociationSet') or []
+                  if association.get('CidrBlock') != primary
+                  and association.get('CidrBlockState', {}).get('State', 'associated') == 'associated']
+    return {
+        'AccountId': account_id,
+        'Region': region,
+        'VpcId': vpc['VpcId'],
+        'Name': next((tag['Value'] for tag in tags if tag['Key'] == 'Name'), ''),
+        'CidrBlock': primary,
+        'IsDefault': str(vpc.get('IsDefault', False)),
+        'State': vpc.get('State'),
+        'DhcpOptionsId': vpc.get('DhcpOptionsId'),
+        'InstanceTenancy': vpc.get('InstanceTenancy'),
+        'AdditionalCidrBlocks': additional,
+        'Tags': tags,
+    }
+
+def _scan(account_id, region, client, limiter):
+    """Pages through DescribeVpcs for one account and region. Returns (rows, error)."""
+    rows = []
+    params = {'MaxResults': PAGE_SIZE}
+    try:
+        while True:
+            limiter.wait()
+            response = client.describe_vpcs(**params)
+            rows.extend(vpc_row(account_id, region, vpc) for vpc in response.get('Vpcs', []))
+            token = response.get('NextToken')
+            if not token:
+                return rows, None
+            params['NextToken'] = token
+    except Exception as e:
+        return rows, f"Warning: Could not list the VPCs of account {account_id} in {region}: {e}"
+
+def scan_vpcs(clients, rate_limit=DEFAULT_RATE_LIMIT, workers=DEFAULT_WORKERS, on_warning=None):
+    """
+    Yields export rows for every VPC reachable through `clients`, a list of
+    (account_id, region, EC2 client). The scans run concurrently; rows are
+    yielded per (account, region) in the order given, as soon as that scan
+    has finished. A failed scan is reported through `on_warning` and skipped.
+    """
+    limiters = {region: RateLimiter(rate_limit) for _, region, _ in clients}
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as executor:
+        futures = [executor.submit(_scan, account_id, region, client, limiters[region])
+                   for account_id, region, client in clients]
+        for future in futures:
+            rows, error = future.result()
+            if error and on_warning is not None:
+                on_warning(error)
+            yield from rows
+
+def ec2_clients(role_arns=(), regions=()):
+    """
+    Returns (account_id, region, EC2 client) for every account and region to
+    scan. Accounts are reached by assuming each of `role_arns`, or with the
+    default credentials if there are none. Without `regions`, every region
+    enabled for the first account is scanned. Raises RuntimeError if boto3
+    is not installed.
+    """
+    try:
+        import boto3
+        from botocore.config import Config as BotoConfig
+    except ImportError:
+        raise RuntimeError("Live AWS ingestion needs boto3. Install it with 'pip install boto3'.")
+
+    # Adaptive retries back off client-side when EC2 still throttles a call.
+    client_config = BotoConfig(retries={'mode': 'adaptive', 'max_attempts': 10})
+    base = boto3.Session()
+    sessions = []
+    if role_arns:
+        sts = base.client('sts', config=client_config)
+        for role_arn in role_arns:
+            credentials = sts.assume_role(RoleArn=role_arn, RoleSessionName=ROLE_SESSION_NAME)['Credentials']
+            sessions.append((role_arn.split(':')[4], boto3.Session(
+                aws_access_key_id=credentials['AccessKeyId'],
+                aws_secret_access_key=credentials['SecretAccessKey'],
+                aws_session_token=credentials['SessionToken'])))
+    else:
+        account_id = base.client('sts', config=client_config).get_caller_identity()['Account']
+        sessions.append((account_id, base))
+
+    if not regions:
+        ec2 = sessions[0][1].client('ec2', region_name=base.region_name or DEFAULT_REGION, config=client_config)
+        regions = sorted(region['RegionName'] for region in ec2.describe_regions()['Regions'])
+
+    # Clients are created here, on one thread: boto3 sessions are not thread-safe.
+    return [(account_id, region, session.client('ec2', region_name=region, config=client_config))
+            for account_id, session in sessions for region in regions]
@@ -0,0 +1,51 @@
+from .base import BaseProvider
+from .tags import parse_tags
+
+class GCPProvider(BaseProvider):
+    """
+    Manages GCP-specific operations.
+    Reads a subnet export produced by
+    `gcloud compute networks subnets list --format=json` (a JSON array, or
+    JSON Lines with one subnet per line). Each subnet is one record: its
+    `ipCidrRange` is the CIDR and its secondary ranges are additional
+    CIDRs. gcloud output carries no labels; a `labels` object added to a
+    subnet by the exporter is read as its tags.
+    """
+
+    name = 'gcp'
+    display_name = 'GCP'
+    export_file_key = 'vpc_export_file'
+    export_file_description = "Subnet export file (JSON format)"
+
+    def iter_records(self):
+        """Yields one normalized record per subnet in the export."""
+        for subnet in self._iter_json_objects():
+            self_link = subnet.get('selfLink') or ''
+            subnet_id = self_link or subnet.get('name')
+            if not subnet_id:
+                continue
+            secondary = [ip_range['ipCidrRange'] for ip_range in subnet.get('secondaryIpRanges') or []
+                         if isinstance(ip_range, dict) and ip_range.get('ipCidrRange')]
+            yield {
+                'id': subnet_id,
+                'name': subnet.get('name'),
+                'account': _project_from_self_link(self_link),
+                'region': _last_segment(subnet.get('region')),
+                'cidr': subnet.get('ipCidrRange'),
+                'additional_cidrs': secondary,
+                'tags': parse_tags(subnet.get('labels')),
+            }
+
+
+def _project_from_self_link(self_link):
+    """Extracts the project ID from a GCP resource selfLink."""
+    parts = self_link.split('/')
+    if 'projects' in parts:
+        index = parts.index('projects') + 1
+        if index < len(parts):
+            return parts[index]
+    return None
+
+def _last_segment(url):
+    """Returns the last path segment of a GCP resource URL, e.g. the region name."""
+    return url.rstrip('/').rsplit('/', 1)[-1] if url else None
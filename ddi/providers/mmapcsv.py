@@ -0,0 +1,150 @@
+"""
+Memory-mapped, parallel reading of very large CSV export files.
+
+The file is mapped read-only and split into row-aligned byte ranges (a
+newline inside a quoted field, e.g. in the Tags column, never ends a range).
+Each range is parsed in a separate worker process straight from the mapping;
+only the requested columns are copied out and decoded.
+"""
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# A quoted field ("" escapes a quote) or an unquoted one.
+_FIELD = re.compile(rb'"((?:[^"]+|"")*)"|([^,"\r\n]*)')
+_QUOTE_COUNT_CHUNK = 8 * 1024 * 1024
+
+def _open_mapping(file_path):
+    """Maps a file read-only. Returns None for an empty file, which cannot be mapped."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _parse_row(buf, pos, size):
+    """
+    Parses the row starting at `pos`. Returns a list of (start, end, quoted)
+    field spans and the position of the next row.
+    """
+    fields = []
+    while True:
+        match = _FIELD.match(buf, pos)
+        if match.start(1) != -1:
+            fields.append((match.start(1), match.end(1), True))
+        else:
+            fields.append((match.start(2), match.end(2), False))
+        pos = match.end()
+        if pos >= size:
+            return fields, size
+        char = buf[pos]
+        if char == 0x2C: # ','
+            pos += 1
+            continue
+        if char == 0x0A: # '\n'
+            return fields, pos + 1
+        if char == 0x0D: # '\r'
+            pos += 1
+            if pos < size and buf[pos] == 0x0A:
+                pos += 1
+            return fields, pos
+        # A stray quote inside an unquoted field: skip the rest of the line.
+        newline = buf.find(b'\n', pos)
+        return fields, size if newline == -1 else newline + 1
+
+def _decode(buf, span):
+    start, end, quoted = span
+    text = buf[start:end].decode('utf-8')
+    return text.replace('""', '"') if quoted else text
+
+def read_header(buf):
+    """Returns the column names of the mapped CSV and the offset of its first data row."""
+    if not len(buf):
+        return [], 0
+    fields, pos = _parse_row(buf, 0, len(buf))
+    return [_decode(buf, span).lstrip('\ufeff') for span in fields], pos
+
+def iter_rows(buf, start, end, indices):
+    """
+    Yields, for every row starting in [start, end), a tuple of the decoded
+    fields at `indices` (missing fields are None). Blank lines are skipped.
+    """
+    size = len(buf)
+    pos = start
+    while pos < end:
+        fields, pos = _parse_row(buf, pos, size)
+        if len(fields) == 1 and fields[0][0] == fields[0][1]:
+            continue
+        yield tuple(_decode(buf, fields[i]) if i < len(fields) else None for i in indices)
+
+def _count_quotes(buf, start, end):
+    count = 0
+    for chunk_start in range(start, end, _QUOTE_COUNT_CHUNK):
+        count += buf[chunk_start:min(end, chunk_start + _QUOTE_COUNT_CHUNK)].count(b'"')
+    return count
+
+def split_ranges(buf, start, end, parts):
+    """
+    Splits [start, end) into at most `parts` byte ranges that each begin at
+    the start of a row. A newline only ends a row when the number of quotes
+    before it is even, so quoted newlines are respected.
+    """
+    bounds = [start]
+    quotes = 0
+    scanned = start
+    for part in range(1, parts):
+        candidate = start + (end - start) * part // parts
+        if candidate <= scanned:
+            continue
+        quotes += _count_quotes(buf, scanned, candidate)
+        scanned = candidate
+        while True:
+            newline = buf.find(b'\n', scanned, end)
+            if newline == -1:
+                scanned = end
+                break
+            quotes += _count_quotes(buf, scanned, newline + 1)
+            scanned = newline + 1
+            if quotes % 2 == 0:
+                break
+        if scanned >= end:
+            break
+        bounds.append(scanned)
+    bounds.append(end)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+def _run_range(args):
+    file_path, start, end, indices, worker = args
+    buf = _open_mapping(file_path)
+    try:
+        return worker(iter_rows(buf, start, end, indices))
+    finally:
+        buf.close()
+
+def map_ranges(file_path, columns, worker, workers=None):
+    """
+    Runs `worker(rows)` on row-aligned ranges of the CSV file in parallel
+    processes, where `rows` yields tuples of the requested `columns`.
+    `worker` must be a module-level (picklable) function. Returns the
+    workers' results in file order (none for an empty file, like the csv
+    module yields no rows). Raises KeyError for unknown columns.
+    """
+    workers = workers or os.cpu_count() or 1
+    buf = _open_mapping(file_path)
+    if buf is None:
+        return []
+    try:
+        header, data_start = read_header(buf)
+        indices = tuple(header.index(column) if column in header else _missing_column(column) for column in columns)
+        ranges = split_ranges(buf, data_start, len(buf), workers)
+    finally:
+        buf.close()
+
+    tasks = [(file_path, start, end, indices, worker) for start, end in ranges]
+    if len(tasks) <= 1:
+        return [_run_range(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        return list(executor.map(_run_range, tasks))
+
+def _missing_column(column):
+    raise KeyError(f"Column '{column}' not found in the export header")
@@ -0,0 +1,74 @@
+import re
+from collections import Counter
+
+DEFAULT_TOP = 5
+
+# Characters ignored when looking for near-duplicate values:
+# 'prodpci', 'prod-pci' and 'Prod_PCI' all normalize to 'prodpci'.
+_NOISE = re.compile(r'[\W_]+')
+_TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+
+def normalize_value(value):
+    """Returns the form of a tag value used to group near-duplicate spellings."""
+    return _NOISE.sub('', value.casefold())
+
+def profile_table(table, resource_count=None, top=DEFAULT_TOP, keys=None):
+    """
+    Profiles the values of every tag key in a TagTable. Returns
+    {key: profile}, keys sorted by name, where a profile holds:
+        instances     number of tags with this key
+        null_rate     share of resources without the key or with an empty value
+        cardinality   number of distinct values
+        top_values    the `top` most frequent [value, count] pairs
+        clusters      groups of distinct values that differ only in case,
+                      spacing or punctuation, most frequent spelling first
+        timestamps    oldest and newest ISO timestamp found in the values,
+                      if any (e.g. status tags that record when they were set)
+    `resource_count` is the number of resources in the export (tagged or
+    not); it defaults to the number of tagged resources in the table.
+
+    The table's parallel key/value id columns are grouped by (key id, value
+    id) in one pass; everything after that works on distinct pairs only.
+    """
+    if resource_count is None:
+        resource_count = len(table)
+    pair_counts = Counter(zip(table.tag_key_ids, table.tag_value_ids))
+    by_key = {}
+    for (key_id, value_id), count in pair_counts.items():
+        by_key.setdefault(key_id, []).append((value_id, count))
+
+    values = table.values
+    normalized = {}
+    profiles = {}
+    for key_id, value_counts in by_key.items():
+        key = table.keys[key_id]
+        if keys is not None and key not in keys:
+            continue
+        value_counts.sort(key=lambda item: (-item[1], values[item[0]]))
+        instances = sum(count for _, count in value_counts)
+        empty = sum(count for value_id, count in value_counts if not values[value_id])
+
+        groups = {}
+        stamps = []
+        for value_id, count in value_counts:
+            form = normalized.get(value_id)
+            if form is None:
+                form = normalized[value_id] = normalize_value(values[value_id])
+            if form:
+                groups.setdefault(form, []).append((values[value_id], count))
+            stamp = _TIMESTAMP.search(values[value_id])
+            if stamp:
+                stamps.append(stamp.group())
+        clusters = sorted(([value for value, _ in group] for group in groups.values() if len(group) > 1),
+                          key=lambda cluster: cluster[0].casefold())
+
+        missing = max(resource_count - instances, 0)
+        profiles[key] = {
+            'instances': instances,
+            'null_rate': round((missing + empty) / resource_count, 4) if resource_count else 0.0,
+            'cardinality': len(value_counts),
+            'top_values': [[values[value_id], count] for value_id, count in value_counts[:top]],
+            'clusters': clusters,
+            'timestamps': {'oldest': min(stamps), 'newest': max(stamps)} if stamps else None,
+        }
+    return dict(sorted(profiles.items()))
@@ -0,0 +1,101 @@
+import re
+
+ACTIONS = ('include', 'exclude', 'rename', 'merge')
+
+class TagRules:
+    """
+    Config-driven normalization of tag keys and values.
+
+    Each rule matches tag keys by `pattern` (a regular expression that must
+    match the whole key) or by `keys` (a list of literal keys), and has an
+    `action`:
+        include  keep the tag; once any include rule exists, tags that match
+                 no rule are dropped
+        exclude  drop the tag
+        rename   replace the key with `to` (which may use \\1 or \\g<name>
+                 to refer to groups of `pattern`)
+        merge    like rename, for several source keys mapping to one `to`
+    `ignore_case` makes the match case-insensitive, and `values` maps raw
+    tag values of the matched keys to normalized ones. The first matching
+    rule wins. If a resource ends up with the same key twice (e.g. after a
+    merge), the first value is kept.
+
+    Each rule's pattern is compiled on its own, so backreferences and group
+    names keep their meaning, and the outcome for each distinct key is
+    memoized, so normalizing a tag costs one dict lookup once its key has
+    been seen.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._patterns = []
+        for index, rule in enumerate(self.rules):
+            action = rule.get('action')
+            if action not in ACTIONS:
+                raise ValueError(f"Tag rule {index + 1}: action must be one of {', '.join(ACTIONS)}, not {action!r}")
+            if ('pattern' in rule) == ('keys' in rule):
+                raise ValueError(f"Tag rule {index + 1}: give exactly one of 'pattern' or 'keys'")
+            if action in ('rename', 'merge') and not rule.get('to'):
+                raise ValueError(f"Tag rule {index + 1}: '{action}' needs a 'to' key")
+            pattern = rule['pattern'] if 'pattern' in rule else '|'.join(re.escape(key) for key in rule['keys'])
+            flags = re.IGNORECASE if rule.get('ignore_case') else 0
+            try:
+                self._patterns.append(re.compile(pattern, flags))
+            except re.error as e:
+                raise ValueError(f"Tag rule {index + 1}: invalid pattern {pattern!r}: {e}")
+        self._include_only = any(rule['action'] == 'include' for rule in self.rules)
+        self._memo = {}
+
+    @classmethod
+    def from_config(cls, config, provider_name=None):
+        """
+        Returns the rules configured for a provider (its own `tag_rules`
+        followed by the top-level `tag_rules`), or None if there are none.
+        Raises ValueError for invalid rules.
+        """
+        rules = list(config.get(provider_name, {}).get('tag_rules', [])) if provider_name else []
+        rules += config.get('tag_rules', [])
+        return cls(rules) if rules else None
+
+    def map_key(self, key):
+        """Returns (normalized key or None if the tag is dropped, value map or None)."""
+        mapped = self._memo.get(key)
+        if mapped is None:
+            mapped = self._memo[key] = self._match(key)
+        return mapped
+
+    def _match(self, key):
+        for rule, pattern in zip(self.rules, self._patterns):
+            match = pattern.fullmatch(key)
+            if match is None:
+                continue
+            if rule['action'] == 'exclude':
+                return (None, None)
+            new_key = key
+            if rule['action'] in ('rename', 'merge'):
+                new_key = match.expand(rule['to'])
+            return (new_key, rule.get('values'))
+        return (None, None) if self._include_only else (key, None)
+
+    def apply(self, tags):
+        """Returns normalized copies of {'Key': ..., 'Value': ...} tags."""
+        memo = self._memo
+        normalized = []
+        seen = set()
+        for tag in tags:
+            mapped = memo.get(tag['Key'])
+            if mapped is None:
+                mapped = self.map_key(tag['Key'])
+            key, values = mapped
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            value = tag['Value']
+            if values:
+                value = values.get(value, value)
+            normalized.append({'Key': key, 'Value': value})
+        return normalized
+
+    def signature(self):
+        """Returns a hashable fingerprint of the rules, for cache keys."""
+        return repr(self.rules)
@@ -0,0 +1,112 @@
+"""
+Tag postings (tag key -> resource IDs) that spill to disk past a memory budget.
+
+Postings are buffered in memory until the buffer's estimated size reaches
+the budget. The buffer is then sorted and written to a temporary file as one
+run of JSON lines. Reading the postings merges the runs and the current
+buffer k-way with `heapq.merge`, so they come back grouped by tag key, in
+key order, while only one line per run is held in memory.
+"""
+import heapq
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+# Rough in-memory size of one buffered (key, resource id) posting besides its text.
+POSTING_OVERHEAD_BYTES = 120
+
+class ExternalPostings:
+    """Tag postings kept within `budget_bytes` of memory, spilling sorted runs to disk."""
+
+    def __init__(self, budget_bytes, directory=None):
+        self.budget_bytes = budget_bytes
+        self.directory = directory
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._runs = []
+        self._keys = set()
+        self._temp_dir = None
+        self._finalizer = None
+
+    def add(self, key, resource_id):
+        """Adds a posting, spilling the buffer to a new run if it exceeds the budget."""
+        self._buffer.append((key, resource_id))
+        self._keys.add(key)
+        self._buffer_bytes += POSTING_OVERHEAD_BYTES + len(key) + len(resource_id)
+        if self._buffer_bytes >= self.budget_bytes:
+            self._spill()
+
+    def _spill(self):
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix='ddi-postings-', dir=self.directory)
+            # Runs are removed with the object, or at exit at the latest.
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._temp_dir, True)
+        self._buffer.sort()
+        path = os.path.join(self._temp_dir, f"run-{len(self._runs):05d}.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for posting in self._buffer:
+                f.write(json.dumps(posting) + "\n")
+        self._runs.append(path)
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    @property
+    def spilled_runs(self):
+        """Number of runs written to disk so far."""
+        return len(self._runs)
+
+    def keys(self):
+        """Returns the set of tag keys."""
+        return set(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _iter_run(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+    def items(self):
+        """Yields (tag key, [resource IDs]) in key order; resource IDs are sorted and unique."""
+        self._buffer.sort()
+        merged = heapq.merge(self._buffer, *(self._iter_run(path) for path in self._runs))
+        for key, postings in itertools.groupby(merged, key=lambda posting: posting[0]):
+            resource_ids = []
+            for _, resource_id in postings:
+                if not resource_ids or resource_ids[-1] != resource_id:
+                    resource_ids.append(resource_id)
+            yield key, resource_ids
+
+    def to_dict(self):
+        """Returns all postings as a dict (in memory)."""
+        return dict(self.items())
+
+    def close(self):
+        """Removes the spilled runs."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._runs = []
+        self._temp_dir = None
+
+def write_json(report, f, indent=4):
+    """
+    Writes a report dict as indented JSON, like `json.dump`, streaming any
+    ExternalPostings value tag by tag instead of building it in memory.
+    """
+    pad = ' ' * indent
+    f.write('{')
+    for index, (key, value) in enumerate(report.items()):
+        f.write(f"{',' if index else ''}\n{pad}{json.dumps(key)}: ")
+        if isinstance(value, ExternalPostings):
+            f.write('{')
+            for position, (tag, resource_ids) in enumerate(value.items()):
+                encoded = json.dumps(resource_ids, indent=indent).replace('\n', '\n' + pad * 2)
+                f.write(f"{',' if position else ''}\n{pad * 2}{json.dumps(tag)}: {encoded}")
+            f.write(f"\n{pad}}}" if len(value) else '}')
+        else:
+            f.write(json.dumps(value, indent=indent).replace('\n', '\n' + pad))
+    f.write('\n}' if report else '}')
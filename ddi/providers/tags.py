@@ -0,0 +1,181 @@
+import ast
+import json
+from array import array
+
+
+def parse_tags(raw):
+    """
+    Normalizes a raw tag payload into a list of {'Key': ..., 'Value': ...} dicts.
+
+    Accepts AWS-style tag lists (as JSON or Python-literal strings, which is how
+    the AWS inventory exporter writes them) and plain key/value mappings such as
+    Azure tags or GCP labels. Raises ValueError, SyntaxError or TypeError if the
+    payload cannot be parsed.
+    """
+    if raw is None:
+        return []
+
+    if isinstance(raw, str):
+        raw = raw.strip()
+        if not raw or raw == '[]' or raw == '{}':
+            return []
+        # The exporter writes Python literals (single quotes), so skip the JSON
+        # attempt entirely unless the payload actually looks like JSON.
+        if raw.lstrip('[{ ')[:1] == '"':
+            try:
+                raw = json.loads(raw)
+            except json.JSONDecodeError:
+                raw = ast.literal_eval(raw)
+        else:
+            raw = ast.literal_eval(raw)
+
+    if isinstance(raw, dict):
+        return [{'Key': key, 'Value': '' if value is None else str(value)} for key, value in raw.items()]
+
+    try:
+        return [{'Key': tag['Key'], 'Value': tag.get('Value', '')} for tag in raw]
+    except (KeyError, AttributeError) as e:
+        raise ValueError(f"Malformed tag entry: {e}")
+
+
+class TagTable:
+    """
+    Compact, interned in-memory store of resource tags.
+
+    Tag keys and values are interned once and referenced by integer id. The
+    tags of every resource live in two parallel id arrays (`tag_key_ids` and
+    `tag_value_ids`); the tags of row `i` are the slice
+    `offsets[i]:offsets[i + 1]`. Rows are numbered in insertion order and
+    `resource_ids[i]` holds the resource ID of row `i`. A resource ID may
+    have several rows (e.g. the same VPC ID in two accounts); its tags are
+    then the union of theirs.
+    """
+
+    def __init__(self):
+        self.keys = []                  # key id -> tag key
+        self.values = []                # value id -> tag value
+        self.resource_ids = []          # row -> resource id
+        self.offsets = array('L', [0])  # row -> start of its tags
+        self.tag_key_ids = array('L')
+        self.tag_value_ids = array('L')
+        self._key_ids = {}
+        self._value_ids = {}
+        self._rows = {}                 # resource id -> first row
+        self._more_rows = {}            # resource id -> later rows of a repeated id
+
+    @classmethod
+    def from_batches(cls, batches):
+        """Builds a table from an iterable of [(resource_id, tags), ...] batches."""
+        table = cls()
+        for batch in batches:
+            for resource_id, tags in batch:
+                table.add(resource_id, tags)
+        return table
+
+    def __len__(self):
+        return len(self.resource_ids)
+
+    def _intern(self, text, ids, strings):
+        text_id = ids.get(text)
+        if text_id is None:
+            text_id = ids[text] = len(strings)
+            strings.append(text)
+        return text_id
+
+    def add(self, resource_id, tags):
+        """Appends a row for `resource_id` with its {'Key', 'Value'} tags and returns the row number."""
+        for tag in tags:
+            self.tag_key_ids.append(self._intern(tag['Key'], self._key_ids, self.keys))
+            self.tag_value_ids.append(self._intern(tag['Value'], self._value_ids, self.values))
+        self.offsets.append(len(self.tag_key_ids))
+        row = len(self.resource_ids)
+        self.resource_ids.append(resource_id)
+        self._index_row(resource_id, row)
+        return row
+
+    def _index_row(self, resource_id, row):
+        if self._rows.setdefault(resource_id, row) != row:
+            self._more_rows.setdefault(resource_id, []).append(row)
+
+    def extend(self, other):
+        """Appends the rows of another table, e.g. one built by a parallel worker."""
+        key_map = [self._intern(key, self._key_ids, self.keys) for key in other.keys]
+        value_map = [self._intern(value, self._value_ids, self.values) for value in other.values]
+        self.tag_key_ids.extend(key_map[key_id] for key_id in other.tag_key_ids)
+        self.tag_value_ids.extend(value_map[value_id] for value_id in other.tag_value_ids)
+        base = self.offsets[-1]
+        self.offsets.extend(base + offset for offset in other.offsets[1:])
+        first_row = len(self.resource_ids)
+        for row, resource_id in enumerate(other.resource_ids, first_row):
+            self.resource_ids.append(resource_id)
+            self._index_row(resource_id, row)
+
+    def row(self, resource_id):
+        """Returns the first row of `resource_id`, or None if it has no tags in the table."""
+        return self._rows.get(resource_id)
+
+    def resource_tag_ids(self, resource_id):
+        """Returns the distinct (key_id, value_id) pairs of all rows of `resource_id`, in row order."""
+        row = self._rows.get(resource_id)
+        if row is None:
+            return []
+        more_rows = self._more_rows.get(resource_id)
+        if not more_rows:
+            return self.tag_ids(row)
+        pairs = {}
+        for each_row in [row] + more_rows:
+            for pair in self.tag_ids(each_row):
+                pairs[pair] = None
+        return list(pairs)
+
+    def resource_extattrs(self, resource_id):
+        """Returns the tags of `resource_id` as an `extattrs` payload; the first value of a key wins."""
+        extattrs = {}
+        for key_id, value_id in self.resource_tag_ids(resource_id):
+            extattrs.setdefault(self.keys[key_id], {'value': self.values[value_id]})
+        return extattrs
+
+    def key_id(self, key):
+        """Returns the id of tag key `key`, or None."""
+        return self._key_ids.get(key)
+
+    def tag_ids(self, row):
+        """Returns the (key_id, value_id) pairs of `row`."""
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return list(zip(self.tag_key_ids[start:end], self.tag_value_ids[start:end]))
+
+    def tags(self, row):
+        """Returns the tags of `row` as a list of {'Key': ..., 'Value': ...} dicts."""
+        return [{'Key': self.keys[key_id], 'Value': self.values[value_id]} for key_id, value_id in self.tag_ids(row)]
+
+    def extattrs(self, row):
+        """Returns the tags of `row` as an Infoblox `extattrs` payload."""
+        return {self.keys[key_id]: {'value': self.values[value_id]} for key_id, value_id in self.tag_ids(row)}
+
+    def key_names(self):
+        """Returns the set of all unique tag keys."""
+        return set(self.keys)
+
+    def key_postings(self):
+        """Returns a list indexed by key id of ascending, de-duplicated row arrays."""
+        postings = [array('L') for _ in self.keys]
+        last_row = [-1] * len(self.keys)
+        offsets, tag_key_ids = self.offsets, self.tag_key_ids
+        for row in range(len(self.resource_ids)):
+            for position in range(offsets[row], offsets[row + 1]):
+                key_id = tag_key_ids[position]
+                if last_row[key_id] != row:
+                    last_row[key_id] = row
+                    postings[key_id].append(row)
+        return postings
+
+    def tags_with_resources(self):
+        """
+        Returns {tag_key: [resource_id, ...]} with keys and resource IDs sorted,
+        the order in which spilled `ExternalPostings` come back.
+        """
+        resource_ids = self.resource_ids
+        result = {}
+        for key, rows in sorted(zip(self.keys, self.key_postings())):
+            result[key] = sorted({resource_ids[row] for row in rows})
+        return result
@@ -0,0 +1,227 @@
+"""
+Streaming comparison of two attribute analysis reports (`attributes export`).
+
+Reports are memory-mapped and scanned in place: only the tag names of the
+`<provider>_tags_with_networks` section, with the byte range and digest of
+each tag's network list, are indexed. A tag whose list bytes differ between
+the reports has just its two lists decoded and compared as sets, so memory
+stays bounded by the number of tags plus the largest single list, however
+large the reports are. The smaller sections (tags, EAs, missing EAs and
+potential duplicates) are compared with set algebra.
+"""
+import hashlib
+import json
+import mmap
+import re
+
+_WS = re.compile(rb'\s*')
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.S)
+_SCALAR = re.compile(rb'[-+.\w]+')
+_STRUCTURAL = re.compile(rb'[\\"{}\[\]]')
+
+SECTIONS = ('tags', 'eas', 'missing_eas', 'duplicates')
+
+def _skip_ws(buf, pos):
+    return _WS.match(buf, pos).end()
+
+def _flat_array_end(buf, pos):
+    """
+    Fast path for an array of plain strings: returns the offset just past
+    it, or None if the array may hold anything that needs a full scan.
+    """
+    if buf[pos:pos + 1] != b'[':
+        return None
+    close = buf.find(b']', pos)
+    if close < 0:
+        return None
+    body = buf[pos + 1:close]
+    # Without escapes or nesting, the first ']' ends the array unless it
+    # lies inside a string, i.e. after an odd number of quotes.
+    if b'\\' in body or b'[' in body or b'{' in body or body.count(b'"') % 2:
+        return None
+    return close + 1
+
+def _value_end(buf, pos):
+    """Returns the offset just past the JSON value starting at `pos`."""
+    end = _flat_array_end(buf, pos)
+    if end is not None:
+        return end
+    match = _STRING.match(buf, pos)
+    if match:
+        return match.end()
+    if buf[pos:pos + 1] not in (b'{', b'['):
+        match = _SCALAR.match(buf, pos)
+        if not match:
+            raise ValueError(f"Invalid JSON value at offset {pos}")
+        return match.end()
+    depth = 0
+    in_string = False
+    escaped_until = -1
+    for match in _STRUCTURAL.finditer(buf, pos):
+        if match.start() < escaped_until:
+            continue
+        char = match.group()
+        if in_string:
+            if char == b'\\':
+                escaped_until = match.end() + 1
+            elif char == b'"':
+                in_string = False
+        elif char == b'"':
+            in_string = True
+        elif char in b'{[':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    raise ValueError(f"Unterminated JSON value at offset {pos}")
+
+def _parse_object(buf, pos, on_member):
+    """
+    Walks the JSON object starting at `pos`, calling on_member(key, value
+    start) for every member; it must return the offset just past the value.
+    Returns the offset just past the object.
+    """
+    pos = _skip_ws(buf, pos)
+    if buf[pos:pos + 1] != b'{':
+        raise ValueError(f"Expected a JSON object at offset {pos}")
+    pos = _skip_ws(buf, pos + 1)
+    if buf[pos:pos + 1] == b'}':
+        return pos + 1
+    while True:
+        match = _STRING.match(buf, pos)
+        if not match:
+            raise ValueError(f"Expected an object key at offset {pos}")
+        key = json.loads(match.group())
+        pos = _skip_ws(buf, match.end())
+        if buf[pos:pos + 1] != b':':
+            raise ValueError(f"Expected ':' at offset {pos}")
+        pos = _skip_ws(buf, on_member(key, _skip_ws(buf, pos + 1)))
+        if buf[pos:pos + 1] == b'}':
+            return pos + 1
+        if buf[pos:pos + 1] != b',':
+            raise ValueError(f"Expected ',' or '}}' at offset {pos}")
+        pos = _skip_ws(buf, pos + 1)
+
+class AnalysisReport:
+    """
+    A memory-mapped analysis report. The small sections are decoded on
+    open; the networks of each tag are located but only decoded on demand.
+    Early reports that only hold the list of potential duplicates are read
+    as reports with just that section.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{file_path} is empty")
+        self.provider = None
+        self.sections = {section: set() for section in SECTIONS}
+        self.networks = {}  # tag -> (start, end, digest) of its network list
+        try:
+            self._index()
+        except ValueError:
+            self.close()
+            raise
+
+    def _index(self):
+        buf = self._map
+        start = _skip_ws(buf, 0)
+        if buf[start:start + 1] == b'[':
+            self.sections['duplicates'] = self._duplicates(json.loads(buf[start:_value_end(buf, start)]))
+            return
+        _parse_object(buf, start, self._index_member)
+
+    def _index_member(self, key, start):
+        buf = self._map
+        if key.endswith('_tags_with_networks'):
+            return _parse_object(buf, start, self._index_networks)
+        end = _value_end(buf, start)
+        if key == 'all_infoblox_eas':
+            self.sections['eas'] = set(json.loads(buf[start:end]))
+        elif key == 'missing_eas_in_infoblox':
+            self.sections['missing_eas'] = set(json.loads(buf[start:end]))
+        elif key == 'potential_duplicates':
+            self.sections['duplicates'] = self._duplicates(json.loads(buf[start:end]))
+        elif key.startswith('all_') and key.endswith('_tags'):
+            self.provider = key[len('all_'):-len('_tags')]
+            self.sections['tags'] = set(json.loads(buf[start:end]))
+        return end
+
+    def _index_networks(self, tag, start):
+        end = _value_end(self._map, start)
+        self.networks[tag] = (start, end, hashlib.blake2b(self._map[start:end], digest_size=16).digest())
+        return end
+
+    @staticmethod
+    def _duplicates(entries):
+        # Entries are compared by their canonical JSON text.
+        return {json.dumps(entry, sort_keys=True) for entry in entries}
+
+    def tag_networks(self, tag):
+        """Returns the network IDs listed for `tag`."""
+        start, end, _ = self.networks[tag]
+        return json.loads(self._map[start:end])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+def iter_report_diff(old, new):
+    """
+    Yields the differences from `old` to `new` (AnalysisReport objects) as
+    dicts with 'section' and 'change' ('added', 'removed' or 'changed'):
+        tags / eas / missing_eas / duplicates   with 'item'
+        networks                                with 'tag', 'added', 'removed'
+    Items are yielded per section in sorted order; membership changes follow
+    the tag order of the new report, then tags that only the old one has.
+    """
+    for section in SECTIONS:
+        before, after = old.sections[section], new.sections[section]
+        for item in sorted(after - before):
+            yield {'section': section, 'change': 'added',
+                   'item': json.loads(item) if section == 'duplicates' else item}
+        for item in sorted(before - after):
+            yield {'section': section, 'change': 'removed',
+                   'item': json.loads(item) if section == 'duplicates' else item}
+
+    for tag, (_, _, digest) in new.networks.items():
+        previous = old.networks.get(tag)
+        if previous is None:
+            yield {'section': 'networks', 'change': 'added', 'tag': tag,
+                   'added': sorted(set(new.tag_networks(tag))), 'removed': []}
+        elif previous[2] != digest:
+            before, after = set(old.tag_networks(tag)), set(new.tag_networks(tag))
+            if before != after:
+                yield {'section': 'networks', 'change': 'changed', 'tag': tag,
+                       'added': sorted(after - before), 'removed': sorted(before - after)}
+    for tag in old.networks:
+        if tag not in new.networks:
+            yield {'section': 'networks', 'change': 'removed', 'tag': tag,
+                   'added': [], 'removed': sorted(set(old.tag_networks(tag)))}
+
+def format_change(change):
+    """Returns a one-line, human readable description of a diff entry."""
+    sign = {'added': '+', 'removed': '-', 'changed': '~'}[change['change']]
+    if change['section'] != 'networks':
+        item = change['item']
+        if isinstance(item, dict):
+            item = ", ".join(f"{key}={value}" for key, value in item.items())
+        return f"{sign} {change['section']}: {item}"
+    parts = []
+    if change['added']:
+        parts.append(f"+{len(change['added'])} ({', '.join(change['added'][:5])}{', ...' if len(change['added']) > 5 else ''})")
+    if change['removed']:
+        parts.append(f"-{len(change['removed'])} ({', '.join(change['removed'][:5])}{', ...' if len(change['removed']) > 5 else ''})")
+    return f"{sign} networks of tag '{change['tag']}': {' '.join(parts)}"
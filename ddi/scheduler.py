@@ -0,0 +1,115 @@
+from ddi import ipam, planner
+
+def _nearest_ancestor(node, nodes):
+    """Returns the smallest CIDR in `nodes` that strictly contains `node`, or None."""
+    version, network, prefix = node
+    bits = ipam.ADDRESS_BITS[version]
+    for parent_prefix in range(prefix - 1, -1, -1):
+        host_bits = bits - parent_prefix
+        parent = (version, (network >> host_bits) << host_bits, parent_prefix)
+        if parent in nodes:
+            return parent
+    return None
+
+def schedule_networks(networks, existing_networks=(), existing_containers=()):
+    """
+    Orders the creation of `networks` ({item_key: payload with a 'network'
+    CIDR}) by CIDR containment, given the CIDRs that already exist on the
+    grid as networks and network containers.
+
+    Every CIDR is linked to the smallest CIDR that contains it. A CIDR to
+    be created that contains other CIDRs is created as a `networkcontainer`
+    (a network cannot hold networks), and before anything inside it.
+    Returns (levels, skipped):
+      levels   lists of plan items by depth; items of one level do not
+               depend on each other. Each item carries the key of the
+               nearest item around it as 'parent' (or None), which must be
+               created first.
+      skipped  {item_key: reason} for CIDRs that already exist, are
+               duplicates, are invalid, or lie inside an existing network.
+    """
+    existing = {}
+    for object_type, cidrs in (('network', existing_networks), ('networkcontainer', existing_containers)):
+        for cidr in cidrs:
+            try:
+                existing[ipam.parse_cidr(cidr)] = object_type
+            except ValueError:
+                continue
+
+    skipped = {}
+    new = {}  # parsed CIDR -> item key
+    for item_key, payload in networks.items():
+        try:
+            node = ipam.parse_cidr(payload['network'])
+        except ValueError as e:
+            skipped[item_key] = str(e)
+            continue
+        if node in existing:
+            skipped[item_key] = f"already exists as a {existing[node]}"
+        elif node in new:
+            skipped[item_key] = f"same CIDR as {new[node]}"
+        else:
+            new[node] = item_key
+
+    nodes = set(existing) | set(new)
+    parents = {}
+    enclosing = {}  # existing CIDR -> nearest scheduled CIDR around it
+    containers = set()
+    # Larger blocks first, so a parent is decided before its children.
+    for node in sorted(nodes, key=lambda node: node[2]):
+        parent = _nearest_ancestor(node, nodes)
+        if parent in new:
+            containers.add(parent)  # holds a new or existing CIDR
+        if node not in new:
+            enclosing[node] = parent if parent in parents else enclosing.get(parent)
+            continue
+        if parent in existing and existing[parent] == 'network':
+            skipped[new[node]] = f"inside existing network {ipam.format_cidr(*parent)}"
+        elif parent in new and parent not in parents:
+            skipped[new[node]] = f"inside skipped {new[parent]}"
+        else:
+            # Inside an existing container that a new container will wrap:
+            # wait for the wrapping container, so the hierarchy is not
+            # rearranged while the child is created.
+            parents[node] = parent if parent in new else enclosing.get(parent)
+
+    depths = {}
+    def depth(node):
+        if node not in depths:
+            parent = parents[node]
+            depths[node] = 0 if parent is None else depth(parent) + 1
+        return depths[node]
+
+    levels = []
+    for node in sorted(parents, key=lambda node: (node[2], node[0], node[1])):
+        item_key = new[node]
+        object_type = 'networkcontainer' if node in containers else 'network'
+        item = planner.plan_item(item_key, 'POST', object_type, networks[item_key])
+        parent = parents[node]
+        item['parent'] = new[parent] if parent is not None else None
+        level = depth(node)
+        while len(levels) <= level:
+            levels.append([])
+        levels[level].append(item)
+    return levels, skipped
+
+def levels_from_items(items):
+    """
+    Regroups flattened `schedule_networks` plan items (e.g. read back from a
+    plan file) into levels, using their 'parent' keys.
+    """
+    parents = {item['key']: item.get('parent') for item in items}
+    depths = {}
+    def depth(key):
+        if key not in depths:
+            parent = parents.get(key)
+            depths[key] = 0 if parent not in parents else depth(parent) + 1
+        return depths[key]
+
+    levels = []
+    for item in items:
+        level = depth(item['key'])
+        while len(levels) <= level:
+            levels.append([])
+        levels[level].append(item)
+    return levels
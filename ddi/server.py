@@ -0,0 +1,268 @@
+import io
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from ddi import planner
+from ddi.infoblox import DEFAULT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+class Coalescer:
+    """
+    Runs identical concurrent calls once. A call made while another call
+    with the same key is in flight waits for, and shares, its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.shared = 0  # calls answered by another caller's computation
+
+    def run(self, key, func):
+        """Returns func(), or the result of the in-flight call with the same key."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.shared += 1
+        if leader:
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        return future.result()
+
+# Console output (click.echo / print) of the thread serving a request is
+# collected here instead of being written to the server's console.
+_request_output = threading.local()
+_install_lock = threading.Lock()
+
+class _ThreadRoutedStream(io.TextIOBase):
+    """A sys.stdout/sys.stderr stand-in that diverts what request threads write."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        if not isinstance(text, str):  # click probes streams with write(b'')
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        lines = getattr(_request_output, 'lines', None)
+        if lines is None:
+            return self._stream.write(text)
+        lines.append(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(_request_output, 'lines', None) is None:
+            self._stream.flush()
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    @property
+    def encoding(self):
+        return getattr(self._stream, 'encoding', 'utf-8')
+
+    @property
+    def errors(self):
+        return getattr(self._stream, 'errors', 'strict')
+
+def _route_console_output():
+    """Wraps sys.stdout and sys.stderr so request threads can divert their output."""
+    with _install_lock:
+        for name in ('stdout', 'stderr'):
+            stream = getattr(sys, name)
+            if not isinstance(stream, _ThreadRoutedStream):
+                setattr(sys, name, _ThreadRoutedStream(stream))
+
+def _diverted(func):
+    """Runs func() with this thread's console output logged at debug level instead of printed."""
+    _route_console_output()
+    _request_output.lines = []
+    try:
+        return func()
+    finally:
+        text = ''.join(_request_output.lines).strip()
+        _request_output.lines = None
+        if text:
+            logger.debug(f"Output while handling the request:\n{text}")
+
+class ApiError(Exception):
+    """An error returned to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class DdiApi:
+    """
+    The HTTP/JSON API served by `serve`, independent of the HTTP layer.
+
+    Providers and Infoblox managers are created once and kept warm, so
+    requests run against parsed exports and cached Infoblox data. Routes:
+
+        GET  /health
+        GET  /<provider>/list-missing
+        GET  /<provider>/analyze
+        GET  /<provider>/search?q=<term>
+        GET  /<provider>/audit
+        GET  /<provider>/sync-plan
+        POST /refresh
+
+    Provider routes accept `?target=<name>` to pick an Infoblox target
+    (default: the first one).
+    """
+
+    def __init__(self, providers, infoblox_managers):
+        self.providers = {provider.name: provider for provider in providers}
+        self.infoblox_managers = infoblox_managers
+        self.coalescer = Coalescer()
+        self._routes = {
+            'list-missing': self._list_missing,
+            'analyze': self._analyze,
+            'search': self._search,
+            'audit': self._audit,
+            'sync-plan': self._sync_plan,
+        }
+
+    def warm(self):
+        """
+        Parses every export and loads the Infoblox data the routes need.
+        Returns {provider name: error} for the exports that could not be
+        read; their routes answer 503 until the export can be read.
+        """
+        errors = {}
+        for provider in self.providers.values():
+            try:
+                provider.warm()
+            except (OSError, ValueError) as e:
+                errors[provider.name] = _load_error(provider, e)
+                logger.warning(errors[provider.name])
+        for infoblox_manager in self.infoblox_managers.values():
+            infoblox_manager.get_ext_attr_definitions()
+        return errors
+
+    def refresh(self):
+        """Drops all parsed and cached data and loads it again."""
+        for infoblox_manager in self.infoblox_managers.values():
+            infoblox_manager.clear_cache()
+        for provider in self.providers.values():
+            provider.refresh()
+        errors = self.warm()
+        return {'status': 'refreshed', 'errors': errors} if errors else {'status': 'refreshed'}
+
+    def _load(self, provider):
+        """Makes sure the export of `provider` is parsed and current; raises ApiError(503) if it cannot be read."""
+        if provider.is_warm():
+            return
+        try:
+            self.coalescer.run(('warm', provider.name), lambda: _diverted(provider.warm))
+        except (OSError, ValueError) as e:
+            raise ApiError(503, _load_error(provider, e))
+
+    def handle(self, method, path, query):
+        """Dispatches a request. Returns (status, JSON-serializable body)."""
+        parts = [part for part in path.split('/') if part]
+        try:
+            if method == 'GET' and parts == ['health']:
+                return 200, {'status': 'ok', 'providers': sorted(self.providers),
+                             'targets': list(self.infoblox_managers), 'coalesced': self.coalescer.shared}
+            if method == 'POST' and parts == ['refresh']:
+                return 200, self.coalescer.run(('refresh',), lambda: _diverted(self.refresh))
+            if method != 'GET' or len(parts) != 2 or parts[1] not in self._routes:
+                raise ApiError(404, f"No route for {method} {path}")
+
+            provider = self.providers.get(parts[0])
+            if provider is None:
+                raise ApiError(404, f"Provider '{parts[0]}' is not configured")
+            target = query.get('target') or next(iter(self.infoblox_managers), None)
+            infoblox_manager = self.infoblox_managers.get(target)
+            if infoblox_manager is None:
+                raise ApiError(404, f"Unknown Infoblox target '{target}'")
+            self._load(provider)
+            handler = self._routes[parts[1]]
+            key = (parts[1], provider.name, target, tuple(sorted(query.items())))
+            return 200, self.coalescer.run(key, lambda: _diverted(lambda: handler(provider, infoblox_manager, query)))
+        except ApiError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error handling {method} {path}: {e}")
+            return 500, {'error': str(e)}
+
+    def _list_missing(self, provider, infoblox_manager, query):
+        missing = provider.list_missing_eas(infoblox_manager)
+        if missing is None:
+            raise ApiError(502, "Could not compare tags with Infoblox EAs")
+        return {'provider': provider.name, 'missing': sorted(missing)}
+
+    def _analyze(self, provider, infoblox_manager, query):
+        report = provider.analyze_eas(infoblox_manager)
+        if report is None:
+            raise ApiError(502, "Could not perform analysis")
+        return report
+
+    def _search(self, provider, infoblox_manager, query):
+        if not query.get('q'):
+            raise ApiError(400, "Missing search term 'q'")
+        return {'provider': provider.name, 'results': provider.search(query['q'])}
+
+    def _audit(self, provider, infoblox_manager, query):
+        return {'provider': provider.name, 'findings': provider.audit()}
+
+    def _sync_plan(self, provider, infoblox_manager, query):
+        items = provider.plan_sync(infoblox_manager)
+        if items is None:
+            raise ApiError(502, "Could not build the plan")
+        return planner.build_plan('sync', provider, infoblox_manager, items, DEFAULT_BATCH_SIZE)
+
+def _load_error(provider, error):
+    """Describes an export that could not be read."""
+    return f"Could not read the {provider.display_name} export: {error}"
+
+def _json_default(value):
+    # Spilled tag postings (see ddi.providers.spill) are materialized for the response.
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "ddi-cli"
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, body = self.server.api.handle(method, url.path, query)
+        payload = json.dumps(body, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+def make_server(api, host='127.0.0.1', port=8080):
+    """Returns a threaded HTTP server for `api`; each request runs on its own thread."""
+    httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+    httpd.daemon_threads = True
+    httpd.api = api
+    return httpd
@@ -0,0 +1,270 @@
+"""
+Sharded sync through a shared directory, with no services besides a file system.
+
+A coordinator partitions the sync plan into N shard manifests (`shard-NNNN.json`)
+in a directory every node can reach. `worker` processes claim a shard by
+creating its lock file with O_EXCL, apply it, and write its result next to
+it; the coordinator then merges the results. A claimed shard's lock file records
+its owner and is touched while it runs, so a shard whose worker died is
+reclaimed once the lock has gone stale; a worker that finds its lock owned
+by another worker stops touching it and does not record a result. Each shard journals into the shared directory, so a
+reclaimed shard resumes where the previous worker stopped.
+"""
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from ddi import scheduler
+from ddi.journal import Journal
+
+DEFAULT_STALE_AFTER = 600  # seconds without a heartbeat before a lock is stale
+SUMMARY_FILE = "summary.json"
+
+def shard_of(value, shards):
+    """Returns the shard of `value`, stable across processes and machines."""
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+def partition(levels, shard_keys, shards):
+    """
+    Splits scheduled network levels (see `scheduler.schedule_networks`)
+    into `shards` lists of plan items. A top-level item goes to the shard of
+    its entry in `shard_keys` ({item key: account or resource ID}); items
+    inside it follow their parent, so a containment tree is never split.
+    """
+    assigned = {}
+    parts = [[] for _ in range(shards)]
+    for level in levels:
+        for item in level:
+            parent = item.get('parent')
+            shard = assigned[parent] if parent in assigned else shard_of(shard_keys.get(item['key'], item['key']), shards)
+            assigned[item['key']] = shard
+            parts[shard].append(item)
+    return parts
+
+def _path(directory, shard, suffix):
+    return os.path.join(directory, f"shard-{shard:04d}{suffix}")
+
+def write_manifests(directory, plans):
+    """Writes one manifest per shard plan and returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for shard, plan in enumerate(plans):
+        path = _path(directory, shard, ".json")
+        _write_json(path, dict(plan, shard=shard, shards=len(plans)))
+        paths.append(path)
+    return paths
+
+def _write_json(path, data):
+    # Written to a unique temporary name first, so readers never see half a
+    # file and writers on other nodes never share a temporary file.
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def shard_ids(directory):
+    """Returns the shard numbers that have a manifest in `directory`."""
+    shards = []
+    for name in os.listdir(directory):
+        if name.startswith("shard-") and name.endswith(".json") and not name.endswith(".result.json"):
+            try:
+                shards.append(int(name[len("shard-"):-len(".json")]))
+            except ValueError:
+                continue
+    return sorted(shards)
+
+def worker_id():
+    """Identifies this worker process in lock and result files, uniquely across nodes."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def _lock_owner(lock_path):
+    """Returns (worker, token) of a lock file, or None if it is missing or unreadable."""
+    try:
+        lock = _read_json(lock_path)
+    except (OSError, ValueError):
+        return None
+    return lock.get('worker'), lock.get('token')
+
+def claim(directory, worker, stale_after=DEFAULT_STALE_AFTER):
+    """
+    Claims the first shard that has no result and is not locked by a live
+    worker. Returns the shard number, or None if there is nothing to claim.
+    """
+    for shard in shard_ids(directory):
+        if os.path.exists(_path(directory, shard, ".result.json")):
+            continue
+        lock_path = _path(directory, shard, ".lock")
+        try:
+            if time.time() - os.path.getmtime(lock_path) < stale_after:
+                continue
+            # Stale: only the worker whose rename succeeds may claim the shard.
+            stale_path = f"{lock_path}.stale-{worker.replace(':', '-')}"
+            os.rename(lock_path, stale_path)
+            if time.time() - os.path.getmtime(stale_path) < stale_after:
+                # Another worker reclaimed it first and we moved its fresh lock: put it back.
+                os.rename(stale_path, lock_path)
+                continue
+            os.remove(stale_path)  # the dead worker's lock is ours now and no longer needed
+        except FileNotFoundError:
+            pass
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        token = uuid.uuid4().hex
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'worker': worker, 'token': token, 'claimed': time.time()}, f)
+        # A concurrent takeover may have moved a lock back over ours.
+        if _lock_owner(lock_path) != (worker, token):
+            continue
+        return shard
+    return None
+
+class _Heartbeat:
+    """
+    Touches a lock file in the background while its shard runs, as long as
+    the lock is still owned by `owner`; `lost` is set once it is not.
+    """
+
+    def __init__(self, lock_path, owner, interval):
+        self.lock_path = lock_path
+        self.owner = owner
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def check(self):
+        """Returns True while the lock is still ours."""
+        if not self.lost and _lock_owner(self.lock_path) != self.owner:
+            self.lost = True
+        return not self.lost
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.check():
+                return
+            try:
+                os.utime(self.lock_path)
+            except OSError:
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def load_manifest(directory, shard):
+    """Returns the manifest (a sync plan) of a shard."""
+    return _read_json(_path(directory, shard, ".json"))
+
+def release(directory, shard):
+    """Gives up a claimed shard without running it."""
+    try:
+        os.remove(_path(directory, shard, ".lock"))
+    except FileNotFoundError:
+        pass
+
+def run_shard(directory, shard, infoblox_manager, worker, stale_after=DEFAULT_STALE_AFTER):
+    """
+    Applies a shard claimed by `worker` and writes its result file. Returns
+    the result: {shard, worker, items, failed, started, finished}, or None
+    if the shard was taken over by another worker meanwhile (its result is
+    then left to that worker).
+    """
+    manifest = load_manifest(directory, shard)
+    started = time.time()
+    levels = scheduler.levels_from_items(manifest['items'])
+    journal_name = f"{manifest['operation']}-{manifest['provider']}-shard-{shard:04d}"
+    lock_path = _path(directory, shard, ".lock")
+    owner = _lock_owner(lock_path)
+    if owner is None or owner[0] != worker:
+        return None
+    with _Heartbeat(lock_path, owner, max(stale_after / 4, 1)) as heartbeat:
+        with Journal(journal_name, resume=True, directory=directory) as journal:
+            failed = infoblox_manager.create_network_levels(levels, journal=journal,
+                                                            batch_size=manifest['estimate']['batch_size'])
+        if not heartbeat.check():
+            return None
+    result = {
+        'shard': shard,
+        'worker': worker,
+        'items': len(manifest['items']),
+        'failed': failed,
+        'started': started,
+        'finished': time.time(),
+    }
+    _write_json(_path(directory, shard, ".result.json"), result)
+    return result
+
+def retry(directory, shard):
+    """Drops a shard's result and lock so that a worker runs it again (resuming its journal)."""
+    try:
+        os.remove(_path(directory, shard, ".result.json"))
+    except FileNotFoundError:
+        pass
+    release(directory, shard)
+
+def merge_results(directory, stale_after=DEFAULT_STALE_AFTER):
+    """
+    Merges the shard results into `summary.json` and returns the summary:
+    per-shard status ('done', 'failed', 'running', 'stale' or 'pending'),
+    item totals and the keys of every failed item. The file is only
+    rewritten when the summary changed.
+    """
+    shards = {}
+    totals = {'items': 0, 'failed': 0}
+    failed_items = []
+    for shard in shard_ids(directory):
+        result_path = _path(directory, shard, ".result.json")
+        lock_path = _path(directory, shard, ".lock")
+        if os.path.exists(result_path):
+            result = _read_json(result_path)
+            status = 'failed' if result['failed'] else 'done'
+            totals['items'] += result['items']
+            totals['failed'] += len(result['failed'])
+            failed_items.extend(result['failed'])
+            shards[shard] = {'status': status, 'worker': result['worker'], 'items': result['items'],
+                             'failed': len(result['failed']),
+                             'seconds': round(result['finished'] - result['started'], 1)}
+        elif os.path.exists(lock_path):
+            age = time.time() - os.path.getmtime(lock_path)
+            try:
+                worker = _read_json(lock_path).get('worker')
+            except (OSError, ValueError):
+                worker = None  # claimed this very moment
+            shards[shard] = {'status': 'stale' if age >= stale_after else 'running', 'worker': worker}
+        else:
+            shards[shard] = {'status': 'pending'}
+    summary = {
+        'complete': all(entry['status'] in ('done', 'failed') for entry in shards.values()),
+        'shards': shards,
+        'totals': totals,
+        'failed_items': failed_items,
+    }
+    summary_path = os.path.join(directory, SUMMARY_FILE)
+    try:
+        unchanged = _read_json(summary_path) == json.loads(json.dumps(summary))
+    except (OSError, ValueError):
+        unchanged = False
+    if not unchanged:
+        _write_json(summary_path, summary)
+    return summary
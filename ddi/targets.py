@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from ddi.infoblox import InfobloxManager
+from ddi.transport import TRANSPORTS
+
+# Connection settings a target inherits from the top-level "infoblox" section.
+INHERITED_KEYS = ('grid_master_ip', 'wapi_version', 'admin_name', 'password', 'network_view', 'transport')
+
+def load_targets(infoblox_config, network_view=None):
+    """
+    Returns the list of Infoblox targets defined in the "infoblox" config
+    section. Each target is a dict with a unique 'name' plus the connection
+    settings in INHERITED_KEYS.
+
+    Targets come from, in order of precedence:
+      - "targets": a list of objects; missing settings are inherited from the
+        "infoblox" section, so a target may only name a different view or grid.
+      - "network_views": a list of view names on the main grid.
+      - the "infoblox" section itself (a single target).
+    `network_view`, when given (e.g. from --network-view), overrides the view
+    of the single default target.
+    """
+    defaults = {key: infoblox_config.get(key) for key in INHERITED_KEYS}
+    defaults['wapi_version'] = defaults['wapi_version'] or '2.13.1'
+
+    if infoblox_config.get('targets'):
+        targets = []
+        for index, target_config in enumerate(infoblox_config['targets']):
+            target = dict(defaults)
+            target.update({key: value for key, value in target_config.items() if value is not None})
+            target['network_view'] = target['network_view'] or 'All'
+            target.setdefault('name', f"{target['grid_master_ip']}/{target['network_view']}")
+            targets.append(target)
+    elif infoblox_config.get('network_views'):
+        targets = [dict(defaults, network_view=view, name=view) for view in infoblox_config['network_views']]
+    else:
+        view = network_view or defaults['network_view'] or 'All'
+        targets = [dict(defaults, network_view=view, name='default')]
+
+    names = [target['name'] for target in targets]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate Infoblox target name(s): {', '.join(duplicates)}")
+    for target in targets:
+        if target['transport'] is not None and target['transport'] not in TRANSPORTS:
+            raise ValueError(f"Infoblox target '{target['name']}': transport must be one of {', '.join(TRANSPORTS)}")
+    return targets
+
+def select_view(targets, network_view):
+    """
+    Returns the configured targets on `network_view` (e.g. from
+    --network-view when several targets are configured). Raises ValueError
+    if no target uses that view.
+    """
+    selected = [target for target in targets if target['network_view'] == network_view]
+    if not selected:
+        views = sorted({target['network_view'] for target in targets})
+        raise ValueError(f"No configured Infoblox target uses network view '{network_view}' "
+                         f"(configured: {', '.join(views)})")
+    return selected
+
+def build_managers(targets):
+    """Returns {target name: InfobloxManager}, one pooled manager per target."""
+    return {
+        target['name']: InfobloxManager(target['grid_master_ip'], target['wapi_version'],
+                                        target['admin_name'], target['password'], target['network_view'],
+                                        target.get('transport'))
+        for target in targets
+    }
+
+def run_on_targets(managers, func):
+    """
+    Calls func(manager) for every target concurrently. A failing target does
+    not affect the others. Returns {target name: (result, error)} in target order.
+    """
+    if not managers:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(managers)) as executor:
+        futures = {name: executor.submit(func, manager) for name, manager in managers.items()}
+    outcomes = {}
+    for name, future in futures.items():
+        try:
+            outcomes[name] = (future.result(), None)
+        except Exception as e:
+            outcomes[name] = (None, e)
+    return outcomes
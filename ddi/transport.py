@@ -0,0 +1,207 @@
+"""
+HTTP transport of the WAPI session: compression, HTTP/2 and transfer accounting.
+
+Every session asks for gzip or deflate compressed responses. The default
+`http1` transport uses a pooled keep-alive HTTP/1.1 adapter. With the
+`http2` or `auto` transport and httpx (with its `http2` extra) installed,
+requests go through one httpx client, which negotiates HTTP/2 with the grid
+and multiplexes concurrent requests over a single connection; grids without
+HTTP/2 are served over HTTP/1.1 by the same client. Without httpx the
+session falls back to the HTTP/1.1 adapter.
+
+httpx is optional: it is only imported when HTTP/2 may be used.
+"""
+import logging
+import threading
+from collections import Counter
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError, ReadTimeout
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ('http1', 'http2', 'auto')
+DEFAULT_TRANSPORT = 'http1'
+ACCEPT_ENCODING = 'gzip, deflate'
+# Connection-specific headers that HTTP/2 forbids; requests adds some by default.
+_HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade', 'host'}
+
+class TransferStats:
+    """Thread-safe count of the requests of a session and their bytes on the wire."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.compressed = 0
+        self.protocols = Counter()
+
+    def record(self, response):
+        """
+        Counts a response once its body has been read. Bytes are body bytes as
+        transferred, i.e. before decompression; headers are not counted.
+        """
+        body = getattr(response.request, 'body', None)
+        sent = len(body) if isinstance(body, (bytes, str)) else 0
+        received = getattr(response.raw, 'tell', None)
+        received = received() if callable(received) else None
+        if not isinstance(received, int):
+            content = getattr(response, '_content', None)
+            received = len(content) if isinstance(content, bytes) else 0
+        version = getattr(response.raw, 'version', None)
+        protocol = {20: 'HTTP/2', 11: 'HTTP/1.1', 10: 'HTTP/1.0'}.get(version)
+        compressed = bool(response.headers.get('Content-Encoding'))
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+            self.compressed += compressed
+            if protocol:
+                self.protocols[protocol] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'compressed_responses': self.compressed,
+                'protocols': dict(self.protocols),
+            }
+
+    def summary(self):
+        """Returns a one-line description of the transfer so far."""
+        stats = self.to_dict()
+        protocols = ", ".join(f"{name}: {count}" for name, count in sorted(stats['protocols'].items()))
+        return (f"{stats['requests']} request(s){f' ({protocols})' if protocols else ''}, "
+                f"{stats['bytes_sent']} bytes sent, {stats['bytes_received']} bytes received, "
+                f"{stats['compressed_responses']} compressed response(s)")
+
+class _StreamedBody:
+    """The `raw` body of a response received through httpx, as requests reads it."""
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = None
+        self._pending = b''
+        self.version = 20 if response.http_version == 'HTTP/2' else 11
+
+    def stream(self, chunk_size, decode_content=True):
+        # httpx decodes gzip and deflate bodies itself.
+        yield from self._response.iter_bytes(chunk_size)
+
+    def read(self, amt=None):
+        if self._chunks is None:
+            self._chunks = self._response.iter_bytes()
+        data = self._pending
+        while amt is None or len(data) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            data += chunk
+        if amt is None:
+            self._pending = b''
+            return data
+        self._pending = data[amt:]
+        return data[:amt]
+
+    def tell(self):
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        self._response.close()
+
+class Http2Adapter(BaseAdapter):
+    """A requests transport adapter that sends requests through an HTTP/2 capable httpx client."""
+
+    def __init__(self, pool_size):
+        super().__init__()
+        import httpx
+        import h2  # noqa: F401  (httpx needs it for HTTP/2)
+        self._httpx = httpx
+        self._pool_size = pool_size
+        self._clients = {}  # one client per (verify, cert, proxy)
+        self._lock = threading.Lock()
+
+    def _client(self, verify, cert, proxy):
+        key = (verify, cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                limits = self._httpx.Limits(max_connections=self._pool_size,
+                                            max_keepalive_connections=self._pool_size)
+                options = dict(http2=True, verify=verify, cert=cert, limits=limits)
+                try:
+                    client = self._httpx.Client(proxy=proxy, **options)
+                except TypeError:  # httpx before 0.26
+                    client = self._httpx.Client(proxies=proxy, **options)
+                self._clients[key] = client
+            return client
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        client = self._client(verify, cert, select_proxy(request.url, proxies or {}))
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in _HOP_BY_HOP}
+        http_request = client.build_request(request.method, request.url, headers=headers,
+                                            content=request.body, timeout=self._timeout(timeout))
+        try:
+            http_response = client.send(http_request, stream=True)
+        except self._httpx.TimeoutException as e:
+            raise ReadTimeout(e, request=request)
+        except self._httpx.TransportError as e:
+            raise ConnectionError(e, request=request)
+
+        response = Response()
+        response.status_code = http_response.status_code
+        response.reason = http_response.reason_phrase
+        response.headers = CaseInsensitiveDict(http_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _StreamedBody(http_response)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+def http2_available():
+    """Returns True if httpx and h2 are installed."""
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def mount(session, transport=DEFAULT_TRANSPORT, pool_size=10):
+    """
+    Configures `session` for `transport` ('auto', 'http2' or 'http1') and
+    returns the name of the protocol it will try first. Raises ValueError
+    for an unknown transport.
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {transport!r}; expected one of {', '.join(TRANSPORTS)}")
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    if transport != 'http1' and http2_available():
+        adapter, protocol = Http2Adapter(pool_size), 'HTTP/2'
+    else:
+        if transport == 'http2':
+            logger.warning("HTTP/2 needs httpx with HTTP/2 support ('pip install httpx[http2]'); using HTTP/1.1.")
+        adapter, protocol = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size), 'HTTP/1.1'
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return protocol
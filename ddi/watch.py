@@ -0,0 +1,138 @@
+import time
+import click
+
+DEFAULT_INTERVAL = 5.0
+
+def diff_payloads(old, new):
+    """
+    Compares two {item_key: network payload} snapshots. Returns the payloads
+    in `new` that are new or differ from `old`, and the keys only in `old`.
+    """
+    changed = {key: payload for key, payload in new.items() if old.get(key) != payload}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+class ExportWatcher:
+    """
+    Keeps provider exports parsed and the Infoblox session open, and syncs
+    only the networks whose payload changed whenever an export is rewritten.
+
+    Exports are polled by size and modification time (the provider cache
+    key). A change is applied once the file has looked the same on two
+    consecutive polls, so a file that is still being written is not read.
+    Changes are applied like `sync`: new CIDRs are created in containment
+    order, networks already in Infoblox are left alone, and tags without
+    an EA definition are left out. Networks that disappear from an export
+    are reported, never deleted.
+    """
+
+    def __init__(self, providers, infoblox_manager):
+        self.providers = providers
+        self.infoblox_manager = infoblox_manager
+        self._desired = {}  # provider name -> latest {item_key: payload} from the export
+        self._applied = {}  # provider name -> {item_key: payload} known to be in Infoblox
+        self._keys = {}     # provider name -> cache key of the parsed export
+        self._pending = {}  # provider name -> changed cache key waiting to settle
+        self._dirty = set() # providers with changes (or failures) not yet applied
+
+    def start(self, initial_sync=False):
+        """
+        Parses every export. The first snapshot is taken as already synced
+        unless `initial_sync` is set. Returns {provider name: (created,
+        skipped, failed, removed)}.
+        """
+        results = {}
+        for provider in self.providers:
+            payloads = self._load(provider)
+            if payloads is None:
+                continue
+            if initial_sync:
+                results[provider.name] = self._apply(provider)
+            else:
+                self._applied[provider.name] = dict(payloads)
+                self._dirty.discard(provider.name)
+        return results
+
+    def poll(self):
+        """
+        Checks every export once and applies settled changes, retrying
+        networks that failed earlier. Returns {provider name: (created,
+        skipped, failed, removed)} for the providers that had anything to
+        apply.
+        """
+        results = {}
+        for provider in self.providers:
+            key = provider.cache_key()
+            if key is not None and key != self._keys.get(provider.name):
+                if self._pending.get(provider.name) != key:
+                    self._pending[provider.name] = key
+                    continue
+                del self._pending[provider.name]
+                if self._load(provider) is None:
+                    continue
+            else:
+                self._pending.pop(provider.name, None)
+            if provider.name in self._dirty:
+                results[provider.name] = self._apply(provider)
+        return results
+
+    def _load(self, provider):
+        # warm() only replaces the parsed data once the whole export has been
+        # read, so an export that vanished (e.g. mid atomic replace) leaves the
+        # previous state in place; the change is picked up on the next poll.
+        try:
+            provider.warm()
+        except OSError as e:
+            click.echo(f"Warning: Could not read the {provider.display_name} export ({e}); "
+                       f"keeping the previous data and retrying.", err=True)
+            return None
+        provider._drop_cached(keep=provider._records_key)
+        self.infoblox_manager.clear_cache()  # pick up EAs defined since the last load
+        eas = provider._defined_eas(self.infoblox_manager)
+        if eas is None:
+            return None
+        payloads = provider._network_payloads(eas[0])
+        if payloads is not None:
+            self._keys[provider.name] = provider._records_key
+            self._desired[provider.name] = payloads
+            self._applied.setdefault(provider.name, {})
+            self._dirty.add(provider.name)
+        return payloads
+
+    def _apply(self, provider):
+        applied = self._applied[provider.name]
+        changed, removed = diff_payloads(applied, self._desired[provider.name])
+        self.infoblox_manager.clear_cache()  # the grid may have changed since the last poll
+        scheduled = provider._schedule_payloads(self.infoblox_manager, changed)
+        if scheduled is None:
+            return 0, 0, len(changed), []
+        levels, skipped = scheduled
+        failed = set(self.infoblox_manager.create_network_levels(levels)) if levels else set()
+        for item_key, payload in changed.items():
+            if item_key not in failed:
+                applied[item_key] = payload
+        for item_key in removed:
+            del applied[item_key]
+        if not failed:
+            self._dirty.discard(provider.name)
+        created = sum(len(level) for level in levels) - len(failed)
+        return created, len(skipped), len(failed), removed
+
+    def run(self, interval=DEFAULT_INTERVAL):
+        """Polls every `interval` seconds until interrupted, echoing what was applied."""
+        while True:
+            time.sleep(interval)
+            for name, outcome in self.poll().items():
+                click.echo(format_outcome(name, outcome))
+
+def format_outcome(provider_name, outcome):
+    """Returns a one-line summary of an applied change."""
+    created, skipped, failed, removed = outcome
+    line = f"[{time.strftime('%H:%M:%S')}] {provider_name.upper()}: {created} network(s) created"
+    if skipped:
+        line += f", {skipped} skipped (already in Infoblox or not creatable)"
+    if failed:
+        line += f", {failed} failed (will retry)"
+    if removed:
+        line += f", {len(removed)} no longer in the export: {', '.join(removed)}"
+    return line
@@ -3,7 +3,7 @@ import os
 import shutil
 from unittest.mock import patch
 import pytest
-from ddi.config import load_config, get_config_value, save_config, ConfigurationError
+from ddi.config import load_config, get_config_value, save_config, Config, ConfigurationError
 
 @pytest.fixture
 def temp_config_dir(tmp_path):
@@ -66,3 +66,32 @@ def test_save_config(temp_config_dir):
         saved_config = json.load(f)
     
     assert saved_config == config_data
+
+def test_load_config_is_memoized_by_mtime(temp_config_dir):
+    """Test that an unchanged file is not re-parsed and callers get their own copy."""
+    save_config({"aws": {"vpc_export_file": "a.csv"}})
+    first = load_config()
+    first["aws"]["vpc_export_file"] = "changed"
+    with patch('ddi.config.json.load') as mock_load:
+        assert load_config() == {"aws": {"vpc_export_file": "a.csv"}}
+        mock_load.assert_not_called()
+    os.utime("config.json", ns=(1, 1))
+    assert load_config()["aws"]["vpc_export_file"] == "a.csv"
+
+def test_config_object():
+    """Test environment overrides, typed settings and read-only access."""
+    data = {"infoblox": {"grid_master_ip": "YOUR_INFOBLOX_IP", "admin_name": "admin"}, "aws": {"parallel_workers": 4}}
+    config = Config(data, environ={"DDI_INFOBLOX_PASSWORD": "secret", "DDI_AWS_MMAP_THRESHOLD_MB": "0.5"})
+    assert config.infoblox.password == "secret"
+    assert config.infoblox.wapi_version == "2.13.1"
+    assert config.infoblox.missing_fields() == ["grid_master_ip"]
+    assert config.value("aws.mmap_threshold_mb") == 0.5
+    assert "password" not in data["infoblox"]
+    with pytest.raises(TypeError):
+        config["aws"]["parallel_workers"] = 8
+
+@pytest.mark.parametrize("data", [{"aws": {"parallel_workers": "4"}}, {"aws": []}, {"tag_rules": {}},
+                                  {"infoblox": {"targets": "dev"}}])
+def test_config_schema(data):
+    with pytest.raises(ConfigurationError):
+        Config(data, environ={})
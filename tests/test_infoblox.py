@@ -0,0 +1,261 @@
+import json
+import re
+from unittest.mock import MagicMock, patch
+import pytest
+from ddi.infoblox import InfobloxManager, _iter_json_array, _decode_response
+
+OBJECTS = [
+    {"_ref": "extensibleattributedef/b25l:owner", "name": "owner"},
+    {"_ref": "extensibleattributedef/b25l:x", "name": "brace } in \"quoted\" [string] \\"},
+    {"_ref": "network/ZG5z:10.0.0.0/16/default", "extattrs": {"env": {"value": "prod"}}, "list": [1, {"a": []}]},
+]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_iter_json_array_chunking(chunk_size):
+    """Test that objects are decoded regardless of how the body is chunked."""
+    body = json.dumps(OBJECTS, indent=1).encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    assert list(_iter_json_array(chunks)) == OBJECTS
+
+def _response(body, content_length=True):
+    response = MagicMock()
+    response.headers = {'Content-Length': str(len(body))} if content_length else {}
+    response.content = body
+    response.iter_content.return_value = iter([body[:5], body[5:]])
+    return response
+
+def test_decode_response_small_and_streamed():
+    """Test both the buffered and the streamed decoding paths."""
+    body = json.dumps(OBJECTS).encode()
+    assert _decode_response(_response(body)) == OBJECTS
+    assert _decode_response(_response(body, content_length=False)) == OBJECTS
+    assert _decode_response(_response(b'{"result": []}', content_length=False)) == {"result": []}
+
+@patch('ddi.infoblox.requests.Session.get')
+def test_reads_are_projected(mock_get):
+    """Test that reads request only the fields callers use."""
+    mock_get.return_value = _response(b'[{"_ref": "extensibleattributedef/x", "name": "owner", "type": "STRING"}]')
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret')
+    assert manager.get_ext_attr_definitions()[0]['name'] == 'owner'
+    assert mock_get.call_args.kwargs['params'] == {'_return_fields': 'name,type'}
+    # Served from the cache on the second read
+    manager.get_ext_attr_definitions()
+    assert mock_get.call_count == 1
+
+@patch('ddi.infoblox.requests.Session.post')
+@patch('ddi.infoblox.requests.Session.get')
+def test_network_ea_updates_are_batched(mock_get, mock_post, tmp_path, monkeypatch):
+    """Test paged network reads and batched extattrs+/extattrs- updates."""
+    from ddi.providers.aws import AWSProvider
+    monkeypatch.chdir(tmp_path)  # the journal is written to the working directory
+    pages = [
+        {"result": [{"_ref": "network/a", "network": "10.0.0.0/16", "extattrs": {"env": {"value": "dev"}, "owner": {"value": "x"}}}],
+         "next_page_id": "p2"},
+        {"result": [{"_ref": "network/b", "network": "10.1.0.0/16", "extattrs": {"env": {"value": "prod"}, "Site": {"value": "dc1"}}},
+                    {"_ref": "network/c", "network": "10.9.0.0/16", "extattrs": {}}]},
+    ]
+    definitions = [{"_ref": "extensibleattributedef/e", "name": "env"}, {"_ref": "extensibleattributedef/o", "name": "owner"}]
+    mock_get.side_effect = [_response(json.dumps(definitions).encode())] + [_response(json.dumps(page).encode()) for page in pages]
+    mock_post.return_value = MagicMock()
+
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(
+        "AccountId,Region,VpcId,Name,CidrBlock,AdditionalCidrBlocks,Tags\n"
+        "1,r,vpc-1,one,10.0.0.0/16,['10.1.0.0/16'],\"[{'Key': 'env', 'Value': 'prod'}, {'Key': 'team', 'Value': 't'}]\"\n"
+        "1,r,vpc-2,two,10.9.0.0/16,[],\"[{'Key': 'owner', 'Value': 'y'}]\"\n"
+        "1,r,vpc-3,three,10.9.0.0/16,[],\"[{'Key': 'owner', 'Value': 'z'}, {'Key': 'env', 'Value': 'qa'}]\"\n")
+    provider = AWSProvider({'aws': {'vpc_export_file': str(export_file)}})
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret')
+
+    assert provider.tag_networks(manager, assume_yes=True, batch_size=1) == 0
+    assert mock_get.call_args_list[2].kwargs['params'] == {'_page_id': 'p2'}
+    sent = [call.kwargs['json'] for call in mock_post.call_args_list]
+    # network/b is up to date and its Site EA is not a tag key, so it is left alone.
+    # network/c is matched by vpc-2 and vpc-3 and gets one merged update.
+    assert sent == [
+        [{'method': 'PUT', 'object': 'network/a', 'data': {'extattrs+': {'env': {'value': 'prod'}}, 'extattrs-': {'owner': {}}}}],
+        [{'method': 'PUT', 'object': 'network/c', 'data': {'extattrs+': {'owner': {'value': 'y'}, 'env': {'value': 'qa'}}}}],
+    ]
+    assert mock_post.call_args.args[0].endswith('/request')
+    assert (tmp_path / ".ddi-journal").is_dir()
+
+@patch('ddi.infoblox.requests.Session.delete')
+@patch('ddi.infoblox.requests.Session.get')
+def test_deletes_use_identity_map(mock_get, mock_delete):
+    """Test that listed refs are deleted directly, and stale refs are resolved once."""
+    mock_get.return_value = _response(json.dumps([
+        {"_ref": "extensibleattributedef/b25l:owner", "name": "owner", "type": "STRING"},
+        {"_ref": "extensibleattributedef/b25l:env", "name": "env", "type": "STRING"}]).encode())
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret')
+    manager.get_ext_attr_definitions()
+    mock_delete.return_value = MagicMock(status_code=200)
+    assert manager.delete_ext_attr_definition('owner')
+    assert mock_get.call_count == 1
+    assert mock_delete.call_args.args[0].endswith('/extensibleattributedef/b25l:owner')
+    assert manager.known_ref('extensibleattributedef', 'owner') is None
+
+    # The recorded ref of 'env' went stale: one lookup, then the delete goes to the new ref.
+    stale = MagicMock(status_code=404, content=b'{"Error": "AdmConDataNotFoundError"}')
+    mock_delete.side_effect = [stale, MagicMock(status_code=200)]
+    mock_get.return_value = _response(b'[{"_ref": "extensibleattributedef/bmV3:env", "name": "env"}]')
+    assert manager.delete_ext_attr_definition('env')
+    assert mock_get.call_count == 2
+    assert mock_delete.call_args.args[0].endswith('/extensibleattributedef/bmV3:env')
+
+@patch('ddi.infoblox.requests.Session.post')
+def test_create_network_levels(mock_post, tmp_path):
+    """Test that levels go out in batches, parents first, and failed parents stop their children."""
+    import requests
+    from ddi.journal import Journal
+    from ddi.scheduler import schedule_networks
+    networks = {cidr: {'network': cidr, 'comment': '', 'extattrs': {}} for cidr in
+                ('10.0.0.0/8', '10.1.0.0/16', '10.1.1.0/24', '10.2.0.0/16', '10.2.1.0/24')}
+    levels, skipped = schedule_networks(networks)
+
+    def post(url, json=None, **kwargs):
+        response = MagicMock(content=b'["ref"]')
+        if any(entry['data']['network'] == '10.2.0.0/16' for entry in json):
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError("400", response=MagicMock(text="bad"))
+        return response
+    mock_post.side_effect = post
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret', network_view='All')
+    with Journal("sync", directory=str(tmp_path)) as journal:
+        failed = manager.create_network_levels(levels, journal=journal, batch_size=1)
+
+    assert sorted(failed) == ['10.2.0.0/16', '10.2.1.0/24']
+    sent = [[(entry['object'], entry['data']['network'], entry['data']['network_view']) for entry in call.kwargs['json']]
+            for call in mock_post.call_args_list]
+    assert sent[0] == [('networkcontainer', '10.0.0.0/8', 'default')]
+    assert sorted(sent[1:3]) == [[('networkcontainer', '10.1.0.0/16', 'default')],
+                                 [('networkcontainer', '10.2.0.0/16', 'default')]]
+    assert sent[3:] == [[('network', '10.1.1.0/24', 'default')]]
+    assert journal.failed['10.2.1.0/24'] == "parent 10.2.0.0/16 was not created"
+    assert manager.latency['POST request'][0] == len(sent) == 4
+
+@patch('ddi.infoblox.requests.Session.get')
+def test_find_networks_offloads_filters(mock_get):
+    """Test that filters are sent to WAPI and only the rest is checked locally."""
+    from ddi.infoblox import NetworkFilter
+    networks = [{"network": "10.1.0.0/16"}, {"network": "10.1.4.0/24"}, {"network": "10.1.5.0/24"}]
+    mock_get.return_value = _response(json.dumps({"result": networks}).encode())
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret', network_view='prod')
+
+    network_filter = NetworkFilter(within='10.1.0.0/16', contains='10.1.4.0/23',
+                                   extattrs={'env': 'prod'}, comment='app.1')
+    assert [n['network'] for n in manager.find_networks(network_filter)] == ['10.1.0.0/16']
+    params = mock_get.call_args.kwargs['params']
+    assert params['network~'] == r'^10\.1\.'
+    assert params['contains_address'] == '10.1.4.0'
+    assert params['*env'] == 'prod'
+    assert params['comment~:'] == r'app\.1'
+    assert params['network_view'] == 'prod'
+    assert params['_return_fields'] == 'network,network_view,comment,extattrs'
+    # Only POSIX metacharacters are escaped; '#', '&', '~' and ' ' are ordinary there.
+    assert NetworkFilter(comment='a#1 & ~b (c)*').wapi_params()['comment~:'] == r'a#1 & ~b \(c\)\*'
+
+    # A prefix that is not octet-aligned is completed client-side.
+    mock_get.return_value = _response(json.dumps({"result": networks}).encode())
+    found = manager.find_networks(NetworkFilter(within='10.1.4.0/23'))
+    assert [n['network'] for n in found] == ['10.1.4.0/24', '10.1.5.0/24']
+
+def test_compressed_transport_is_counted():
+    """Test that responses are requested compressed and their wire bytes counted."""
+    import gzip
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    networks = [{"_ref": f"network/{i}", "network": f"10.{i}.0.0/16", "network_view": "default"} for i in range(200)]
+    body = json.dumps({"result": networks}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            payload = gzip.compress(body) if 'gzip' in self.headers.get('Accept-Encoding', '') else body
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            if payload is not body:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret', transport_name='http1')
+    manager.base_url = f"http://127.0.0.1:{server.server_port}/wapi"
+    try:
+        assert manager.get_networks() == networks
+    finally:
+        manager.session.close()
+        server.shutdown()
+        server.server_close()
+    stats = manager.transfer.to_dict()
+    assert stats['requests'] == 1 and stats['compressed_responses'] == 1
+    assert 0 < stats['bytes_received'] < len(body) / 2
+    assert stats['protocols'] == {'HTTP/1.1': 1}
+
+def test_transport_defaults_to_pooled_http1():
+    """Test that HTTP/2 is opt-in and that the streamed body honors read sizes."""
+    from requests.adapters import HTTPAdapter
+    from ddi.transport import _StreamedBody
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret')
+    assert manager.protocol == 'HTTP/1.1'
+    assert isinstance(manager.session.get_adapter('https://127.0.0.1/'), HTTPAdapter)
+
+    response = MagicMock(http_version='HTTP/2')
+    response.iter_bytes.return_value = iter([b'abc', b'defg', b'h'])
+    body = _StreamedBody(response)
+    assert (body.read(2), body.read(4), body.read()) == (b'ab', b'cdef', b'gh')
+
+@pytest.mark.parametrize("within, pattern, found", [
+    ('10.1.2.3/32', r'^10\.1\.2\.3/', ['10.1.2.3/32']),
+    ('10.1.2.0/24', r'^10\.1\.2\.', ['10.1.2.0/24', '10.1.2.3/32']),
+])
+def test_network_filter_within_octet_boundaries(within, pattern, found):
+    """Test the within regex on /32 and /24 and the exact check on its candidates."""
+    from ddi.infoblox import NetworkFilter
+    network_filter = NetworkFilter(within=within)
+    assert network_filter.wapi_params()['network~'] == pattern
+    candidates = [{"network": "10.1.2.0/23"}, {"network": "10.1.2.0/24"}, {"network": "10.1.2.3/32"}]
+    candidates = [network for network in candidates if re.match(pattern, network['network'])]
+    for check in network_filter.residual():
+        candidates = [network for network in candidates if check(network)]
+    assert [network['network'] for network in candidates] == found
+
+@patch('ddi.infoblox.requests.Session.post')
+def test_create_ext_attr_definition_rejects_non_json(mock_post):
+    """Test that a non-JSON reply (e.g. a proxy error page) is reported, not raised."""
+    mock_post.return_value = _response(b'<html>Bad Gateway</html>')
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret')
+    assert manager.create_ext_attr_definition('owner') is None
+    assert manager.known_ref('extensibleattributedef', 'owner') is None
+
+@patch('ddi.infoblox.requests.Session.delete')
+@patch('ddi.infoblox.requests.Session.get')
+def test_delete_network_across_views(mock_get, mock_delete):
+    """Test that deletes in the 'All' view use the CIDR index and refuse CIDRs in several views."""
+    manager = InfobloxManager('127.0.0.1', '2.13.1', 'admin', 'secret')
+    manager._remember('network', [
+        {'_ref': 'network/a:10.0.0.0/16/default', 'network': '10.0.0.0/16', 'network_view': 'default'},
+        {'_ref': 'network/b:10.0.0.0/16/cloud', 'network': '10.0.0.0/16', 'network_view': 'cloud'},
+        {'_ref': 'network/c:10.1.0.0/16/cloud', 'network': '10.1.0.0/16', 'network_view': 'cloud'}])
+    mock_delete.return_value = MagicMock(status_code=200)
+
+    assert not manager.delete_network('10.0.0.0/16')
+    assert not mock_delete.called
+    assert manager.delete_network('10.0.0.0/16', network_view='cloud')
+    assert mock_delete.call_args.args[0].endswith('/network/b:10.0.0.0/16/cloud')
+    assert manager.delete_network('10.1.0.0/16')
+    assert mock_delete.call_args.args[0].endswith('/network/c:10.1.0.0/16/cloud')
+    assert not mock_get.called
+
+    # Not recorded: the lookup finds it in two views, so nothing is deleted.
+    mock_get.return_value = _response(json.dumps([
+        {'_ref': 'network/d', 'network': '10.2.0.0/16', 'network_view': 'default'},
+        {'_ref': 'network/e', 'network': '10.2.0.0/16', 'network_view': 'cloud'}]).encode())
+    assert not manager.delete_network('10.2.0.0/16')
+    assert mock_delete.call_count == 2
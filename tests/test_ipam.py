@@ -0,0 +1,43 @@
+import ipaddress
+import pytest
+from ddi import ipam
+
+def test_parse_and_format_cidr():
+    """Test IPv4/IPv6 parsing, host-bit clearing and formatting."""
+    assert ipam.parse_cidr("10.1.2.3/16") == (4, int(ipaddress.ip_address("10.1.0.0")), 16)
+    version, network, prefix = ipam.parse_cidr("2600:1f18::1/56")
+    assert ipam.format_cidr(version, network, prefix) == "2600:1f18::/56"
+    for bad in ("10.0.0.0/33", "10.1/8", "not-a-cidr"):
+        with pytest.raises(ValueError):
+            ipam.parse_cidr(bad)
+
+def test_aggregate_matches_ipaddress():
+    """Test supernet aggregation against ipaddress.collapse_addresses."""
+    cidrs = ["10.0.0.0/24", "10.0.1.0/24", "10.0.2.0/23", "10.0.3.128/25", "10.0.8.0/22", "192.168.0.0/24"]
+    table = ipam.CidrTable()
+    for cidr in cidrs:
+        table.add(cidr)
+    expected = [str(n) for n in ipaddress.collapse_addresses(ipaddress.ip_network(c) for c in cidrs)]
+    assert ipam.aggregate(4, table.intervals(4)) == expected
+
+def test_free_blocks_and_utilization():
+    """Test free-block discovery and utilization inside a pool."""
+    used = [(ipam.parse_cidr(c)[1], ipam.parse_cidr(c)[1] + ipaddress.ip_network(c).num_addresses - 1)
+            for c in ("10.0.0.0/26", "10.0.0.128/25")]
+    assert ipam.free_blocks("10.0.0.0/24", used) == ["10.0.0.64/26"]
+    assert ipam.pool_utilization("10.0.0.0/24", used) == (192, 256)
+
+def test_build_report_groups():
+    """Test per-account/region grouping with overlapping and invalid prefixes."""
+    records = [
+        {'id': 'vpc-1', 'account': '111', 'region': 'us-east-1', 'cidr': '10.0.0.0/24', 'additional_cidrs': ['10.0.0.0/25']},
+        {'id': 'vpc-2', 'account': '222', 'region': 'us-east-1', 'cidr': '10.0.1.0/24', 'additional_cidrs': ['2600::/64']},
+        {'id': 'vpc-3', 'account': '222', 'region': 'eu-west-1', 'cidr': 'bogus', 'additional_cidrs': []},
+    ]
+    report = ipam.build_report(ipam.CidrTable.from_records(records), pools=["10.0.0.0/23"])
+    assert report['by_account']['111']['ipv4_addresses'] == 256
+    assert report['by_account']['222']['ipv6_addresses'] == 2 ** 64
+    assert report['by_region']['us-east-1']['prefixes'] == 4
+    assert report['invalid'][0]['resource'] == 'vpc-3'
+    assert report['supernets']['ipv4'] == ["10.0.0.0/23"]
+    assert report['pools']["10.0.0.0/23"]['utilization_percent'] == 100.0
@@ -0,0 +1,39 @@
+import os
+from ddi.journal import Journal
+
+def test_journal_resume(tmp_path):
+    """Test that a resumed journal skips completed items and retries failed ones."""
+    with Journal("create-missing", directory=tmp_path) as journal:
+        assert journal.plan(['a', 'b', 'c']) == ['a', 'b', 'c']
+        journal.record('a', True)
+        journal.record('b', False, "boom")
+        # 'c' is in flight when the run is interrupted
+    assert os.path.exists(journal.path)
+
+    with Journal("create-missing", resume=True, directory=tmp_path) as journal:
+        assert journal.failed == {'b': 'boom'}
+        pending = journal.plan(['a', 'b', 'c'])
+        assert pending == ['b', 'c']
+        for item in pending:
+            journal.record(item, True)
+    assert not os.path.exists(journal.path)
+
+def test_journal_without_resume_starts_over(tmp_path):
+    """Test that a new run ignores the journal of a previous run."""
+    with Journal("sync", directory=tmp_path) as journal:
+        journal.plan(['a'])
+    with Journal("sync", directory=tmp_path) as journal:
+        assert journal.plan(['a']) == ['a']
+
+def test_journal_ignores_torn_line(tmp_path):
+    """Test that a partially written last line does not break resuming."""
+    with Journal("sync", directory=tmp_path) as journal:
+        journal.plan(['a', 'b'])
+        journal.record('a', True)
+    with open(journal.path, 'a') as f:
+        f.write('{"item": "b", "sta')
+    with Journal("sync", resume=True, directory=tmp_path) as journal:
+        assert journal.plan(['a', 'b']) == ['b']
+        journal.record('b', False)
+    with Journal("sync", resume=True, directory=tmp_path) as journal:
+        assert 'b' in journal.failed
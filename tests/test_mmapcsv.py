@@ -0,0 +1,58 @@
+import csv
+import mmap
+
+from ddi.providers import mmapcsv
+from ddi.providers.aws import AWSProvider
+
+CSV_TEXT = (
+    'VpcId,Name,Tags\r\n'
+    'vpc-1,one,"[{\'Key\': \'Env\', \'Value\': \'prod\'}]"\r\n'
+    'vpc-2,"two, quoted","[{\'Key\': \'Note\', \'Value\': \'line1\nline2 ""x""\'}]"\r\n'
+    '\r\n'
+    'vpc-3,three,[]\r\n'
+    'vpc-4,four,"[{\'Key\': \'Env\', \'Value\': \'dev\'}, {\'Key\': \'Owner\', \'Value\': \'ops\'}]"\r\n'
+)
+
+def _write(tmp_path, text=CSV_TEXT):
+    path = tmp_path / "vpcs.csv"
+    path.write_bytes(text.encode('utf-8'))
+    return str(path)
+
+def _csv_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(row['VpcId'], row['Tags']) for row in csv.DictReader(f) if row['VpcId']]
+
+def test_iter_rows_matches_csv_module(tmp_path):
+    path = _write(tmp_path)
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header, start = mmapcsv.read_header(buf)
+    assert header == ['VpcId', 'Name', 'Tags']
+    rows = list(mmapcsv.iter_rows(buf, start, len(buf), (0, 2)))
+    buf.close()
+    assert rows == _csv_rows(path)
+
+def test_split_ranges_respects_quoted_newlines(tmp_path):
+    path = _write(tmp_path)
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _, start = mmapcsv.read_header(buf)
+    for parts in range(1, 12):
+        ranges = mmapcsv.split_ranges(buf, start, len(buf), parts)
+        rows = [row for a, b in ranges for row in mmapcsv.iter_rows(buf, a, b, (0, 2))]
+        assert rows == _csv_rows(path)
+    buf.close()
+
+def test_map_ranges_parallel_tag_table(tmp_path):
+    path = _write(tmp_path, CSV_TEXT.replace('\r\n\r\n', '\r\n') * 50)
+    provider = AWSProvider({'aws': {'vpc_export_file': path, 'mmap_threshold_mb': 0, 'parallel_workers': 2}})
+    table = provider._build_tag_table()
+    expected = AWSProvider({'aws': {'vpc_export_file': path}})._build_tag_table()
+    assert table.resource_ids == expected.resource_ids
+    assert [table.tags(row) for row in range(len(table))] == [expected.tags(row) for row in range(len(expected))]
+
+def test_empty_export_yields_no_records(tmp_path):
+    path = _write(tmp_path, '')
+    assert mmapcsv.map_ranges(path, ('VpcId', 'Tags'), list) == []
+    provider = AWSProvider({'aws': {'vpc_export_file': path, 'mmap_threshold_mb': 0}})
+    assert provider._get_tags_with_resources() == ({}, set())
@@ -0,0 +1,37 @@
+import json
+from unittest.mock import MagicMock
+from ddi import planner
+
+def test_estimate_uses_measured_latency():
+    """Test call, batch, byte and duration estimates from measured latency."""
+    manager = MagicMock()
+    manager.average_latency.return_value = 0.1
+    items = [planner.plan_item(name, 'POST', 'extensibleattributedef', {'name': name}) for name in ('a', 'b', 'c')]
+
+    est = planner.estimate(items, manager, batch_size=2)
+    assert est['calls'] == est['batches'] == 2
+    assert est['objects'] == 3
+    assert est['latency_seconds'] == {'POST extensibleattributedef': 0.1 * planner.WRITE_LATENCY_FACTOR}
+    assert est['duration_seconds'] == round(2 * 0.1 * planner.WRITE_LATENCY_FACTOR, 2)
+    assert est['request_bytes'] == 2 * planner.REQUEST_OVERHEAD_BYTES + sum(len(json.dumps(i['payload'])) for i in items)
+    manager.measure_latency.assert_not_called()
+
+def test_estimate_falls_back_to_default_latency():
+    """Test the default latency when an endpoint cannot be probed."""
+    manager = MagicMock()
+    manager.average_latency.return_value = None
+    manager.measure_latency.return_value = None
+    est = planner.estimate([planner.plan_item('k', 'POST', 'network', {})], manager)
+    assert est['latency_seconds'] == {'POST network': planner.DEFAULT_LATENCY}
+
+def test_estimate_batches_per_containment_level():
+    """Test that sync items are costed as one batched call per level chunk."""
+    manager = MagicMock()
+    manager.average_latency.return_value = 0.1
+    items = [dict(planner.plan_item('10.0.0.0/8', 'POST', 'networkcontainer', {}), parent=None)]
+    items += [dict(planner.plan_item(f'10.{i}.0.0/16', 'POST', 'network', {}), parent='10.0.0.0/8') for i in range(5)]
+    items += [dict(planner.plan_item('192.168.0.0/24', 'POST', 'network', {}), parent=None)]
+    est = planner.estimate(items, manager, batch_size=2)
+    assert est['levels'] == 2
+    assert est['calls'] == 1 + 3  # ceil(2 / 2) + ceil(5 / 2)
+    assert est['duration_seconds'] == round(4 * 0.1 * planner.WRITE_LATENCY_FACTOR, 2)
@@ -0,0 +1,270 @@
+import json
+import pytest
+from ddi.providers.aws import AWSProvider
+from ddi.providers.azure import AzureProvider
+from ddi.providers.gcp import GCPProvider
+from ddi.providers.tags import parse_tags, TagTable
+
+AWS_CSV = (
+    "AccountId,Region,VpcId,Name,CidrBlock,IsDefault,State,DhcpOptionsId,InstanceTenancy,AdditionalCidrBlocks,Tags\n"
+    "111,us-east-1,vpc-1,one,10.0.0.0/16,False,available,dopt-1,default,['100.65.0.0/16'],"
+    "\"[{'Key': 'environment', 'Value': 'prodpci'}, {'Key': 'owner', 'Value': 'team-a'}]\"\n"
+    "222,us-west-2,vpc-2,two,10.1.0.0/16,False,available,dopt-2,default,[],"
+    "\"[{'Key': 'environment', 'Value': 'dev'}]\"\n"
+    "333,us-west-2,vpc-3,three,10.1.0.0/16,False,available,dopt-3,default,[],[]\n"
+)
+
+@pytest.fixture
+def aws_provider(tmp_path):
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(AWS_CSV)
+    return AWSProvider({'aws': {'vpc_export_file': str(export_file)}})
+
+def test_parse_tags_formats():
+    """Test parsing Python-literal, JSON and mapping tag payloads."""
+    expected = [{'Key': 'a', 'Value': '1'}]
+    assert parse_tags("[{'Key': 'a', 'Value': '1'}]") == expected
+    assert parse_tags('[{"Key": "a", "Value": "1"}]') == expected
+    assert parse_tags({'a': '1'}) == expected
+    assert parse_tags("[]") == []
+    assert parse_tags(None) == []
+    with pytest.raises(ValueError):
+        parse_tags("[{'Value': '1'}]")
+
+def test_aws_records(aws_provider):
+    """Test normalized records from the AWS export CSV."""
+    records = list(aws_provider.iter_records())
+    assert [r['id'] for r in records] == ['vpc-1', 'vpc-2', 'vpc-3']
+    assert records[0]['additional_cidrs'] == ['100.65.0.0/16']
+    assert records[0]['tags'][0] == {'Key': 'environment', 'Value': 'prodpci'}
+    assert records[2]['tags'] == []
+
+def test_tag_index_and_cache(aws_provider):
+    """Test the tag index built from tag batches and its cache."""
+    tags_with_vpcs, all_tags = aws_provider._get_aws_tags_from_csv()
+    assert all_tags == {'environment', 'owner'}
+    assert tags_with_vpcs == {'environment': ['vpc-1', 'vpc-2'], 'owner': ['vpc-1']}
+    assert aws_provider._get_tag_table() is aws_provider._get_tag_table()
+
+def test_tag_batches(aws_provider):
+    """Test that untagged records are skipped and batches are bounded."""
+    batches = list(aws_provider.iter_tag_batches(batch_size=1))
+    assert [[resource_id for resource_id, _ in batch] for batch in batches] == [['vpc-1'], ['vpc-2']]
+
+def test_search_and_audit(aws_provider):
+    """Test searching records and auditing for shared CIDRs and missing tags."""
+    assert [r['id'] for r in aws_provider.search('PRODPCI')] == ['vpc-1']
+    issues = {(f['resource'], f['issue']) for f in aws_provider.audit()}
+    assert ('vpc-3', 'No tags') in issues
+    assert ('vpc-2', 'CIDR 10.1.0.0/16 is used by 2 resources') in issues
+
+def test_azure_records(tmp_path):
+    """Test normalized records from an Azure VNet export."""
+    export_file = tmp_path / "vnets.json"
+    export_file.write_text(json.dumps([{
+        "id": "/subscriptions/sub-1/resourceGroups/rg/providers/Microsoft.Network/virtualNetworks/vnet-a",
+        "name": "vnet-a",
+        "location": "eastus",
+        "addressSpace": {"addressPrefixes": ["10.2.0.0/16", "10.3.0.0/16"]},
+        "tags": {"environment": "prod"}
+    }]))
+    provider = AzureProvider({'azure': {'vnet_export_file': str(export_file)}})
+    record = next(provider.iter_records())
+    assert record['account'] == 'sub-1'
+    assert record['cidr'] == '10.2.0.0/16'
+    assert record['additional_cidrs'] == ['10.3.0.0/16']
+    assert record['tags'] == [{'Key': 'environment', 'Value': 'prod'}]
+
+def test_gcp_records_json_lines(tmp_path):
+    """Test normalized records from a gcloud subnet export in JSON Lines format."""
+    export_file = tmp_path / "subnets.jsonl"
+    base = "https://www.googleapis.com/compute/v1/projects/proj-1"
+    export_file.write_text(json.dumps({
+        "name": "subnet-a",
+        "ipCidrRange": "10.4.0.0/20",
+        "network": f"{base}/global/networks/net-a",
+        "region": f"{base}/regions/us-central1",
+        "selfLink": f"{base}/regions/us-central1/subnetworks/subnet-a",
+        "secondaryIpRanges": [{"rangeName": "pods", "ipCidrRange": "10.8.0.0/14"}]
+    }) + "\n" + json.dumps({
+        "name": "subnet-b",
+        "ipCidrRange": "10.5.0.0/20",
+        "network": f"{base}/global/networks/net-a",
+        "region": f"{base}/regions/europe-west1",
+        "selfLink": f"{base}/regions/europe-west1/subnetworks/subnet-b",
+        "labels": {"owner": "team-b"}
+    }) + "\n")
+    provider = GCPProvider({'gcp': {'vpc_export_file': str(export_file)}})
+    first, second = provider.iter_records()
+    assert (first['account'], first['region'], first['name']) == ('proj-1', 'us-central1', 'subnet-a')
+    assert first['cidr'] == '10.4.0.0/20' and first['additional_cidrs'] == ['10.8.0.0/14']
+    assert first['tags'] == []
+    assert second['tags'] == [{'Key': 'owner', 'Value': 'team-b'}]
+
+def test_warm_records_and_refresh(aws_provider, tmp_path):
+    """Test that warm state is reused until refreshed or the export changes."""
+    aws_provider.warm()
+    assert aws_provider._records_key is not None
+    assert [r['id'] for r in aws_provider.search('team-a')] == ['vpc-1']
+
+    aws_provider.refresh()
+    assert aws_provider._records is None
+    assert [r['id'] for r in aws_provider.search('team-a')] == ['vpc-1']
+
+def test_tag_table_interning():
+    """Test that keys and values are interned and rows slice the id arrays."""
+    table = TagTable()
+    table.add('vpc-1', [{'Key': 'env', 'Value': 'prod'}, {'Key': 'owner', 'Value': 'a'}])
+    table.add('vpc-2', [{'Key': 'env', 'Value': 'prod'}])
+    assert table.keys == ['env', 'owner']
+    assert table.values == ['prod', 'a']
+    assert list(table.offsets) == [0, 2, 3]
+    assert table.tags(table.row('vpc-2')) == [{'Key': 'env', 'Value': 'prod'}]
+    assert table.extattrs(0) == {'env': {'value': 'prod'}, 'owner': {'value': 'a'}}
+    assert [list(rows) for rows in table.key_postings()] == [[0, 1], [0]]
+    assert table.tags_with_resources() == {'env': ['vpc-1', 'vpc-2'], 'owner': ['vpc-1']}
+
+class SyncManager:
+    """Answers the reads of a sync plan for an empty view with only the 'owner' EA defined."""
+    write_view = 'default'
+
+    def get_ext_attr_definitions(self):
+        return [{'name': 'owner', 'type': 'STRING'}]
+
+    def get_networks(self):
+        return []
+
+    def get_network_containers(self):
+        return []
+
+def test_sync_leaves_out_undefined_eas(aws_provider, capsys):
+    """Test that sync payloads only carry defined EAs, so WAPI does not reject their batch."""
+    items = {item['key']: item for item in aws_provider.plan_sync(SyncManager())}
+    assert items['vpc-1:10.0.0.0/16']['payload']['extattrs'] == {'owner': {'value': 'team-a'}}
+    assert items['vpc-2:10.1.0.0/16']['payload']['extattrs'] == {}
+    assert "1 tag key(s) have no Infoblox EA and are skipped: environment." in capsys.readouterr().err
+
+def test_duplicate_resource_ids_keep_their_tags(tmp_path):
+    """Test that a VPC ID repeated across accounts keeps the tags of every row."""
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(
+        "AccountId,Region,VpcId,Name,CidrBlock,AdditionalCidrBlocks,Tags\n"
+        "111,us-east-1,vpc-1,one,10.0.0.0/16,[],\"[{'Key': 'env', 'Value': 'prod'}]\"\n"
+        "222,us-west-2,vpc-1,one,10.9.0.0/16,[],\"[{'Key': 'owner', 'Value': 'team-b'}]\"\n")
+    provider = AWSProvider({'aws': {'vpc_export_file': str(export_file)}})
+    provider.warm()
+    assert [(r['account'], r['tags']) for r in provider.search('vpc-1')] == [
+        ('111', [{'Key': 'env', 'Value': 'prod'}]), ('222', [{'Key': 'owner', 'Value': 'team-b'}])]
+    # Network EAs are looked up by resource ID, so a repeated ID gets the union of its tags.
+    payloads = provider._network_payloads()
+    assert payloads['vpc-1:10.9.0.0/16']['extattrs'] == {'env': {'value': 'prod'}, 'owner': {'value': 'team-b'}}
+    tags_with_resources, _ = provider._get_tags_with_resources()
+    assert tags_with_resources == {'env': ['vpc-1'], 'owner': ['vpc-1']}
+
+class FakeEC2:
+    """Serves DescribeVpcs one VPC per page, like a paginating EC2 endpoint."""
+
+    def __init__(self, vpcs):
+        self.vpcs = vpcs
+        self.calls = []
+
+    def describe_vpcs(self, MaxResults, NextToken=None):
+        self.calls.append(NextToken)
+        index = int(NextToken or 0)
+        response = {'Vpcs': self.vpcs[index:index + 1]}
+        if index + 1 < len(self.vpcs):
+            response['NextToken'] = str(index + 1)
+        return response
+
+def test_aws_live_records_match_export(tmp_path, monkeypatch):
+    """Test that a live DescribeVpcs scan yields the same records as the export CSV."""
+    from ddi.providers import ec2
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(
+        "AccountId,Region,VpcId,Name,CidrBlock,IsDefault,State,DhcpOptionsId,InstanceTenancy,AdditionalCidrBlocks,Tags\n"
+        "111,us-east-1,vpc-1,one,10.0.0.0/16,False,available,dopt-1,default,['100.65.0.0/16'],"
+        "\"[{'Key': 'Name', 'Value': 'one'}, {'Key': 'env', 'Value': 'prod'}]\"\n"
+        "111,us-east-1,vpc-2,,10.1.0.0/16,False,available,dopt-1,default,[],[]\n"
+        "111,us-west-2,vpc-3,three,10.2.0.0/16,False,available,dopt-2,default,[],"
+        "\"[{'Key': 'Name', 'Value': 'three'}]\"\n")
+    east = FakeEC2([
+        {'VpcId': 'vpc-1', 'CidrBlock': '10.0.0.0/16', 'State': 'available',
+         'CidrBlockAssociationSet': [{'CidrBlock': '10.0.0.0/16', 'CidrBlockState': {'State': 'associated'}},
+                                     {'CidrBlock': '100.65.0.0/16', 'CidrBlockState': {'State': 'associated'}},
+                                     {'CidrBlock': '100.66.0.0/16', 'CidrBlockState': {'State': 'disassociated'}}],
+         'Tags': [{'Key': 'Name', 'Value': 'one'}, {'Key': 'env', 'Value': 'prod'}]},
+        {'VpcId': 'vpc-2', 'CidrBlock': '10.1.0.0/16', 'State': 'available'},
+    ])
+    west = FakeEC2([{'VpcId': 'vpc-3', 'CidrBlock': '10.2.0.0/16', 'Tags': [{'Key': 'Name', 'Value': 'three'}]}])
+    clients = [('111', 'us-east-1', east), ('111', 'us-west-2', west)]
+    monkeypatch.setattr(ec2, 'ec2_clients', lambda role_arns, regions: clients)
+
+    live = AWSProvider({'aws': {'source': 'api', 'api_rate_limit': 1000}})
+    exported = AWSProvider({'aws': {'vpc_export_file': str(export_file)}})
+    assert list(live._iter_warm_records()) == list(exported.iter_records())
+    assert east.calls == [None, '1']
+    # The scan is kept warm: later reads do not call EC2 again.
+    assert sorted(live._get_tag_table().key_names()) == ['Name', 'env']
+    assert len(east.calls) == 2
+
+def test_profile_tags(tmp_path):
+    """Test value cardinality, null rates, top values and near-duplicate clusters."""
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(
+        "AccountId,Region,VpcId,Name,CidrBlock,AdditionalCidrBlocks,Tags\n"
+        "1,r,vpc-1,,10.0.0.0/16,[],\"[{'Key': 'env', 'Value': 'prodpci'}, {'Key': 'status', 'Value': '2023-07-21T18:25:43Z: attached'}]\"\n"
+        "1,r,vpc-2,,10.1.0.0/16,[],\"[{'Key': 'env', 'Value': 'prod-pci'}, {'Key': 'status', 'Value': '2021-01-02T00:00:00Z: attached'}]\"\n"
+        "1,r,vpc-3,,10.2.0.0/16,[],\"[{'Key': 'env', 'Value': 'prodpci'}]\"\n"
+        "1,r,vpc-4,,10.3.0.0/16,[],\"[{'Key': 'env', 'Value': ''}]\"\n"
+        "1,r,vpc-5,,10.4.0.0/16,[],[]\n")
+    profiles = AWSProvider({'aws': {'vpc_export_file': str(export_file)}}).profile_tags(top=1)
+    assert profiles['env'] == {
+        'instances': 4, 'null_rate': 0.4, 'cardinality': 3, 'top_values': [['prodpci', 2]],
+        'clusters': [['prodpci', 'prod-pci']], 'timestamps': None,
+    }
+    assert profiles['status']['null_rate'] == 0.6
+    assert profiles['status']['timestamps'] == {'oldest': '2021-01-02T00:00:00', 'newest': '2023-07-21T18:25:43'}
+
+def test_spilled_tag_postings_export(tmp_path, monkeypatch):
+    """Test that postings past the memory budget are spilled and merged into the same report."""
+    from unittest.mock import MagicMock
+    from ddi.providers import spill
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(
+        "AccountId,Region,VpcId,Name,CidrBlock,AdditionalCidrBlocks,Tags\n"
+        "1,r,vpc-9,nine,10.9.0.0/16,[],\"[{'Key': 'zone', 'Value': 'a'}, {'Key': 'environment', 'Value': 'prod'}]\"\n"
+        "1,r,vpc-2,two,10.2.0.0/16,[],\"[{'Key': 'environment', 'Value': 'dev'}]\"\n"
+        "1,r,vpc-5,five,10.5.0.0/16,[],\"[{'Key': 'zone', 'Value': 'b'}]\"\n")
+    manager = MagicMock()
+    manager.get_ext_attr_definitions.return_value = [{'name': 'environment'}]
+
+    reports = {}
+    for mode, config in (('memory', {}), ('spilled', {'memory_budget_mb': 1})):
+        provider = AWSProvider(dict(config, aws={'vpc_export_file': str(export_file)}))
+        monkeypatch.setattr(spill, 'POSTING_OVERHEAD_BYTES', 1024 * 1024)  # one posting per run
+        provider.export_analysis(manager, str(tmp_path / mode))
+        reports[mode] = json.loads((tmp_path / f"{mode}.json").read_text())
+    assert reports['spilled'] == reports['memory']
+    assert [list(reports[mode]['aws_tags_with_networks'].items()) for mode in ('memory', 'spilled')] == [
+        [('environment', ['vpc-2', 'vpc-9']), ('zone', ['vpc-5', 'vpc-9'])]] * 2
+    assert (tmp_path / "spilled.csv").read_text() == (tmp_path / "memory.csv").read_text()
+
+def test_spilled_postings_read_error_cleans_up(tmp_path, monkeypatch, capsys):
+    """Test that a read error while spilling is reported like in memory and leaves no runs behind."""
+    import tempfile
+    from ddi.providers import spill
+    spill_dir = tmp_path / "spill"
+    spill_dir.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(spill_dir))
+    monkeypatch.setattr(spill, 'POSTING_OVERHEAD_BYTES', 1024 * 1024)
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(AWS_CSV)
+    provider = AWSProvider({'memory_budget_mb': 1, 'aws': {'vpc_export_file': str(export_file)}})
+
+    def broken_records():
+        yield from AWSProvider.iter_records(provider)
+        raise ValueError("malformed row")
+    monkeypatch.setattr(provider, 'iter_records', broken_records)
+    assert provider._get_tags_with_resources() == (None, None)
+    assert "malformed row" in capsys.readouterr().err
+    assert list(spill_dir.iterdir()) == []
@@ -0,0 +1,46 @@
+import json
+from ddi.reports import AnalysisReport, iter_report_diff
+
+def _write(path, report, indent=4):
+    path.write_text(json.dumps(report, indent=indent))
+    return str(path)
+
+def test_report_diff(tmp_path):
+    """Test set changes per section and per-tag network membership changes."""
+    old = _write(tmp_path / "old.json", {
+        "all_aws_tags": ["env", "owner", "x]\"y"],
+        "all_infoblox_eas": ["env"],
+        "missing_eas_in_infoblox": ["owner"],
+        "potential_duplicates": [],
+        "aws_tags_with_networks": {"env": ["vpc-1", "vpc-2"], "owner": ["vpc-1"], "x]\"y": ["vpc-\\]3"]},
+    })
+    new = _write(tmp_path / "new.json", {
+        "all_aws_tags": ["env", "team", "x]\"y"],
+        "all_infoblox_eas": ["env", "owner"],
+        "missing_eas_in_infoblox": [],
+        "potential_duplicates": [{"aws_tag": "Env", "similar_infoblox_ea": "env", "similarity_score": 100}],
+        "aws_tags_with_networks": {"env": ["vpc-3", "vpc-2"], "team": ["vpc-3"], "x]\"y": ["vpc-\\]3"]},
+    }, indent=None)
+
+    with AnalysisReport(old) as before, AnalysisReport(new) as after:
+        assert before.provider == 'aws'
+        changes = list(iter_report_diff(before, after))
+    assert changes == [
+        {'section': 'tags', 'change': 'added', 'item': 'team'},
+        {'section': 'tags', 'change': 'removed', 'item': 'owner'},
+        {'section': 'eas', 'change': 'added', 'item': 'owner'},
+        {'section': 'missing_eas', 'change': 'removed', 'item': 'owner'},
+        {'section': 'duplicates', 'change': 'added',
+         'item': {'aws_tag': 'Env', 'similar_infoblox_ea': 'env', 'similarity_score': 100}},
+        {'section': 'networks', 'change': 'changed', 'tag': 'env', 'added': ['vpc-3'], 'removed': ['vpc-1']},
+        {'section': 'networks', 'change': 'added', 'tag': 'team', 'added': ['vpc-3'], 'removed': []},
+        {'section': 'networks', 'change': 'removed', 'tag': 'owner', 'added': [], 'removed': ['vpc-1']},
+    ]
+
+def test_legacy_duplicates_report(tmp_path):
+    """Test that early reports holding only the duplicates list can be compared."""
+    entry = {"aws_tag": "Dud", "similar_infoblox_ea": "dud", "similarity_score": 100}
+    legacy = _write(tmp_path / "legacy.json", [entry])
+    with AnalysisReport(legacy) as before, AnalysisReport(legacy) as after:
+        assert list(iter_report_diff(before, after)) == []
+        assert before.sections['duplicates'] == {json.dumps(entry, sort_keys=True)}
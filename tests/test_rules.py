@@ -0,0 +1,51 @@
+import pytest
+from ddi.providers.aws import AWSProvider
+from ddi.providers.rules import TagRules
+
+RULES = [
+    {"action": "exclude", "pattern": "STNOStatus-.*"},
+    {"action": "exclude", "keys": ["dud", "NewTag"]},
+    {"action": "merge", "keys": ["owner", "createdby"], "to": "Owner", "ignore_case": True},
+    {"action": "rename", "pattern": "env(ironment)?", "to": "Environment", "values": {"prd": "prod"}},
+    {"action": "rename", "pattern": "tf_(\\w+)", "to": "terraform_\\1"},
+]
+
+def _tags(**tags):
+    return [{'Key': key, 'Value': value} for key, value in tags.items()]
+
+def test_rules_apply():
+    """Test exclude, merge, rename with group references, and value mapping."""
+    rules = TagRules(RULES)
+    tags = _tags(**{'STNOStatus-VPCAttachment': 'x', 'dud': 'x', 'CreatedBy': 'a', 'owner': 'b',
+                    'env': 'prd', 'tf_module': 'vpc', 'project': 'p'})
+    assert rules.apply(tags) == _tags(Owner='a', Environment='prod', terraform_module='vpc', project='p')
+    assert rules.map_key('environment') == ('Environment', {'prd': 'prod'})
+
+def test_rules_keep_their_own_groups():
+    """Test that backreferences and group names of one rule are not affected by other rules."""
+    rules = TagRules([
+        {"action": "rename", "pattern": "(?P<name>a+)-x", "to": "\\g<name>"},
+        {"action": "exclude", "pattern": "(b)\\1"},
+        {"action": "rename", "pattern": "(?P<name>c+)-y", "to": "\\g<name>"},
+    ])
+    assert rules.map_key('bb') == (None, None)
+    assert rules.map_key('ba') == ('ba', None)
+    assert rules.map_key('aa-x') == ('aa', None)
+    assert rules.map_key('cc-y') == ('cc', None)
+
+def test_include_rules_drop_unmatched_keys():
+    rules = TagRules([{"action": "include", "keys": ["project"]}])
+    assert rules.apply(_tags(project='p', other='o')) == _tags(project='p')
+
+@pytest.mark.parametrize("rule", [{"action": "drop", "keys": ["a"]}, {"action": "rename", "keys": ["a"]},
+                                  {"action": "exclude", "pattern": "("}, {"action": "exclude"}])
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        TagRules([rule])
+
+def test_provider_applies_rules(tmp_path):
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text("VpcId,CidrBlock,Tags\nvpc-1,10.0.0.0/16,\"[{'Key': 'dud', 'Value': '1'}, {'Key': 'env', 'Value': 'prd'}]\"\n")
+    provider = AWSProvider({'aws': {'vpc_export_file': str(export_file)}, 'tag_rules': RULES})
+    assert provider._get_tag_table().key_names() == {'Environment'}
+    assert provider.preview_tag_rules() == {'dud': (1, None), 'env': (1, 'Environment')}
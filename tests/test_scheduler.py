@@ -0,0 +1,26 @@
+from ddi.scheduler import schedule_networks, levels_from_items
+
+def _payload(cidr):
+    return {'network': cidr, 'comment': cidr, 'extattrs': {}}
+
+def test_schedule_networks_orders_by_containment():
+    """Test that enclosing CIDRs become containers and are created first."""
+    networks = {key: _payload(cidr) for key, cidr in {
+        'a': '10.0.0.0/8', 'b': '10.1.0.0/16', 'c': '10.1.2.0/24',
+        'd': '192.168.0.0/24', 'e': '10.2.0.0/24', 'f': '172.16.1.0/24',
+        'g': '10.1.2.0/24', 'h': '172.16.0.0/16', 'i': 'bogus',
+    }.items()}
+    levels, skipped = schedule_networks(networks, existing_networks=['172.16.0.0/16'],
+                                        existing_containers=['10.2.0.0/16'])
+
+    shape = [[(item['key'], item['object'], item['parent']) for item in level] for level in levels]
+    assert shape == [
+        [('a', 'networkcontainer', None), ('d', 'network', None)],
+        [('b', 'networkcontainer', 'a'), ('e', 'network', 'a')],
+        [('c', 'network', 'b')],
+    ]
+    assert set(skipped) == {'f', 'g', 'h', 'i'}
+    assert skipped['f'] == "inside existing network 172.16.0.0/16"
+    assert skipped['g'] == "same CIDR as c"
+    assert skipped['h'] == "already exists as a network"
+    assert levels_from_items([item for level in levels for item in level]) == levels
@@ -0,0 +1,108 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from ddi.providers.aws import AWSProvider
+from ddi.server import Coalescer, DdiApi, make_server
+
+AWS_CSV = (
+    "AccountId,Region,VpcId,Name,CidrBlock,AdditionalCidrBlocks,Tags\n"
+    "111,us-east-1,vpc-1,one,10.0.0.0/16,[],\"[{'Key': 'env', 'Value': 'prod'}, {'Key': 'owner', 'Value': 'a'}]\"\n"
+    "222,us-west-2,vpc-2,two,10.1.0.0/16,[],[]\n"
+)
+
+class FakeManager:
+    grid_master_ip = '10.0.0.1'
+    network_view = 'default'
+
+    def get_ext_attr_definitions(self):
+        return [{'name': 'env', 'type': 'STRING'}]
+
+    def clear_cache(self):
+        pass
+
+def _api(tmp_path):
+    export_file = tmp_path / "vpcs.csv"
+    export_file.write_text(AWS_CSV)
+    return DdiApi([AWSProvider({'aws': {'vpc_export_file': str(export_file)}})], {'default': FakeManager()})
+
+def test_coalescer_shares_in_flight_result():
+    coalescer = Coalescer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 42
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(coalescer.run('k', compute)))
+    leader.start()
+    started.wait(5)
+    joined = threading.Event()
+
+    def follow():
+        def waiting():
+            joined.set()  # reached only if the follower ran compute itself
+            return compute()
+        results.append(coalescer.run('k', waiting))
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    # The follower either shares the leader's future (and blocks on it) or
+    # would run `waiting`; give it time to do one or the other.
+    assert not joined.wait(0.2)
+    release.set()
+    leader.join()
+    follower.join()
+    assert results == [42, 42] and len(calls) == 1 and coalescer.shared == 1
+
+def test_api_routes(tmp_path):
+    api = _api(tmp_path)
+    assert api.handle('GET', '/aws/list-missing', {}) == (200, {'provider': 'aws', 'missing': ['owner']})
+    status, body = api.handle('GET', '/aws/search', {'q': 'vpc-2'})
+    assert status == 200 and [r['id'] for r in body['results']] == ['vpc-2']
+    assert api.handle('GET', '/aws/search', {})[0] == 400
+    assert api.handle('GET', '/azure/audit', {})[0] == 404
+    assert api.handle('GET', '/aws/audit', {'target': 'nope'})[0] == 404
+
+def test_http_server(tmp_path):
+    httpd = make_server(_api(tmp_path), port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/aws/audit") as response:
+            findings = json.load(response)['findings']
+        assert {'resource': 'vpc-2', 'issue': 'No tags'} in findings
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def test_handlers_do_not_print(tmp_path, capsys):
+    api = _api(tmp_path)
+    assert api.handle('GET', '/aws/analyze', {})[0] == 200
+    assert api.handle('POST', '/refresh', {})[0] == 200
+    captured = capsys.readouterr()
+    assert captured.out == '' and captured.err == ''
+
+def test_unreadable_export_is_a_json_error(tmp_path):
+    missing = tmp_path / "missing.csv"
+    api = DdiApi([AWSProvider({'aws': {'vpc_export_file': str(missing)}})], {'default': FakeManager()})
+    assert set(api.warm()) == {'aws'}  # the server still starts
+    httpd = make_server(api, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/aws/list-missing")
+        assert error.value.code == 503
+        assert json.load(error.value)['error'].startswith("Could not read the AWS export:")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    # Once the export exists, the route serves it.
+    missing.write_text(AWS_CSV)
+    assert api.handle('GET', '/aws/list-missing', {}) == (200, {'provider': 'aws', 'missing': ['owner']})
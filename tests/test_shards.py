@@ -0,0 +1,81 @@
+import os
+import time
+from ddi import shards
+from ddi.scheduler import schedule_networks
+
+class FakeManager:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.levels = []
+
+    def create_network_levels(self, levels, journal=None, batch_size=None):
+        self.levels.append(levels)
+        return [item['key'] for level in levels for item in level if item['key'] in self.fail]
+
+def _plan(items):
+    return {'operation': 'sync', 'provider': 'aws', 'grid_master': 'gm', 'network_view': 'default',
+            'estimate': {'batch_size': 10}, 'items': items}
+
+def test_partition_keeps_containment_trees_together():
+    """Test stable hashing by shard key, with nested networks following their container."""
+    networks = {cidr: {'network': cidr} for cidr in ('10.0.0.0/8', '10.1.0.0/16', '10.1.1.0/24', '192.168.0.0/24')}
+    levels, _ = schedule_networks(networks)
+    keys = {'10.0.0.0/8': 'acct-1', '10.1.0.0/16': 'acct-2', '10.1.1.0/24': 'acct-3', '192.168.0.0/24': 'acct-4'}
+    parts = shards.partition(levels, keys, 4)
+    tree = shards.shard_of('acct-1', 4)
+    assert {'10.0.0.0/8', '10.1.0.0/16', '10.1.1.0/24'} <= {item['key'] for item in parts[tree]}
+    assert any(item['key'] == '192.168.0.0/24' for item in parts[shards.shard_of('acct-4', 4)])
+    assert sum(len(part) for part in parts) == 4
+
+def test_workers_claim_run_and_merge(tmp_path):
+    """Test exclusive claims, stale-lock takeover, shard results and the merged summary."""
+    directory = str(tmp_path)
+    shards.write_manifests(directory, [_plan([{'key': 'a', 'parent': None}]),
+                                       _plan([{'key': 'b', 'parent': None}, {'key': 'c', 'parent': 'b'}])])
+    assert shards.claim(directory, 'w1') == 0
+    assert shards.claim(directory, 'w2') == 1
+    assert shards.claim(directory, 'w3') is None
+
+    # w2 died: once its lock is stale, w3 takes the shard over.
+    lock = os.path.join(directory, "shard-0001.lock")
+    os.utime(lock, (time.time() - 1000, time.time() - 1000))
+    assert shards.merge_results(directory)['shards'][1]['status'] == 'stale'
+    assert shards.claim(directory, 'w3', stale_after=600) == 1
+    assert not [name for name in os.listdir(directory) if ".stale-" in name]
+
+    manager = FakeManager(fail={'c'})
+    shards.run_shard(directory, 0, manager, 'w1')
+    result = shards.run_shard(directory, 1, manager, 'w3')
+    assert result['failed'] == ['c']
+    assert [[item['key'] for item in level] for level in manager.levels[1]] == [['b'], ['c']]
+
+    summary = shards.merge_results(directory)
+    assert summary['complete']
+    assert summary['totals'] == {'items': 3, 'failed': 1}
+    assert summary['failed_items'] == ['c']
+    assert [summary['shards'][shard]['status'] for shard in (0, 1)] == ['done', 'failed']
+    assert os.path.exists(os.path.join(directory, shards.SUMMARY_FILE))
+
+    shards.retry(directory, 1)
+    assert shards.claim(directory, 'w4') == 1
+
+def test_taken_over_shard_is_not_recorded(tmp_path):
+    """Test that a worker whose stale lock was taken over does not record a result."""
+    directory = str(tmp_path)
+    shards.write_manifests(directory, [_plan([{'key': 'a', 'parent': None}])])
+    assert shards.claim(directory, 'w1') == 0
+    lock = os.path.join(directory, "shard-0000.lock")
+    os.utime(lock, (time.time() - 1000, time.time() - 1000))
+    assert shards.claim(directory, 'w2', stale_after=600) == 0
+
+    assert shards.run_shard(directory, 0, FakeManager(), 'w1') is None
+    assert not os.path.exists(os.path.join(directory, "shard-0000.result.json"))
+    assert shards.run_shard(directory, 0, FakeManager(), 'w2')['failed'] == []
+
+    # The summary is only rewritten when it changes.
+    summary_path = os.path.join(directory, shards.SUMMARY_FILE)
+    shards.merge_results(directory)
+    os.utime(summary_path, (1, 1))
+    shards.merge_results(directory)
+    assert os.path.getmtime(summary_path) == 1
+    assert [name for name in os.listdir(directory) if name.endswith('.tmp')] == []
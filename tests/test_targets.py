@@ -0,0 +1,54 @@
+import pytest
+from ddi.targets import load_targets, build_managers, run_on_targets
+
+INFOBLOX_CONFIG = {
+    "grid_master_ip": "10.0.0.1",
+    "admin_name": "admin",
+    "password": "secret",
+    "network_view": "default"
+}
+
+def test_single_target_uses_selected_view():
+    """Test the default single target and the --network-view override."""
+    targets = load_targets(INFOBLOX_CONFIG, network_view='cloud')
+    assert [(t['name'], t['grid_master_ip'], t['network_view']) for t in targets] == [('default', '10.0.0.1', 'cloud')]
+    assert targets[0]['wapi_version'] == '2.13.1'
+
+def test_targets_inherit_settings():
+    """Test that targets inherit connection settings from the infoblox section."""
+    config = dict(INFOBLOX_CONFIG, targets=[
+        {"name": "prod-cloud", "network_view": "cloud"},
+        {"name": "dev", "grid_master_ip": "10.9.0.1", "password": "dev-secret"}
+    ])
+    targets = load_targets(config)
+    assert targets[0]['grid_master_ip'] == '10.0.0.1' and targets[0]['network_view'] == 'cloud'
+    assert targets[1]['grid_master_ip'] == '10.9.0.1' and targets[1]['admin_name'] == 'admin'
+    assert targets[1]['password'] == 'dev-secret' and targets[1]['network_view'] == 'default'
+
+def test_network_views_shorthand_and_duplicates():
+    """Test the network_views shorthand and duplicate target names."""
+    targets = load_targets(dict(INFOBLOX_CONFIG, network_views=['a', 'b']))
+    assert [(t['name'], t['network_view']) for t in targets] == [('a', 'a'), ('b', 'b')]
+    with pytest.raises(ValueError):
+        load_targets(dict(INFOBLOX_CONFIG, network_views=['a', 'a']))
+
+def test_run_on_targets_isolates_failures():
+    """Test that one failing target does not affect the others."""
+    managers = build_managers(load_targets(dict(INFOBLOX_CONFIG, network_views=['ok', 'broken'])))
+
+    def work(manager):
+        if manager.network_view == 'broken':
+            raise RuntimeError("grid unreachable")
+        return 0
+
+    outcomes = run_on_targets(managers, work)
+    assert outcomes['ok'] == (0, None)
+    assert isinstance(outcomes['broken'][1], RuntimeError)
+
+def test_select_view_among_targets():
+    """Test that --network-view selects configured targets and rejects unknown views."""
+    from ddi.targets import select_view
+    targets = load_targets(dict(INFOBLOX_CONFIG, network_views=['default', 'cloud']))
+    assert [t['name'] for t in select_view(targets, 'cloud')] == ['cloud']
+    with pytest.raises(ValueError):
+        select_view(targets, 'lab')
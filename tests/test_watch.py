@@ -0,0 +1,101 @@
+import os
+from ddi.providers.aws import AWSProvider
+from ddi.watch import ExportWatcher
+
+HEADER = "AccountId,Region,VpcId,Name,CidrBlock,AdditionalCidrBlocks,Tags\n"
+ROW_1 = "111,us-east-1,vpc-1,one,10.0.0.0/16,[],\"[{'Key': 'env', 'Value': 'prod'}]\"\n"
+ROW_2 = "222,us-west-2,vpc-2,two,10.1.0.0/16,[],[]\n"
+
+class FakeManager:
+    """Creates networks in memory; only the 'env' EA is defined."""
+    write_view = 'default'
+
+    def __init__(self, fail=False):
+        self.created = []
+        self.networks = []
+        self.fail = fail
+
+    def clear_cache(self):
+        pass
+
+    def get_ext_attr_definitions(self):
+        return [{'name': 'env', 'type': 'STRING'}]
+
+    def get_networks(self):
+        return [{'network': cidr} for cidr in self.networks]
+
+    def get_network_containers(self):
+        return []
+
+    def create_network_levels(self, levels):
+        if self.fail:
+            return [item['key'] for level in levels for item in level]
+        for level in levels:
+            for item in level:
+                self.created.append((item['object'], item['payload']))
+                self.networks.append(item['payload']['network'])
+        return []
+
+def _rewrite(path, text, bump):
+    path.write_text(text)
+    os.utime(path, ns=(bump, bump))
+
+def test_watch_applies_only_settled_deltas(tmp_path):
+    export_file = tmp_path / "vpcs.csv"
+    _rewrite(export_file, HEADER + ROW_1 + ROW_2, 1_000_000_000)
+    manager = FakeManager()
+    manager.networks = ['10.0.0.0/16', '10.1.0.0/16']
+    watcher = ExportWatcher([AWSProvider({'aws': {'vpc_export_file': str(export_file)}})], manager)
+    assert watcher.start() == {}
+    assert watcher.poll() == {}
+
+    _rewrite(export_file, HEADER + ROW_1.replace("prod", "dev") + "333,eu-west-1,vpc-3,three,10.2.0.0/16,[],[]\n", 2_000_000_000)
+    assert watcher.poll() == {}  # not settled yet
+    # The retagged network already exists and is left alone, as by sync.
+    assert watcher.poll() == {'aws': (1, 1, 0, ['vpc-2:10.1.0.0/16'])}
+    assert [payload['network'] for _, payload in manager.created] == ['10.2.0.0/16']
+    assert watcher.poll() == {}
+
+def test_watch_creates_in_containment_order_without_undefined_eas(tmp_path):
+    export_file = tmp_path / "vpcs.csv"
+    _rewrite(export_file, HEADER, 1_000_000_000)
+    manager = FakeManager()
+    watcher = ExportWatcher([AWSProvider({'aws': {'vpc_export_file': str(export_file)}})], manager)
+    watcher.start()
+    _rewrite(export_file, HEADER + "111,us-east-1,vpc-4,four,10.0.1.0/24,[],\"[{'Key': 'team', 'Value': 'x'}]\"\n"
+             + ROW_1, 2_000_000_000)
+    watcher.poll()
+    assert watcher.poll() == {'aws': (2, 0, 0, [])}
+    assert [(object_type, payload['network']) for object_type, payload in manager.created] == [
+        ('networkcontainer', '10.0.0.0/16'), ('network', '10.0.1.0/24')]
+    assert manager.created[1][1]['extattrs'] == {}  # 'team' has no EA definition
+
+def test_watch_retries_failed_networks(tmp_path):
+    export_file = tmp_path / "vpcs.csv"
+    _rewrite(export_file, HEADER + ROW_1, 1_000_000_000)
+    manager = FakeManager(fail=True)
+    watcher = ExportWatcher([AWSProvider({'aws': {'vpc_export_file': str(export_file)}})], manager)
+    assert watcher.start(initial_sync=True) == {'aws': (0, 0, 1, [])}
+    manager.fail = False
+    assert watcher.poll() == {'aws': (1, 0, 0, [])}
+    assert watcher.poll() == {}
+
+def test_watch_survives_a_vanished_export(tmp_path, monkeypatch):
+    export_file = tmp_path / "vpcs.csv"
+    _rewrite(export_file, HEADER + ROW_1, 1_000_000_000)
+    manager = FakeManager()
+    provider = AWSProvider({'aws': {'vpc_export_file': str(export_file)}})
+    watcher = ExportWatcher([provider], manager)
+    watcher.start()
+
+    _rewrite(export_file, HEADER + ROW_1 + ROW_2, 2_000_000_000)
+    assert watcher.poll() == {}  # settling
+    # The file is replaced between the change check and the read.
+    def vanished():
+        raise FileNotFoundError(str(export_file))
+    monkeypatch.setattr(provider, 'warm', vanished)
+    assert watcher.poll() == {}
+    assert provider._records is not None  # previous warm state kept
+    monkeypatch.undo()
+    assert watcher.poll() == {}  # settling again
+    assert watcher.poll() == {'aws': (1, 0, 0, [])}